@@ -1,6 +1,7 @@
 
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from ..core.security import decode_jwt
@@ -18,6 +19,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token')
     return {'id': payload.get('sub'), 'email': payload.get('email')}
 
-async def get_db() -> AsyncGenerator:
-    async for session in get_session():
+# Métodos servidos por réplica de leitura, se houver; os demais vão ao primário.
+READ_METHODS = ('GET', 'HEAD')
+
+async def get_db(request: Request, user: dict = Depends(get_current_user)) -> AsyncGenerator:
+    # Como context manager, a exceção da rota chega ao get_session (que tira do rodízio a réplica que caiu).
+    async with asynccontextmanager(get_session)(user['id'], write=request.method not in READ_METHODS) as session:
         yield session
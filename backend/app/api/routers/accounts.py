@@ -1,6 +1,8 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from ...schemas.account import AccountCreate, AccountUpdate, AccountRead
+from ...core.cache import get_response_cache
 from ...services.accounts import AccountService
 from ...repositories.accounts import AccountRepository
 from ...api.deps import get_current_user, get_db
@@ -8,9 +10,9 @@ from ...api.deps import get_current_user, get_db
 router = APIRouter(prefix='/accounts', tags=['accounts'])
 
 @router.get('/', response_model=list[AccountRead])
-async def list_accounts(user: dict = Depends(get_current_user), db=Depends(get_db)):
+async def list_accounts(if_none_match: Optional[str] = Header(None), user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = AccountService(AccountRepository(db), user_id=user['id'])
-    return await service.list_accounts()
+    return await get_response_cache().respond(user['id'], 'accounts', {}, service.list_accounts, etag=service.list_etag, if_none_match=if_none_match)
 
 @router.post('/', response_model=AccountRead, status_code=status.HTTP_201_CREATED)
 async def create_account(obj_in: AccountCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
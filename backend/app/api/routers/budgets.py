@@ -1,8 +1,9 @@
 
 from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from ...schemas.budget import BudgetCreate, BudgetUpdate, BudgetRead
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from ...schemas.budget import BudgetCreate, BudgetUpdate, BudgetRead, BudgetStatus
+from ...core.cache import get_response_cache
 from ...services.budgets import BudgetService
 from ...repositories.budgets import BudgetRepository
 from ...api.deps import get_current_user, get_db
@@ -10,15 +11,20 @@ from ...api.deps import get_current_user, get_db
 router = APIRouter(prefix='/budgets', tags=['budgets'])
 
 @router.get('/', response_model=list[BudgetRead])
-async def list_budgets(month: Optional[date] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+async def list_budgets(month: Optional[date] = None, if_none_match: Optional[str] = Header(None), user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = BudgetService(BudgetRepository(db), user_id=user['id'])
-    return await service.list_budgets(month)
+    return await get_response_cache().respond(user['id'], 'budgets', {'month': month}, lambda: service.list_budgets(month), etag=lambda: service.list_etag(month), if_none_match=if_none_match)
 
 @router.post('/', response_model=BudgetRead, status_code=status.HTTP_201_CREATED)
 async def create_budget(obj_in: BudgetCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = BudgetService(BudgetRepository(db), user_id=user['id'])
     return await service.create_budget(obj_in)
 
+@router.get('/status', response_model=list[BudgetStatus])
+async def budget_status(month: date, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = BudgetService(BudgetRepository(db), user_id=user['id'])
+    return await get_response_cache().respond(user['id'], 'budget_status', {'month': month}, lambda: service.budget_status(month))
+
 @router.get('/{budget_id}', response_model=BudgetRead)
 async def get_budget(budget_id: int, user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = BudgetService(BudgetRepository(db), user_id=user['id'])
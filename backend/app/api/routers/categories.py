@@ -1,6 +1,8 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from ...schemas.category import CategoryCreate, CategoryUpdate, CategoryRead
+from ...core.cache import get_response_cache
 from ...services.categories import CategoryService
 from ...repositories.categories import CategoryRepository
 from ...api.deps import get_current_user, get_db
@@ -8,9 +10,9 @@ from ...api.deps import get_current_user, get_db
 router = APIRouter(prefix='/categories', tags=['categories'])
 
 @router.get('/', response_model=list[CategoryRead])
-async def list_categories(user: dict = Depends(get_current_user), db=Depends(get_db)):
+async def list_categories(if_none_match: Optional[str] = Header(None), user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = CategoryService(CategoryRepository(db), user_id=user['id'])
-    return await service.list_categories()
+    return await get_response_cache().respond(user['id'], 'categories', {}, service.list_categories, etag=service.list_etag, if_none_match=if_none_match)
 
 @router.post('/', response_model=CategoryRead, status_code=status.HTTP_201_CREATED)
 async def create_category(obj_in: CategoryCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
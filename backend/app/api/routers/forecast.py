@@ -0,0 +1,19 @@
+
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from ...core.cache import get_response_cache
+from ...schemas.forecast import AccountForecast
+from ...services.forecast import HISTORY_MONTHS, ForecastService
+from ...repositories.forecast import ForecastRepository
+from ...api.deps import get_current_user, get_db
+
+router = APIRouter(prefix='/forecast', tags=['forecast'])
+
+@router.get('/', response_model=list[AccountForecast])
+async def forecast(months: int = Query(3, ge=1, le=12), account_id: Optional[int] = None, history_months: int = Query(HISTORY_MONTHS, ge=1, le=60), user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ForecastService(ForecastRepository(db), user_id=user['id'])
+    # A data entra na chave: a projeção parte de hoje e muda de um dia para o outro mesmo sem escritas.
+    today = date.today()
+    params = {'months': months, 'account_id': account_id, 'history_months': history_months, 'today': today}
+    return await get_response_cache().respond(user['id'], 'forecast', params, lambda: service.forecast(months, account_id, history_months, today))
@@ -0,0 +1,51 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status
+from ...schemas.goal import GoalCreate, GoalUpdate, GoalRead
+from ...core.cache import get_response_cache
+from ...services.goals import GoalService
+from ...repositories.goals import GoalRepository
+from ...api.deps import get_current_user, get_db
+
+router = APIRouter(prefix='/goals', tags=['goals'])
+
+@router.get('/', response_model=list[GoalRead])
+async def list_goals(user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = GoalService(GoalRepository(db), user_id=user['id'])
+    # Como na projeção, a data entra na chave: ritmo e prazo mudam com o dia mesmo sem escritas.
+    today = date.today()
+    return await get_response_cache().respond(user['id'], 'goals', {'today': today}, lambda: service.list_goals(today))
+
+@router.post('/', response_model=GoalRead, status_code=status.HTTP_201_CREATED)
+async def create_goal(obj_in: GoalCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = GoalService(GoalRepository(db), user_id=user['id'])
+    missing = await service.missing_reference(obj_in)
+    if missing:
+        raise HTTPException(status_code=404, detail=missing)
+    return await service.create_goal(obj_in)
+
+@router.get('/{goal_id}', response_model=GoalRead)
+async def get_goal(goal_id: int, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = GoalService(GoalRepository(db), user_id=user['id'])
+    goal = await service.get_goal(goal_id)
+    if not goal:
+        raise HTTPException(status_code=404, detail='Goal not found')
+    return goal
+
+@router.put('/{goal_id}', response_model=GoalRead)
+async def update_goal(goal_id: int, obj_in: GoalUpdate, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = GoalService(GoalRepository(db), user_id=user['id'])
+    missing = await service.missing_reference(obj_in)
+    if missing:
+        raise HTTPException(status_code=404, detail=missing)
+    goal = await service.update_goal(goal_id, obj_in)
+    if not goal:
+        raise HTTPException(status_code=404, detail='Goal not found')
+    return goal
+
+@router.delete('/{goal_id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_goal(goal_id: int, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = GoalService(GoalRepository(db), user_id=user['id'])
+    success = await service.delete_goal(goal_id)
+    if not success:
+        raise HTTPException(status_code=404, detail='Goal not found')
+    return None
@@ -1,8 +1,11 @@
 
 from fastapi import APIRouter
+from ...core.cache import get_response_cache
+from ...core.security import get_token_cache
+from ...db.session import pool_status, replicas
 
 router = APIRouter(tags=['health'])
 
 @router.get('/health')
 async def health():
-    return {'status': 'ok'}
+    return {'status': 'ok', 'db_pool': pool_status(), 'db_replicas': replicas.stats(), 'token_cache': get_token_cache().stats(), 'response_cache': get_response_cache().stats()}
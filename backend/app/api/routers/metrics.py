@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ...core.metrics import get_metrics
+
+router = APIRouter(tags=['health'])
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(get_metrics().render(), media_type='text/plain; version=0.0.4; charset=utf-8')
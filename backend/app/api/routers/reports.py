@@ -0,0 +1,41 @@
+
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends
+from ...core.cache import get_response_cache
+from ...schemas.report import TypeTotal, CategoryTotal, PeriodTotal, TagTotal
+from ...services.reports import ReportService
+from ...repositories.reports import ReportRepository
+from ...api.deps import get_current_user, get_db
+
+router = APIRouter(prefix='/reports', tags=['reports'])
+
+@router.get('/summary', response_model=list[TypeTotal])
+async def report_summary(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ReportService(ReportRepository(db), user_id=user['id'])
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id}
+    return await get_response_cache().respond(user['id'], 'reports', {'report': 'summary', **params}, lambda: service.summary(start_date, end_date, account_id, category_id))
+
+@router.get('/by-category', response_model=list[CategoryTotal])
+async def report_by_category(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ReportService(ReportRepository(db), user_id=user['id'])
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id}
+    return await get_response_cache().respond(user['id'], 'reports', {'report': 'by_category', **params}, lambda: service.by_category(start_date, end_date, account_id, category_id))
+
+@router.get('/by-tag', response_model=list[TagTotal])
+async def report_by_tag(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ReportService(ReportRepository(db), user_id=user['id'])
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id}
+    return await get_response_cache().respond(user['id'], 'reports', {'report': 'by_tag', **params}, lambda: service.by_tag(start_date, end_date, account_id, category_id))
+
+@router.get('/by-month', response_model=list[PeriodTotal])
+async def report_by_month(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ReportService(ReportRepository(db), user_id=user['id'])
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id}
+    return await get_response_cache().respond(user['id'], 'reports', {'report': 'by_month', **params}, lambda: service.by_month(start_date, end_date, account_id, category_id))
+
+@router.get('/by-day', response_model=list[PeriodTotal])
+async def report_by_day(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = ReportService(ReportRepository(db), user_id=user['id'])
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id}
+    return await get_response_cache().respond(user['id'], 'reports', {'report': 'by_day', **params}, lambda: service.by_day(start_date, end_date, account_id, category_id))
@@ -1,24 +1,74 @@
 
 from datetime import date
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from ...schemas.transaction import TransactionCreate, TransactionUpdate, TransactionRead
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from ...core.cache import get_response_cache
+from ...core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ...schemas.transaction import BULK_MAX_ITEMS, TransactionCreate, TransactionUpdate, TransactionRead, TransactionPage, TransactionBulkDelete, TransactionBulkResult, TransactionBulkDeleteResult
+from ...schemas.imports import ImportResult
 from ...services.transactions import TransactionService
+from ...services.imports import ImportService
+from ...services.exports import iter_csv, iter_parquet, parquet_available
 from ...repositories.transactions import TransactionRepository
 from ...api.deps import get_current_user, get_db
 
 router = APIRouter(prefix='/transactions', tags=['transactions'])
 
-@router.get('/', response_model=list[TransactionRead])
-async def list_transactions(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, user: dict = Depends(get_current_user), db=Depends(get_db)):
+@router.get('/', response_model=TransactionPage)
+async def list_transactions(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, include_subcategories: bool = False, q: Optional[str] = Query(None, max_length=200), tag: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, stream: bool = False, if_none_match: Optional[str] = Header(None), user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = TransactionService(TransactionRepository(db), user_id=user['id'])
-    return await service.list_transactions(start_date, end_date, account_id, category_id)
+    # Só a decodificação do cursor vira 400: outros ValueError (consulta, cache) não são erro do cliente.
+    try:
+        service.check_cursor(cursor, q)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+    if stream:
+        rows = service.stream_transactions(start_date, end_date, account_id, category_id, cursor, include_subcategories, q, tag)
+        return StreamingResponse((txn.model_dump_json() + '\n' async for txn in rows), media_type='application/x-ndjson')
+    params = {'start_date': start_date, 'end_date': end_date, 'account_id': account_id, 'category_id': category_id, 'include_subcategories': include_subcategories, 'q': q, 'tag': tag, 'limit': limit, 'cursor': cursor}
+    return await get_response_cache().respond(user['id'], 'transactions', params, lambda: service.list_transactions(start_date, end_date, account_id, category_id, limit, cursor, include_subcategories, q, tag), etag=service.list_etag, if_none_match=if_none_match)
 
 @router.post('/', response_model=TransactionRead, status_code=status.HTTP_201_CREATED)
 async def create_transaction(obj_in: TransactionCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = TransactionService(TransactionRepository(db), user_id=user['id'])
     return await service.create_transaction(obj_in)
 
+# As rotas /bulk precisam vir antes de /{transaction_id}.
+@router.post('/bulk', response_model=TransactionBulkResult)
+async def bulk_create_transactions(items: List[Any] = Body(..., max_length=BULK_MAX_ITEMS), user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = TransactionService(TransactionRepository(db), user_id=user['id'])
+    return await service.bulk_create(items)
+
+@router.put('/bulk', response_model=TransactionBulkResult)
+async def bulk_update_transactions(items: List[Any] = Body(..., max_length=BULK_MAX_ITEMS), user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = TransactionService(TransactionRepository(db), user_id=user['id'])
+    return await service.bulk_update(items)
+
+@router.delete('/bulk', response_model=TransactionBulkDeleteResult)
+async def bulk_delete_transactions(obj_in: TransactionBulkDelete, user: dict = Depends(get_current_user), db=Depends(get_db)):
+    service = TransactionService(TransactionRepository(db), user_id=user['id'])
+    return await service.bulk_delete(obj_in.ids)
+
+@router.post('/import', response_model=ImportResult)
+async def import_transactions(account_id: int, file: UploadFile = File(...), format: Optional[str] = Query(None, pattern='^(csv|ofx)$'), user: dict = Depends(get_current_user), db=Depends(get_db)):
+    repo = TransactionRepository(db)
+    accounts, _ = await repo.owned_references(user['id'], {account_id}, set())
+    if account_id not in accounts:
+        raise HTTPException(status_code=404, detail='Account not found')
+    fmt = format or ('ofx' if (file.filename or '').lower().endswith(('.ofx', '.qfx')) else 'csv')
+    service = ImportService(repo, user_id=user['id'])
+    return await service.import_statement(file, account_id, fmt)
+
+@router.get('/export')
+async def export_transactions(start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, format: str = Query('csv', pattern='^(csv|parquet)$'), user: dict = Depends(get_current_user), db=Depends(get_db)):
+    partitions = TransactionRepository(db).stream_rows(user['id'], start_date, end_date, account_id, category_id)
+    if format == 'parquet':
+        if not parquet_available():
+            raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail='Parquet export requires pyarrow')
+        return StreamingResponse(iter_parquet(partitions), media_type='application/vnd.apache.parquet', headers={'Content-Disposition': 'attachment; filename="transactions.parquet"'})
+    return StreamingResponse(iter_csv(partitions), media_type='text/csv', headers={'Content-Disposition': 'attachment; filename="transactions.csv"'})
+
 @router.get('/{transaction_id}', response_model=TransactionRead)
 async def get_transaction(transaction_id: int, user: dict = Depends(get_current_user), db=Depends(get_db)):
     service = TransactionService(TransactionRepository(db), user_id=user['id'])
@@ -0,0 +1,261 @@
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+
+import orjson
+from fastapi import Response
+
+from ..db import session as db_session
+from .config import get_settings
+from .responses import ORJSONResponse, etag_matches, not_modified, weak_etag
+
+logger = logging.getLogger(__name__)
+
+# Fontes de dados (tabelas de um usuário) que uma escrita pode alterar.
+ACCOUNTS = 'accounts'
+CATEGORIES = 'categories'
+BUDGETS = 'budgets'
+TRANSACTIONS = 'transactions'
+GOALS = 'goals'
+
+# Recursos cacheáveis e as fontes das quais cada um depende: a chave de uma resposta inclui a
+# geração de todas elas, então uma escrita em qualquer fonte invalida o recurso.
+RESOURCE_SOURCES: Dict[str, Tuple[str, ...]] = {
+    'accounts': (ACCOUNTS, TRANSACTIONS),
+    'categories': (CATEGORIES,),
+    'budgets': (BUDGETS,),
+    'budget_status': (BUDGETS, CATEGORIES, TRANSACTIONS),
+    'transactions': (TRANSACTIONS, CATEGORIES),
+    'reports': (TRANSACTIONS, CATEGORIES),
+    'forecast': (ACCOUNTS, BUDGETS, CATEGORIES, TRANSACTIONS),
+    'goals': (GOALS, ACCOUNTS, CATEGORIES, TRANSACTIONS),
+}
+
+def _new_generation() -> int:
+    # Contadores nascem do relógio: um contador perdido (eviction, restart) nunca volta a um valor já usado.
+    return time.time_ns()
+
+# Contadores de geração (usuário, fonte) guardados por processo; acima disso sai o menos usado.
+MAX_GENERATIONS = 100_000
+
+class MemoryBackend:
+    """LRU em processo limitado por bytes. Só invalida dentro do processo: com vários workers ou
+    réplicas use o backend Redis."""
+
+    def __init__(self, max_bytes: int, max_generations: int = MAX_GENERATIONS):
+        self.max_bytes = max_bytes
+        self.max_generations = max_generations
+        self.size = 0
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        # LRU próprio: um contador descartado recomeça de `_new_generation()`, maior que qualquer valor
+        # já usado, e as respostas guardadas sob o antigo só deixam de ser lidas.
+        self._generations: OrderedDict[str, int] = OrderedDict()
+
+    async def generations(self, keys: Sequence[str]) -> List[int]:
+        return [self._generation(key, 0) for key in keys]
+
+    async def bump(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._generation(key, 1)
+
+    def _generation(self, key: str, increment: int) -> int:
+        value = self._generations.pop(key, None)
+        value = (_new_generation() if value is None else value) + increment
+        self._generations[key] = value
+        while len(self._generations) > self.max_generations:
+            self._generations.popitem(last=False)
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self._pop(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    async def close(self) -> None:
+        pass
+
+class RedisBackend:
+    """Backend compartilhado entre processos; `client` é um `redis.asyncio.Redis` (ou um fake com a mesma API)."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def generations(self, keys: Sequence[str]) -> List[int]:
+        # SET NX + MGET num único pipeline: um round trip, criando os contadores que faltam.
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, _new_generation(), nx=True)
+        pipe.mget(keys)
+        values = (await pipe.execute())[-1]
+        return [int(value) for value in values]
+
+    async def bump(self, keys: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, _new_generation(), nx=True)
+            pipe.incr(key)
+        await pipe.execute()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+class ResponseCache:
+    """Cache de respostas JSON de leitura por (usuário, recurso, parâmetros).
+
+    Cada fonte tem uma geração por usuário; a chave da resposta inclui as gerações das fontes do
+    recurso, e as escritas incrementam a geração depois do commit. Assim uma resposta anterior à
+    escrita nunca é servida de novo; ela só deixa de ser lida e expira pelo TTL ou pelo LRU.
+    Falhas do backend não derrubam a requisição: a leitura vai direto ao banco.
+    """
+
+    def __init__(self, backend: Optional[Any], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def _generation_key(user_id: UUID, source: str) -> str:
+        return f'gen:{user_id}:{source}'
+
+    @staticmethod
+    def _entry_key(user_id: UUID, resource: str, generations: Sequence[int], params: Mapping[str, Any]) -> str:
+        digest = hashlib.sha256(orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+        return f'resp:{user_id}:{resource}:{".".join(map(str, generations))}:{digest}'
+
+    async def respond(self, user_id: UUID, resource: str, params: Mapping[str, Any], produce: Callable[[], Awaitable[Any]], etag: Optional[Callable[[], Awaitable[str]]] = None, if_none_match: Optional[str] = None) -> Response:
+        """Devolve a resposta em cache ou renderiza `produce()` com orjson e guarda o corpo.
+
+        Com `etag`, o ETag é guardado junto do corpo: num HIT ele continua válido (as gerações não
+        mudaram) e o If-None-Match é respondido sem tocar no banco; num MISS `etag()` roda antes de
+        `produce()` e um ETag igual ao do cliente vira 304 sem montar a listagem. Com backend, as
+        gerações entram no ETag: `etag()` parte de max(updated_at), e duas escritas no mesmo segundo
+        (a resolução do SQLite) não o mudariam, mas cada uma incrementa a geração.
+        """
+        key = None
+        entry = None
+        generations = None
+        if self.backend is not None:
+            try:
+                sources = RESOURCE_SOURCES[resource]
+                generations = await self.backend.generations([self._generation_key(user_id, source) for source in sources])
+                key = self._entry_key(user_id, resource, generations, params)
+                entry = await self.backend.get(key)
+            except Exception as exc:
+                self._failed('read', exc)
+        if entry is not None:
+            self.hits += 1
+            cached_tag, body = entry.split(b'\n', 1)
+            headers = {'X-Cache': 'HIT'}
+            if cached_tag:
+                if etag_matches(if_none_match, cached_tag.decode()):
+                    return not_modified(cached_tag.decode())
+                headers['ETag'] = cached_tag.decode()
+            return Response(body, media_type='application/json', headers=headers)
+        tag = await etag() if etag is not None else None
+        if tag is not None and generations is not None:
+            tag = weak_etag(tag, *generations)
+        if tag is not None and etag_matches(if_none_match, tag):
+            return not_modified(tag)
+        headers = {}
+        if self.backend is not None:
+            self.misses += 1
+            headers['X-Cache'] = 'MISS'
+        if tag is not None:
+            headers['ETag'] = tag
+        response = ORJSONResponse(await produce(), headers=headers)
+        if key is not None:
+            try:
+                # O orjson nunca emite quebra de linha no JSON: a primeira do valor separa o ETag (vazio se não houver).
+                await self.backend.set(key, (tag or '').encode() + b'\n' + response.body, self.ttl)
+            except Exception as exc:
+                self._failed('write', exc)
+        return response
+
+    async def bump(self, user_id: UUID, *sources: str) -> None:
+        """Invalida os recursos que dependem de `sources`; chamar depois do commit da escrita."""
+        await self.bump_users([user_id], *sources)
+
+    async def bump_users(self, user_ids: Iterable[UUID], *sources: str) -> None:
+        user_ids = list(user_ids)
+        # Toda escrita que invalida o cache abre a janela read-your-writes, inclusive as feitas fora de
+        # uma requisição (jobs): senão a próxima leitura iria a uma réplica atrasada e guardaria o dado
+        # antigo sob a geração nova.
+        for user_id in user_ids:
+            db_session.replicas.pin(user_id)
+        if self.backend is None:
+            return
+        keys = [self._generation_key(user_id, source) for user_id in user_ids for source in sources]
+        if not keys:
+            return
+        try:
+            await self.backend.bump(keys)
+        except Exception as exc:
+            self._failed('bump', exc)
+
+    def _failed(self, operation: str, exc: Exception) -> None:
+        self.errors += 1
+        logger.warning('Response cache %s failed: %s', operation, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {'backend': type(self.backend).__name__ if self.backend else None, 'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+        if isinstance(self.backend, MemoryBackend):
+            stats.update(entries=len(self.backend._entries), bytes=self.backend.size, generations=len(self.backend._generations))
+        return stats
+
+_response_cache: Optional[ResponseCache] = None
+
+def _make_backend(name: str) -> Optional[Any]:
+    settings = get_settings()
+    if name == 'memory':
+        return MemoryBackend(settings.cache_max_bytes)
+    if name == 'redis':
+        # Dependência opcional: só é importada quando CACHE_BACKEND=redis.
+        import redis.asyncio as redis
+        return RedisBackend(redis.Redis.from_url(settings.redis_url))
+    if name == 'none':
+        return None
+    raise ValueError(f'Unknown CACHE_BACKEND: {name}')
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        settings = get_settings()
+        _response_cache = ResponseCache(_make_backend(settings.cache_backend), settings.cache_ttl)
+    return _response_cache
+
+async def close_response_cache() -> None:
+    global _response_cache
+    if _response_cache is not None and _response_cache.backend is not None:
+        await _response_cache.backend.close()
+    _response_cache = None
@@ -9,6 +9,40 @@ class Settings(BaseSettings):
     supabase_jwks_url: str = Field(..., env="SUPABASE_JWKS_URL")
     supabase_jwt_audience: str = Field(..., env="SUPABASE_JWT_AUDIENCE")
     allowed_origins: str = Field('*', env="ALLOWED_ORIGINS")
+    jwks_cache_ttl: int = Field(300, env="JWKS_CACHE_TTL")
+    jwks_max_stale: int = Field(86400, env="JWKS_MAX_STALE")
+    token_cache_size: int = Field(10000, env="TOKEN_CACHE_SIZE")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(100, env="DB_STATEMENT_CACHE_SIZE")
+    # Modo compatível com o pooler de transações do Supabase (pgbouncer, porta 6543).
+    db_pgbouncer: bool = Field(False, env="DB_PGBOUNCER")
+    # Réplicas de leitura (URLs separadas por vírgula; vazio usa só o primário). Depois de uma escrita,
+    # as leituras do usuário ficam no primário por READ_YOUR_WRITES_SECONDS; uma réplica que falha fica
+    # fora por REPLICA_RETRY_SECONDS.
+    database_replica_urls: str = Field('', env="DATABASE_REPLICA_URLS")
+    read_your_writes_seconds: float = Field(5, env="READ_YOUR_WRITES_SECONDS")
+    replica_retry_seconds: float = Field(30, env="REPLICA_RETRY_SECONDS")
+    category_tree_cache_size: int = Field(10000, env="CATEGORY_TREE_CACHE_SIZE")
+    category_tree_cache_ttl: int = Field(60, env="CATEGORY_TREE_CACHE_TTL")
+    # Cache de respostas de leitura: memory (um processo), redis (requer o pacote `redis`) ou none.
+    cache_backend: str = Field('memory', env="CACHE_BACKEND")
+    cache_ttl: int = Field(300, env="CACHE_TTL")
+    cache_max_bytes: int = Field(64 * 1024 * 1024, env="CACHE_MAX_BYTES")
+    redis_url: str = Field('redis://localhost:6379/0', env="REDIS_URL")
+    # Instrumentação: /metrics (Prometheus), log de consultas lentas e alerta de N+1.
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    slow_query_ms: float = Field(200, env="SLOW_QUERY_MS")
+    n_plus_one_threshold: int = Field(10, env="N_PLUS_ONE_THRESHOLD")
+    scheduler_enabled: bool = Field(True, env="SCHEDULER_ENABLED")
+    recurring_interval_minutes: int = Field(60, env="RECURRING_INTERVAL_MINUTES")
+    recurring_batch_size: int = Field(1000, env="RECURRING_BATCH_SIZE")
+    # Partições de transactions (Postgres): month ou year, e quantos períodos futuros manter criados (0 desliga o job).
+    transaction_partition_interval: str = Field('year', env="TRANSACTION_PARTITION_INTERVAL")
+    transaction_partitions_ahead: int = Field(2, env="TRANSACTION_PARTITIONS_AHEAD")
 
     class Config:
         env_file = '.env'
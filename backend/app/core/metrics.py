@@ -0,0 +1,200 @@
+
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Histogram:
+    """Histograma no formato do Prometheus (buckets cumulativos `le`, `_sum` e `_count`) por combinação de labels."""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # Por labels: contagens por bucket (a última é o +Inf), soma e total.
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {count}'
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.series.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+class RequestStats:
+    """Consultas feitas durante uma requisição; as tasks filhas (streaming) herdam o mesmo objeto pelo contexto."""
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: StatementCounter = StatementCounter()
+
+    @property
+    def route(self) -> str:
+        """Template da rota (`/api/v1/accounts/{account_id}`), conhecido depois do roteamento.
+
+        Montado do caminho e dos path params: `route.path` não inclui o prefixo do include_router
+        em todas as versões do FastAPI, e o caminho cru (com ids) explodiria a cardinalidade.
+        """
+        if self.scope.get('route') is None:
+            return 'unmatched'
+        params = {str(value): name for name, value in self.scope.get('path_params', {}).items()}
+        return '/'.join('{' + params[segment] + '}' if segment in params else segment for segment in self.scope['path'].split('/'))
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+def _short(statement: str, limit: int = 500) -> str:
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+class Metrics:
+    """Latência por rota, consultas e tempo de banco por requisição, consultas lentas e N+1.
+
+    Tudo fica em memória no processo; com vários workers cada um expõe os próprios números e o
+    Prometheus agrega. Os parâmetros das consultas nunca são registrados, só o SQL.
+    """
+
+    def __init__(self, slow_query_ms: float, n_plus_one_threshold: int):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.request_latency = Histogram('http_request_duration_seconds', 'Latência das requisições HTTP por rota.', LATENCY_BUCKETS, ('method', 'route', 'status'))
+        self.request_queries = Histogram('http_request_db_queries', 'Consultas SQL por requisição.', QUERY_COUNT_BUCKETS, ('method', 'route'))
+        self.request_db_time = Histogram('http_request_db_seconds', 'Tempo de banco por requisição.', LATENCY_BUCKETS, ('method', 'route'))
+        self.query_latency = Histogram('db_query_duration_seconds', 'Duração de cada consulta SQL.', QUERY_BUCKETS)
+        self.slow_queries = Counter('db_slow_queries_total', 'Consultas acima de SLOW_QUERY_MS.', ('route',))
+        self.repeated_statements = Counter('db_repeated_statements_total', 'Requisições que repetiram o mesmo SQL N_PLUS_ONE_THRESHOLD vezes ou mais (provável N+1).', ('route',))
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.query_latency.observe(seconds)
+        stats = _request_stats.get()
+        route = 'background'
+        if stats is not None:
+            route = stats.route
+            stats.queries += 1
+            stats.db_time += seconds
+            stats.statements[statement] += 1
+        if seconds >= self.slow_query_seconds:
+            self.slow_queries.inc(route)
+            logger.warning('Slow query (%.1f ms) on %s: %s', seconds * 1000, route, _short(statement))
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        self.request_latency.observe(seconds, method, route, str(status))
+        self.request_queries.observe(stats.queries, method, route)
+        self.request_db_time.observe(stats.db_time, method, route)
+        # executemany conta uma vez: os lotes não disparam o alerta, só o mesmo SQL repetido em laço.
+        repeated = [(count, statement) for statement, count in stats.statements.items() if count >= self.n_plus_one_threshold]
+        if repeated:
+            self.repeated_statements.inc(route)
+            count, statement = max(repeated)
+            logger.warning('Possible N+1 on %s %s: %d executions of %s', method, route, count, _short(statement))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.request_latency, self.request_queries, self.request_db_time, self.query_latency, self.slow_queries, self.repeated_statements):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+_metrics: Optional[Metrics] = None
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        settings = get_settings()
+        _metrics = Metrics(settings.slow_query_ms, settings.n_plus_one_threshold)
+    return _metrics
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Mede cada execução no cursor; as que falham não são registradas."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        get_metrics().record_query(statement, time.perf_counter() - context._query_started)
+
+class MetricsMiddleware:
+    """Middleware ASGI: latência por rota e o resumo de banco de cada requisição."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            get_metrics().record_request(scope['method'], stats.route, status, time.perf_counter() - start, stats)
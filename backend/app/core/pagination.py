@@ -0,0 +1,41 @@
+import base64
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import List, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _encode(*parts) -> str:
+    raw = '|'.join(str(part) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode(cursor: str, size: int) -> List[str]:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    parts = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    if len(parts) != size:
+        raise ValueError('Invalid cursor')
+    return parts
+
+def encode_cursor(value: date, row_id: int) -> str:
+    """Codifica a chave (date, id) da última linha de uma página em um cursor opaco."""
+    return _encode(value.isoformat(), row_id)
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decodifica um cursor gerado por `encode_cursor`. Lança ValueError se for inválido."""
+    try:
+        value, row_id = _decode(cursor, 2)
+        return date.fromisoformat(value), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+def encode_search_cursor(rank: Decimal, value: date, row_id: int) -> str:
+    """Como `encode_cursor`, com a relevância na frente: a busca ordena por (rank, date, id)."""
+    return _encode(rank, value.isoformat(), row_id)
+
+def decode_search_cursor(cursor: str) -> Tuple[Decimal, date, int]:
+    try:
+        rank, value, row_id = _decode(cursor, 3)
+        return Decimal(rank), date.fromisoformat(value), int(row_id)
+    except (ValueError, UnicodeDecodeError, InvalidOperation) as exc:
+        raise ValueError('Invalid cursor') from exc
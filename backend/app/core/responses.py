@@ -0,0 +1,49 @@
+
+import hashlib
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        # Mesmo formato do pydantic: string com a escala original, nunca float.
+        return str(obj)
+    if isinstance(obj, UUID):
+        # O asyncpg devolve uma subclasse de UUID que o orjson não reconhece.
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        # Modelos já validados: os campos vão direto para o orjson, sem passar por model_dump.
+        return obj.__dict__
+    raise TypeError
+
+class ORJSONResponse(JSONResponse):
+    """Resposta JSON renderizada com orjson para listagens grandes.
+
+    Aceita modelos pydantic já validados; a rota retorna a resposta pronta, então o FastAPI não
+    valida nem serializa o conteúdo de novo pelo `response_model` (que continua servindo à doc).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+def weak_etag(*parts: Any) -> str:
+    """ETag fraco (`W/"..."`) a partir das partes que identificam uma versão do conteúdo."""
+    digest = hashlib.sha256('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/ e aceita lista ou `*`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque for candidate in if_none_match.split(','))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag})
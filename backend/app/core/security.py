@@ -1,35 +1,163 @@
 
+import asyncio
+import hashlib
+import logging
 import time
-from functools import lru_cache
-from typing import Any, Dict
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
 import jwt
-from jwt import PyJWKClient
+from jwt import PyJWK, PyJWKSet
 
 from .config import get_settings
 
-JWKS_CACHE: Dict[str, Any] = {}
-CACHE_EXPIRATION = 300  # segundos
+logger = logging.getLogger(__name__)
 
-async def get_jwks_client() -> PyJWKClient:
-    settings = get_settings()
-    url = settings.supabase_jwks_url
-    now = time.time()
-    cached = JWKS_CACHE.get(url)
-    if cached and now - cached['timestamp'] < CACHE_EXPIRATION:
-        return cached['client']
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
+FORCED_REFRESH_INTERVAL = 30  # segundos entre refetches disparados por `kid` desconhecido
+RETRY_INTERVAL = 10  # segundos antes de tentar de novo após uma falha em background
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartilhado (pool de conexões reaproveitado entre refreshes)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=httpx.Timeout(5.0), limits=httpx.Limits(max_connections=10, max_keepalive_connections=2))
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+class JWKSCache:
+    """Cache do JWKS com refresh single-flight e stale-while-revalidate.
+
+    Depois de `ttl` segundos as chaves continuam sendo servidas enquanto um único refresh roda em
+    background; só se o cache passar de `max_stale` a requisição espera pelo refetch. Um `kid`
+    desconhecido força um refetch, limitado a um a cada FORCED_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, url: str, ttl: float, max_stale: float):
+        self.url = url
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.keys: Dict[str, PyJWK] = {}
+        self.fetched_at = 0.0
+        self.last_attempt = 0.0
+        self.last_forced = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _fetch(self) -> None:
+        self.last_attempt = time.monotonic()
+        resp = await get_http_client().get(self.url)
         resp.raise_for_status()
-        jwks_data = resp.json()
-    jwk_client = PyJWKClient.from_jwks_data(jwks_data)
-    JWKS_CACHE[url] = {'client': jwk_client, 'timestamp': now}
-    return jwk_client
+        jwk_set = PyJWKSet.from_dict(resp.json())
+        self.keys = {key.key_id: key for key in jwk_set.keys}
+        self.fetched_at = time.monotonic()
+
+    def _refresh_task(self) -> asyncio.Task:
+        # Single-flight: todas as requisições concorrentes aguardam a mesma task.
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.get_running_loop().create_task(self._fetch())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning('JWKS refresh failed: %s', task.exception())
+
+    async def get_signing_key(self, kid: Optional[str]) -> PyJWK:
+        now = time.monotonic()
+        age = now - self.fetched_at
+        if not self.keys or age > self.max_stale:
+            await asyncio.shield(self._refresh_task())
+        elif age > self.ttl and now - self.last_attempt > RETRY_INTERVAL:
+            self._refresh_task()
+        key = self._lookup(kid)
+        if key is None and now - self.last_forced > FORCED_REFRESH_INTERVAL:
+            self.last_forced = now
+            await asyncio.shield(self._refresh_task())
+            key = self._lookup(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f'Unknown signing key: {kid}')
+        return key
+
+    def _lookup(self, kid: Optional[str]) -> Optional[PyJWK]:
+        if kid is None and len(self.keys) == 1:
+            return next(iter(self.keys.values()))
+        return self.keys.get(kid)
+
+class TokenCache:
+    """LRU limitado de claims já verificados, indexado pelo SHA-256 do token.
+
+    Cada entrada expira no `exp` do próprio token, então um token nunca é aceito além da validade
+    que a verificação RS256 aceitaria.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get('exp')
+        if not self.maxsize or not isinstance(exp, (int, float)):
+            return
+        digest = self._digest(token)
+        self._entries[digest] = (float(exp), claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+_jwks_cache: Optional[JWKSCache] = None
+_token_cache: Optional[TokenCache] = None
+
+def get_jwks_cache() -> JWKSCache:
+    global _jwks_cache
+    if _jwks_cache is None:
+        settings = get_settings()
+        _jwks_cache = JWKSCache(settings.supabase_jwks_url, settings.jwks_cache_ttl, settings.jwks_max_stale)
+    return _jwks_cache
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(get_settings().token_cache_size)
+    return _token_cache
 
 async def decode_jwt(token: str) -> Dict[str, Any]:
+    cached = get_token_cache().get(token)
+    if cached is not None:
+        return cached
     settings = get_settings()
-    jwk_client = await get_jwks_client()
-    signing_key = jwk_client.get_signing_key_from_jwt(token)
+    kid = jwt.get_unverified_header(token).get('kid')
+    signing_key = await get_jwks_cache().get_signing_key(kid)
     data = jwt.decode(token, signing_key.key, audience=settings.supabase_jwt_audience, algorithms=['RS256'])
+    get_token_cache().put(token, data)
     return data
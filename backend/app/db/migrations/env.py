@@ -24,7 +24,9 @@ def do_run_migrations(connection) -> None:
         context.run_migrations()
 
 async def run_migrations_online() -> None:
-    async with engine.begin() as conn:
+    # Sem transação externa: `context.begin_transaction()` abre a sua, e migrações com
+    # `autocommit_block()` (backfills em lotes) conseguem fazer commit no meio.
+    async with engine.connect() as conn:
         await conn.run_sync(do_run_migrations)
 
 if context.is_offline_mode():
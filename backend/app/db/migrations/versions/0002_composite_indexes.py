@@ -0,0 +1,27 @@
+
+"""Composite indexes for per-user query patterns"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Listagem paginada: WHERE user_id = ? ORDER BY date DESC, id DESC
+    op.create_index('ix_transactions_user_date_id', 'transactions', ['user_id', sa.text('date DESC'), sa.text('id DESC')])
+    op.create_index('ix_transactions_user_account_date', 'transactions', ['user_id', 'account_id', 'date'])
+    op.create_index('ix_transactions_user_category_date', 'transactions', ['user_id', 'category_id', 'date'])
+    op.create_index('ix_budgets_user_month', 'budgets', ['user_id', 'month'])
+    # Índices simples declarados nos modelos (index=True) que a 0001 não criou.
+    op.create_index('ix_accounts_user_id', 'accounts', ['user_id'])
+    op.create_index('ix_categories_user_id', 'categories', ['user_id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_user_id', table_name='categories')
+    op.drop_index('ix_accounts_user_id', table_name='accounts')
+    op.drop_index('ix_budgets_user_month', table_name='budgets')
+    op.drop_index('ix_transactions_user_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_account_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_date_id', table_name='transactions')
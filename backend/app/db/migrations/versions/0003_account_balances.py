@@ -0,0 +1,34 @@
+
+"""Monthly account balance snapshots"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('account_balances',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('net_change', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('account_id', 'month')
+    )
+    op.create_index('ix_account_balances_user_id', 'account_balances', ['user_id'])
+    # Backfill: a partir daqui o saldo é mantido incrementalmente pelo TransactionRepository.
+    op.execute("""
+        INSERT INTO account_balances (account_id, month, user_id, net_change)
+        SELECT account_id, date_trunc('month', date)::date, user_id,
+               SUM(CASE type WHEN 'income' THEN amount WHEN 'expense' THEN -amount ELSE amount END)
+        FROM transactions
+        GROUP BY account_id, date_trunc('month', date)::date, user_id
+    """)
+
+def downgrade() -> None:
+    op.drop_index('ix_account_balances_user_id', table_name='account_balances')
+    op.drop_table('account_balances')
@@ -0,0 +1,17 @@
+
+"""Import hash for idempotent statement imports"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('import_hash', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('uq_transactions_account_import_hash', 'transactions', ['account_id', 'import_hash'])
+
+def downgrade() -> None:
+    op.drop_constraint('uq_transactions_account_import_hash', 'transactions', type_='unique')
+    op.drop_column('transactions', 'import_hash')
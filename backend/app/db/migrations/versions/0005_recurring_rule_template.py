@@ -0,0 +1,30 @@
+
+"""Transaction template and due-date index for recurring rules"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('recurring_rules', sa.Column('account_id', sa.Integer(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('type', sa.String(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=True))
+    op.add_column('recurring_rules', sa.Column('description', sa.String(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('merchant', sa.String(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('start_date', sa.Date(), nullable=True))
+    op.add_column('recurring_rules', sa.Column('end_date', sa.Date(), nullable=True))
+    op.create_foreign_key('recurring_rules_account_id_fkey', 'recurring_rules', 'accounts', ['account_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('recurring_rules_category_id_fkey', 'recurring_rules', 'categories', ['category_id'], ['id'], ondelete='SET NULL')
+    op.execute('UPDATE recurring_rules SET start_date = next_run WHERE start_date IS NULL')
+    op.create_index('ix_recurring_rules_next_run', 'recurring_rules', ['next_run', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_recurring_rules_next_run', table_name='recurring_rules')
+    op.drop_constraint('recurring_rules_category_id_fkey', 'recurring_rules', type_='foreignkey')
+    op.drop_constraint('recurring_rules_account_id_fkey', 'recurring_rules', type_='foreignkey')
+    for column in ('end_date', 'start_date', 'merchant', 'description', 'amount', 'type', 'category_id', 'account_id'):
+        op.drop_column('recurring_rules', column)
@@ -0,0 +1,20 @@
+"""Full-text and trigram search over transaction description and merchant"""
+from alembic import op
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+DOCUMENT = "coalesce(description, '') || ' ' || coalesce(merchant, '')"
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(f"ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', {DOCUMENT})) STORED")
+    op.execute('CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)')
+    op.execute(f'CREATE INDEX ix_transactions_search_trgm ON transactions USING gin (({DOCUMENT}) gin_trgm_ops)')
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_search_trgm', table_name='transactions')
+    op.drop_index('ix_transactions_search_vector', table_name='transactions')
+    op.drop_column('transactions', 'search_vector')
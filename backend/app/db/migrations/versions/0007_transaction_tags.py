@@ -0,0 +1,67 @@
+"""Move transaction tags from metadata JSON to tags/transaction_tags"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# Cada lote cobre uma faixa de ids de `transactions`; todos os passos são idempotentes, então uma
+# migração interrompida pode ser executada de novo.
+BACKFILL = (
+    """
+    INSERT INTO tags (user_id, name)
+    SELECT DISTINCT t.user_id, btrim(tag.value)
+    FROM transactions t CROSS JOIN LATERAL json_array_elements_text(t.metadata -> 'tags') AS tag(value)
+    WHERE t.id > :low AND t.id <= :high AND json_typeof(t.metadata -> 'tags') = 'array' AND btrim(tag.value) <> ''
+    ON CONFLICT (user_id, name) DO NOTHING
+    """,
+    """
+    INSERT INTO transaction_tags (transaction_id, tag_id)
+    SELECT DISTINCT t.id, g.id
+    FROM transactions t CROSS JOIN LATERAL json_array_elements_text(t.metadata -> 'tags') AS tag(value)
+    JOIN tags g ON g.user_id = t.user_id AND g.name = btrim(tag.value)
+    WHERE t.id > :low AND t.id <= :high AND json_typeof(t.metadata -> 'tags') = 'array'
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    UPDATE transactions SET metadata = NULLIF(metadata::jsonb - 'tags', '{}'::jsonb)::json
+    WHERE id > :low AND id <= :high AND json_typeof(metadata) = 'object' AND (metadata::jsonb) ? 'tags'
+    """,
+)
+
+def upgrade() -> None:
+    op.execute('DELETE FROM tags a USING tags b WHERE a.user_id = b.user_id AND a.name = b.name AND a.id > b.id')
+    op.create_unique_constraint('uq_tags_user_name', 'tags', ['user_id', 'name'])
+    op.create_table('transaction_tags',
+        sa.Column('transaction_id', sa.Integer(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('transaction_id', 'tag_id'),
+    )
+    op.create_index('ix_transaction_tags_tag_transaction', 'transaction_tags', ['tag_id', 'transaction_id'])
+    # Fora da transação da migração: cada lote faz commit próprio e não segura locks na tabela inteira.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text('SELECT coalesce(max(id), 0) FROM transactions')).scalar()
+        for low in range(0, max_id, BATCH_SIZE):
+            for statement in BACKFILL:
+                conn.execute(sa.text(statement), {'low': low, 'high': low + BATCH_SIZE})
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE transactions t SET metadata = (coalesce(t.metadata::jsonb, '{}'::jsonb) || jsonb_build_object('tags', tagged.names))::json
+        FROM (
+            SELECT tt.transaction_id, jsonb_agg(g.name ORDER BY g.name) AS names
+            FROM transaction_tags tt JOIN tags g ON g.id = tt.tag_id
+            GROUP BY tt.transaction_id
+        ) tagged
+        WHERE t.id = tagged.transaction_id
+    """)
+    op.drop_index('ix_transaction_tags_tag_transaction', table_name='transaction_tags')
+    op.drop_table('transaction_tags')
+    op.drop_constraint('uq_tags_user_name', 'tags', type_='unique')
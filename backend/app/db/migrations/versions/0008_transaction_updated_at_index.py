@@ -0,0 +1,14 @@
+"""Index on (user_id, updated_at) for list ETags"""
+from alembic import op
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # ETag da listagem de transações: max(updated_at) e count(*) por usuário, sem ler a tabela.
+    op.create_index('ix_transactions_user_updated_at', 'transactions', ['user_id', 'updated_at'])
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_user_updated_at', table_name='transactions')
@@ -0,0 +1,129 @@
+"""Range partitioning of transactions by date"""
+import os
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+# Mesmas variáveis do app (Settings); o job do scheduler cria as partições futuras depois.
+INTERVAL = os.environ.get('TRANSACTION_PARTITION_INTERVAL', 'year')
+AHEAD = int(os.environ.get('TRANSACTION_PARTITIONS_AHEAD', '2'))
+LEGACY = 'transactions_unpartitioned'
+PARTITIONED = 'transactions_partitioned'
+
+COLUMNS = 'id, user_id, account_id, type, amount, date, description, category_id, merchant, metadata, import_hash, created_at, updated_at'
+DOCUMENT = "coalesce(description, '') || ' ' || coalesce(merchant, '')"
+INDEXES = (
+    ('ix_transactions_user_date_id', ['user_id', sa.text('date DESC'), sa.text('id DESC')]),
+    ('ix_transactions_user_account_date', ['user_id', 'account_id', 'date']),
+    ('ix_transactions_user_category_date', ['user_id', 'category_id', 'date']),
+    ('ix_transactions_user_updated_at', ['user_id', 'updated_at']),
+)
+SEARCH = (
+    f"ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (to_tsvector('portuguese', {DOCUMENT})) STORED",
+    'CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)',
+    f'CREATE INDEX ix_transactions_search_trgm ON transactions USING gin (({DOCUMENT}) gin_trgm_ops)',
+)
+
+def _columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transactions_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('merchant', sa.String(), nullable=True),
+        sa.Column('metadata', postgresql.JSON(), nullable=True),
+        sa.Column('import_hash', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        # Nomes explícitos: enquanto a tabela antiga existe, os nomes gerados ganhariam sufixo.
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], name='transactions_account_id_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], name='transactions_category_id_fkey', ondelete='SET NULL'),
+    ]
+
+def _drop_indexes(table: str) -> None:
+    op.drop_index('ix_transactions_search_trgm', table_name=table)
+    op.drop_index('ix_transactions_search_vector', table_name=table)
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    op.drop_constraint('uq_transactions_account_import_hash', table, type_='unique')
+
+def _create_indexes() -> None:
+    for statement in SEARCH:
+        op.execute(statement)
+    for name, columns in INDEXES:
+        op.create_index(name, 'transactions', columns)
+
+def _move_rows(source: str) -> None:
+    """Move as linhas de `source` para `transactions` em lotes por id, cada lote com commit próprio.
+
+    DELETE ... RETURNING e INSERT no mesmo comando: uma linha nunca fica nas duas tabelas nem em
+    nenhuma, então a cópia pode ser interrompida e retomada rodando a migração de novo.
+    """
+    conn = op.get_bind()
+    move = sa.text(f'WITH moved AS (DELETE FROM {source} WHERE id IN (SELECT id FROM {source} ORDER BY id LIMIT :batch) RETURNING {COLUMNS}) INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM moved')
+    while conn.execute(move, {'batch': BATCH_SIZE}).rowcount:
+        pass
+
+def _partition(start: date, end: date, name: str) -> None:
+    op.execute(f"CREATE TABLE {name} PARTITION OF transactions FOR VALUES FROM ('{start}') TO ('{end}')")
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = 'transactions'::regclass")).scalar() != 'p':
+        # A tabela atual vira a origem da cópia: sem os índices secundários (que só encareceriam as
+        # exclusões em lote) e com os nomes livres para a tabela nova. As associações de tags perdem a
+        # FK: a tabela particionada não tem chave única só em `id`.
+        op.drop_constraint('transaction_tags_transaction_id_fkey', 'transaction_tags', type_='foreignkey')
+        _drop_indexes('transactions')
+        op.rename_table('transactions', LEGACY)
+        op.execute(f'ALTER TABLE {LEGACY} RENAME CONSTRAINT transactions_pkey TO {LEGACY}_pkey')
+        op.create_table('transactions', *_columns(),
+            sa.PrimaryKeyConstraint('id', 'date'),
+            sa.UniqueConstraint('account_id', 'import_hash', 'date', name='uq_transactions_account_import_hash'),
+            postgresql_partition_by='RANGE (date)',
+        )
+        # Os ids continuam da mesma sequência, que passa a pertencer à tabela nova.
+        op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id')
+        op.execute('CREATE TABLE transactions_default PARTITION OF transactions DEFAULT')
+        # Só os períodos que têm transações, mais o atual e os AHEAD seguintes.
+        unit = 'month' if INTERVAL == 'month' else 'year'
+        periods = conn.execute(sa.text(f"""
+            SELECT DISTINCT p::date, (p + interval '1 {unit}')::date FROM (
+                SELECT date_trunc('{unit}', date) AS p FROM {LEGACY}
+                UNION SELECT date_trunc('{unit}', current_date) + make_interval({unit}s => n) FROM generate_series(0, :ahead) AS n
+            ) periods ORDER BY 1
+        """), {'ahead': AHEAD}).all()
+        for start, end in periods:
+            _partition(start, end, f'transactions_{start:%Y_%m}' if unit == 'month' else f'transactions_{start:%Y}')
+        _create_indexes()
+    with op.get_context().autocommit_block():
+        _move_rows(LEGACY)
+    op.drop_table(LEGACY)
+    op.execute('ANALYZE transactions')
+
+def downgrade() -> None:
+    op.rename_table('transactions', PARTITIONED)
+    op.execute(f'ALTER TABLE {PARTITIONED} RENAME CONSTRAINT transactions_pkey TO {PARTITIONED}_pkey')
+    _drop_indexes(PARTITIONED)
+    op.create_table('transactions', *_columns(), sa.PrimaryKeyConstraint('id'))
+    op.execute('ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id')
+    with op.get_context().autocommit_block():
+        _move_rows(PARTITIONED)
+    op.drop_table(PARTITIONED)
+    # Índices e restrições depois da cópia: mais rápido, e uma duplicata de import_hash falha aqui.
+    op.create_unique_constraint('uq_transactions_account_import_hash', 'transactions', ['account_id', 'import_hash'])
+    _create_indexes()
+    op.execute('DELETE FROM transaction_tags tt WHERE NOT EXISTS (SELECT 1 FROM transactions t WHERE t.id = tt.transaction_id)')
+    op.create_foreign_key('transaction_tags_transaction_id_fkey', 'transaction_tags', 'transactions', ['transaction_id'], ['id'], ondelete='CASCADE')
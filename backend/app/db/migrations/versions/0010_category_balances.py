@@ -0,0 +1,34 @@
+"""Monthly balances per account and category"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('category_balances',
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('net_change', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('account_id', 'category_id', 'month')
+    )
+    op.create_index('ix_category_balances_user_id', 'category_balances', ['user_id'])
+    # Backfill: a partir daqui é mantida pelos repositórios junto com account_balances (sem categoria = 0).
+    op.execute("""
+        INSERT INTO category_balances (account_id, category_id, month, user_id, net_change)
+        SELECT account_id, coalesce(category_id, 0), date_trunc('month', date)::date, user_id,
+               SUM(CASE type WHEN 'income' THEN amount WHEN 'expense' THEN -amount ELSE amount END)
+        FROM transactions
+        GROUP BY account_id, coalesce(category_id, 0), date_trunc('month', date)::date, user_id
+    """)
+
+def downgrade() -> None:
+    op.drop_index('ix_category_balances_user_id', table_name='category_balances')
+    op.drop_table('category_balances')
@@ -0,0 +1,31 @@
+"""Goal links and contribution baseline"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('goals', sa.Column('initial_amount', sa.Numeric(precision=12, scale=2), server_default=sa.text('0'), nullable=False))
+    op.add_column('goals', sa.Column('start_date', sa.Date(), server_default=sa.text('CURRENT_DATE'), nullable=False))
+    # Metas existentes contam a partir da criação.
+    op.execute('UPDATE goals SET start_date = created_at::date WHERE created_at IS NOT NULL')
+    op.create_table('goal_links',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('goal_id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['goal_id'], ['goals.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_goal_links_goal_id', 'goal_links', ['goal_id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_goal_links_goal_id', table_name='goal_links')
+    op.drop_table('goal_links')
+    op.drop_column('goals', 'start_date')
+    op.drop_column('goals', 'initial_amount')
@@ -0,0 +1,30 @@
+"""Derive account_balances from category_balances with a trigger"""
+from alembic import op
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+UPSERT = """INSERT INTO account_balances (account_id, month, user_id, net_change) VALUES (NEW.account_id, NEW.month, NEW.user_id, {delta})
+        ON CONFLICT (account_id, month) DO UPDATE SET net_change = account_balances.net_change + excluded.net_change, updated_at = CURRENT_TIMESTAMP"""
+
+def upgrade() -> None:
+    # As duas tabelas já estão em dia (as escritas mantinham ambas); daqui em diante o app só grava
+    # category_balances e o trigger repassa o delta para account_balances.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION category_balances_to_accounts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                {UPSERT.format(delta='NEW.net_change - OLD.net_change')};
+            ELSE
+                {UPSERT.format(delta='NEW.net_change')};
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """)
+    op.execute('CREATE TRIGGER category_balances_to_accounts AFTER INSERT OR UPDATE OF net_change ON category_balances FOR EACH ROW EXECUTE FUNCTION category_balances_to_accounts()')
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER category_balances_to_accounts ON category_balances')
+    op.execute('DROP FUNCTION category_balances_to_accounts()')
@@ -0,0 +1,107 @@
+"""Partições por faixa de `date` da tabela `transactions` (só Postgres).
+
+Uma partição por mês ou por ano (TRANSACTION_PARTITION_INTERVAL), chamadas `transactions_2025_06` ou
+`transactions_2025`, mais a `transactions_default` para datas sem partição própria. O job do scheduler
+mantém criadas as do período atual e dos próximos; a migração 0009 converte a tabela existente.
+Arquivar um período antigo é desanexá-lo (`detach_partitions_before`) e depois fazer dump e DROP da
+tabela avulsa, sem DELETE em massa. As funções recebem uma Connection síncrona: no código assíncrono
+rodam via `AsyncConnection.run_sync`.
+"""
+import re
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from ..models.transaction import DEFAULT_PARTITION, Transaction
+
+TABLE = 'transactions'
+INTERVALS = ('month', 'year')
+# pg_advisory_xact_lock: réplicas rodando o job ao mesmo tempo criariam a mesma partição.
+LOCK_KEY = 7_301_002
+_BOUNDS = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+class Partition(NamedTuple):
+    name: str
+    # None na partição DEFAULT.
+    start: Optional[date]
+    end: Optional[date]
+
+def period_start(day: date, interval: str) -> date:
+    if interval == 'month':
+        return day.replace(day=1)
+    if interval == 'year':
+        return day.replace(month=1, day=1)
+    raise ValueError(f'Intervalo de partição inválido: {interval!r} (use {" ou ".join(INTERVALS)})')
+
+def next_period(start: date, interval: str) -> date:
+    if interval == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+def partition_name(start: date, interval: str) -> str:
+    return f'{TABLE}_{start:%Y_%m}' if interval == 'month' else f'{TABLE}_{start:%Y}'
+
+def _bound(value: str) -> date:
+    value = value.strip("'")
+    return date.min if value == 'MINVALUE' else date.max if value == 'MAXVALUE' else date.fromisoformat(value)
+
+def list_partitions(conn: Connection) -> List[Partition]:
+    stmt = text('SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname')
+    partitions = []
+    for name, bound in conn.execute(stmt, {'table': TABLE}):
+        match = _BOUNDS.search(bound)
+        partitions.append(Partition(name, _bound(match[1]), _bound(match[2])) if match else Partition(name, None, None))
+    return partitions
+
+def _create_partition(conn: Connection, name: str, start: date, end: date, has_default: bool) -> None:
+    ddl = text(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ('{start}') TO ('{end}')")
+    bounds = {'start': start, 'end': end}
+    stranded = has_default and conn.execute(text(f'SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end LIMIT 1'), bounds).first()
+    if not stranded:
+        conn.execute(ddl)
+        return
+    # Linhas da faixa que caíram na DEFAULT impedem o CREATE. Com a DEFAULT desanexada (o lock na
+    # tabela segura as escritas até o commit) a partição é criada e as linhas mudam de tabela, com os ids.
+    columns = ', '.join(f'"{column.name}"' for column in Transaction.__table__.columns)
+    conn.execute(text(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}'))
+    conn.execute(ddl)
+    conn.execute(text(f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING {columns}) INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM moved'), bounds)
+    conn.execute(text(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT'))
+
+def ensure_partitions(conn: Connection, start: date, end: date, interval: str) -> List[str]:
+    """Cria as partições que faltam para cobrir os períodos de `start` a `end` e devolve os nomes.
+
+    Períodos que se sobrepõem a uma partição existente (de outra granularidade, por exemplo) ficam
+    como estão: as datas deles já têm onde cair.
+    """
+    conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': LOCK_KEY})
+    existing = list_partitions(conn)
+    ranges = [p for p in existing if p.start is not None]
+    has_default = len(ranges) < len(existing)
+    created = []
+    low = period_start(start, interval)
+    while low <= end:
+        high = next_period(low, interval)
+        if not any(p.start < high and low < p.end for p in ranges):
+            name = partition_name(low, interval)
+            _create_partition(conn, name, low, high, has_default)
+            created.append(name)
+        low = high
+    return created
+
+def detach_partitions_before(conn: Connection, cutoff: date) -> List[str]:
+    """Desanexa as partições inteiramente anteriores a `cutoff` e devolve os nomes.
+
+    As tabelas continuam no banco, fora das consultas: o arquivamento é um `pg_dump -t` seguido de
+    DROP TABLE. Os saldos (account_balances) não mudam, então os saldos atuais seguem contando as
+    transações arquivadas; as associações em transaction_tags ficam, para o caso de reanexar.
+    """
+    conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': LOCK_KEY})
+    detached = []
+    for partition in list_partitions(conn):
+        if partition.end is not None and partition.end <= cutoff:
+            conn.execute(text(f'ALTER TABLE {TABLE} DETACH PARTITION {partition.name}'))
+            detached.append(partition.name)
+    return detached
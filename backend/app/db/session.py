@@ -1,14 +1,205 @@
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from uuid import uuid4
 
-from ..core.config import get_settings
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings, get_settings
+from ..core.metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True, future=True)
+# Usuários com janela read-your-writes aberta guardados por processo; acima disso sai o mais antigo.
+MAX_PINNED_USERS = 100_000
+
+def engine_options(settings: Settings, url: Optional[str] = None) -> Dict[str, Any]:
+    """Argumentos do create_async_engine derivados de Settings (para `url`, o primário por padrão)."""
+    url = make_url(url or settings.database_url)
+    if url.get_backend_name() != 'postgresql':
+        return {'pool_pre_ping': settings.db_pool_pre_ping}
+    connect_args: Dict[str, Any] = {'statement_cache_size': settings.db_statement_cache_size, 'prepared_statement_cache_size': settings.db_statement_cache_size}
+    options: Dict[str, Any] = {'pool_pre_ping': settings.db_pool_pre_ping, 'connect_args': connect_args}
+    if settings.db_pgbouncer:
+        # Em modo transação o pgbouncer troca a conexão do servidor a cada transação: prepared
+        # statements nomeados não sobrevivem, então os caches são desligados e os nomes são únicos.
+        connect_args['statement_cache_size'] = 0
+        connect_args['prepared_statement_cache_size'] = 0
+        connect_args['prepared_statement_name_func'] = lambda: f'__asyncpg_{uuid4()}__'
+    options.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow, pool_timeout=settings.db_pool_timeout, pool_recycle=settings.db_pool_recycle)
+    return options
+
+engine = create_async_engine(settings.database_url, future=True, **engine_options(settings))
+replica_engines = [create_async_engine(url, future=True, **engine_options(settings, url)) for url in (u.strip() for u in settings.database_replica_urls.split(',')) if url]
+
+if settings.metrics_enabled:
+    for _engine in (engine, *replica_engines):
+        instrument_engine(_engine)
+
+class RoutedSession(Session):
+    """Sessão (síncrona, por trás da AsyncSession) das leituras: o destino só é escolhido na primeira
+    consulta. Uma requisição respondida pelo cache não conecta em lugar nenhum, e a janela
+    read-your-writes aberta até esse momento ainda vale. `bind` fica no primário só para quem consulta o
+    dialeto; a execução segue `get_bind`."""
+
+    def __init__(self, *args: Any, router: Optional['ReplicaRouter'] = None, user_id: Any = None, **kw: Any):
+        super().__init__(*args, **kw)
+        self.router = router
+        self.user_id = user_id
+        self.target: Optional[AsyncEngine] = None
+
+    def get_bind(self, mapper=None, **kw):
+        if self.target is None:
+            self.target = self.router.choose(self.user_id)
+        return self.target.sync_engine
 
 async_session = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+replica_session = async_sessionmaker(expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutedSession)
+
+class PoolWaitStats:
+    """Tempo gasto esperando uma conexão do pool do primário (inclui o pre-ping e a conexão nova, se houver)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'checkouts': self.count, 'wait_avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0, 'wait_max_ms': round(self.max * 1000, 3)}
+
+pool_wait = PoolWaitStats()
+
+# O pool não tem evento antes do checkout; o autobegin da sessão, logo antes de pedir a conexão,
+# marca o início da espera, e o after_begin (conexão pronta) o fim. Sessões que não consultam o
+# banco (cache, 304) nunca pedem conexão nem entram na conta.
+@event.listens_for(Session, 'after_transaction_create')
+def _checkout_started(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info['checkout_started'] = time.perf_counter()
+
+@event.listens_for(Session, 'after_begin')
+def _checkout_finished(session: Session, transaction, connection) -> None:
+    started = session.info.pop('checkout_started', None)
+    if started is not None and connection.engine is engine.sync_engine:
+        pool_wait.record(time.perf_counter() - started)
+
+def pool_status() -> Dict[str, Any]:
+    pool = engine.pool
+    status: Dict[str, Any] = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    status.update(pool_wait.as_dict())
+    return status
+
+class ReplicaRouter:
+    """Escolhe onde cada requisição lê: numa réplica saudável (em rodízio) ou no primário.
+
+    Read-your-writes: quem escreveu lê do primário por `pin_seconds`, tempo para a réplica alcançar
+    a escrita. A janela fica em memória, por processo. Uma réplica em que uma consulta falha por
+    conexão (recusada ou perdida) fica fora por `retry_seconds` e depois volta ao rodízio; sem réplica
+    disponível a leitura cai no primário.
+    """
+
+    def __init__(self, primary: async_sessionmaker, replica: async_sessionmaker, engines: Sequence[AsyncEngine], pin_seconds: float, retry_seconds: float, max_pinned: int = MAX_PINNED_USERS):
+        self.primary = primary
+        self.replica = replica
+        self.engines = list(engines)
+        self.pin_seconds = pin_seconds
+        self.retry_seconds = retry_seconds
+        self.max_pinned = max_pinned
+        self._pins: OrderedDict[str, float] = OrderedDict()
+        self._down_until: Dict[AsyncEngine, float] = {}
+        self._next = 0
+        self.reads = {'replica': 0, 'primary': 0, 'pinned': 0}
+        self.failures = 0
+
+    def pin(self, user_id: Any) -> None:
+        key = str(user_id)
+        self._pins.pop(key, None)
+        self._pins[key] = time.monotonic() + self.pin_seconds
+        while len(self._pins) > self.max_pinned:
+            self._pins.popitem(last=False)
+
+    def pinned(self, user_id: Any) -> bool:
+        # Todas as janelas têm a mesma duração: a ordem de inserção é a ordem de expiração.
+        now = time.monotonic()
+        while self._pins and next(iter(self._pins.values())) <= now:
+            self._pins.popitem(last=False)
+        return str(user_id) in self._pins
+
+    def healthy(self) -> List[AsyncEngine]:
+        """Réplicas utilizáveis, a partir da próxima do rodízio."""
+        now = time.monotonic()
+        start = self._next % len(self.engines) if self.engines else 0
+        self._next += 1
+        ordered = self.engines[start:] + self.engines[:start]
+        return [replica for replica in ordered if self._down_until.get(replica, 0) <= now]
+
+    def mark_down(self, replica: AsyncEngine, exc: Exception) -> None:
+        self.failures += 1
+        self._down_until[replica] = time.monotonic() + self.retry_seconds
+        logger.warning('Read replica %s unavailable for %.0fs: %s', replica.url.render_as_string(hide_password=True), self.retry_seconds, exc)
+
+    def choose(self, user_id: Any) -> AsyncEngine:
+        """Onde a leitura de `user_id` roda: o primário na janela read-your-writes, senão a próxima
+        réplica saudável. Sem E/S: a saúde é passiva, vem das falhas das consultas reais (`get_session`)."""
+        if self.pinned(user_id):
+            self.reads['pinned'] += 1
+            return self.primary.kw['bind']
+        healthy = self.healthy()
+        if healthy:
+            self.reads['replica'] += 1
+            return healthy[0]
+        self.reads['primary'] += 1
+        return self.primary.kw['bind']
+
+    @staticmethod
+    def unavailable(exc: Exception) -> bool:
+        """Falha de conexão (recusada, perdida, servidor em recuperação), não erro da consulta em si."""
+        return isinstance(exc, (OSError, OperationalError)) or (isinstance(exc, DBAPIError) and exc.connection_invalidated)
+
+    def open(self, user_id: Any, write: bool) -> AsyncSession:
+        """Sessão sem conexão: o primário para escritas; nas leituras o destino é escolhido na primeira consulta."""
+        if not write and self.engines:
+            return self.replica(bind=self.primary.kw['bind'], router=self, user_id=user_id)
+        return self.primary()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {'replicas': len(self.engines), 'healthy': sum(self._down_until.get(replica, 0) <= now for replica in self.engines), 'reads': dict(self.reads), 'failures': self.failures, 'pinned_users': len(self._pins)}
+
+replicas = ReplicaRouter(async_session, replica_session, replica_engines, settings.read_your_writes_seconds, settings.replica_retry_seconds)
 
-async def get_session() -> AsyncSession:
-    async with async_session() as session:
+async def get_session(user_id: Any = None, write: bool = True) -> AsyncIterator[AsyncSession]:
+    """Sessão de uma requisição. Escritas abrem a janela read-your-writes do usuário no início (o
+    encerramento da dependência pode rodar depois da resposta, quando o cliente já fez a próxima
+    leitura) e a renovam no fim, contando a partir do commit."""
+    if write and user_id is not None:
+        replicas.pin(user_id)
+    session = replicas.open(user_id, write)
+    try:
         yield session
+    except (DBAPIError, OSError) as exc:
+        # A requisição que encontrou a réplica fora falha; as seguintes vão para outra até `retry_seconds`.
+        target = getattr(session.sync_session, 'target', None)
+        if target in replicas.engines and replicas.unavailable(exc):
+            replicas.mark_down(target, exc)
+        raise
+    finally:
+        await session.close()
+        if write and user_id is not None:
+            replicas.pin(user_id)
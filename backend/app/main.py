@@ -1,12 +1,29 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
-from .api.routers import accounts, categories, transactions, budgets, users, health
+from .core.cache import close_response_cache
+from .core.metrics import MetricsMiddleware
+from .core.security import close_http_client
+from .api.routers import accounts, categories, transactions, budgets, reports, forecast, goals, users, health, metrics
 
 settings = get_settings()
 
-app = FastAPI(title='Finanças Pessoais API', version='0.1.0')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.scheduler_enabled:
+        # Importado só aqui: com o scheduler desligado o apscheduler não é necessário.
+        from .tasks.scheduler import start_scheduler
+        await start_scheduler()
+    yield
+    if settings.scheduler_enabled:
+        from .tasks.scheduler import stop_scheduler
+        await stop_scheduler()
+    await close_http_client()
+    await close_response_cache()
+
+app = FastAPI(title='Finanças Pessoais API', version='0.1.0', lifespan=lifespan)
 
 origins = [origin.strip() for origin in settings.allowed_origins.split(',')]
 
@@ -18,9 +35,18 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+if settings.metrics_enabled:
+    # Adicionado por último, fica por fora: a latência inclui o CORS e os demais middlewares.
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(health.router)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 app.include_router(users.router, prefix='/api/v1')
 app.include_router(accounts.router, prefix='/api/v1')
 app.include_router(categories.router, prefix='/api/v1')
 app.include_router(transactions.router, prefix='/api/v1')
 app.include_router(budgets.router, prefix='/api/v1')
+app.include_router(reports.router, prefix='/api/v1')
+app.include_router(forecast.router, prefix='/api/v1')
+app.include_router(goals.router, prefix='/api/v1')
@@ -0,0 +1,14 @@
+
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, func, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..db.base import Base
+
+class AccountBalance(Base):
+    """Variação líquida mensal de uma conta, mantida incrementalmente a cada escrita em `transactions`."""
+    __tablename__ = 'account_balances'
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True)
+    month = Column(Date, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    net_change = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, Numeric, Date, DateTime, func, ForeignKey
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, func, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.base import Base
@@ -7,9 +7,13 @@ from ..db.base import Base
 class Budget(Base):
     __tablename__ = 'budgets'
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
     month = Column(Date, nullable=False)
     category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
     limit_amount = Column(Numeric(12, 2), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_budgets_user_month', user_id, month),
+    )
@@ -0,0 +1,50 @@
+from sqlalchemy import DDL, Column, Integer, Numeric, Date, DateTime, event, func, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..db.base import Base
+
+# Transações sem categoria entram com category_id 0: a chave primária não aceita NULL.
+UNCATEGORIZED = 0
+
+class CategoryBalance(Base):
+    """Variação líquida mensal por conta e categoria; `account_balances` é derivada daqui por trigger.
+
+    Sem FK para `categories`: ao apagar uma categoria as transações ficam sem categoria (SET NULL) e
+    as linhas daqui continuam com o id antigo; quem lê trata ids inexistentes como sem categoria.
+    """
+    __tablename__ = 'category_balances'
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    net_change = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Cada variação gravada em category_balances soma o mesmo delta na linha (conta, mês) de
+# account_balances, dentro do mesmo statement: as escritas fazem um upsert só. A migração 0012 cria os
+# mesmos objetos em bancos existentes.
+ACCOUNT_UPSERT = """INSERT INTO account_balances (account_id, month, user_id, net_change) VALUES (NEW.account_id, NEW.month, NEW.user_id, {delta})
+        ON CONFLICT (account_id, month) DO UPDATE SET net_change = account_balances.net_change + excluded.net_change, updated_at = CURRENT_TIMESTAMP"""
+
+ACCOUNT_TRIGGER_DDL = {
+    'postgresql': (
+        f"""CREATE OR REPLACE FUNCTION category_balances_to_accounts() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            {ACCOUNT_UPSERT.format(delta='NEW.net_change - OLD.net_change')};
+        ELSE
+            {ACCOUNT_UPSERT.format(delta='NEW.net_change')};
+        END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+        'CREATE TRIGGER category_balances_to_accounts AFTER INSERT OR UPDATE OF net_change ON category_balances FOR EACH ROW EXECUTE FUNCTION category_balances_to_accounts()',
+    ),
+    'sqlite': (
+        f"CREATE TRIGGER category_balances_insert AFTER INSERT ON category_balances BEGIN {ACCOUNT_UPSERT.format(delta='NEW.net_change')}; END",
+        f"CREATE TRIGGER category_balances_update AFTER UPDATE OF net_change ON category_balances BEGIN {ACCOUNT_UPSERT.format(delta='NEW.net_change - OLD.net_change')}; END",
+    ),
+}
+
+for _dialect, _statements in ACCOUNT_TRIGGER_DDL.items():
+    for _statement in _statements:
+        event.listen(CategoryBalance.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, func
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, func, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.base import Base
@@ -11,5 +11,25 @@ class Goal(Base):
     name = Column(String, nullable=False)
     target_amount = Column(Numeric(12, 2), nullable=False)
     target_date = Column(Date, nullable=False)
+    # Valor já guardado antes do acompanhamento; o progresso soma as contribuições a partir do mês de start_date.
+    initial_amount = Column(Numeric(12, 2), nullable=False, server_default='0')
+    start_date = Column(Date, nullable=False, server_default=func.current_date())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class GoalLink(Base):
+    """Conta e/ou categoria cujas movimentações contribuem para a meta.
+
+    Só conta: toda a variação líquida da conta. Só categoria (com subcategorias): o que entrou na
+    categoria em qualquer conta, com o sinal do tipo (despesa guardada conta como contribuição).
+    As duas: a categoria só naquela conta.
+    """
+    __tablename__ = 'goal_links'
+    id = Column(Integer, primary_key=True)
+    goal_id = Column(Integer, ForeignKey('goals.id', ondelete='CASCADE'), nullable=False)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), nullable=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), nullable=True)
+
+    __table_args__ = (
+        Index('ix_goal_links_goal_id', goal_id),
+    )
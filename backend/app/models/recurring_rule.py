@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Date, DateTime, func
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, func, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.base import Base
@@ -11,5 +11,19 @@ class RecurringRule(Base):
     pattern = Column(String, nullable=False)
     interval = Column(Integer, nullable=False, default=1)
     next_run = Column(Date, nullable=False)
+    # Modelo da transação gerada a cada ocorrência; regras sem conta/valor não são materializadas.
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), nullable=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'), nullable=True)
+    type = Column(String, nullable=True)
+    amount = Column(Numeric(12, 2), nullable=True)
+    description = Column(String, nullable=True)
+    merchant = Column(String, nullable=True)
+    # Dia de referência das regras mensais/anuais (ex.: 31 cai em 28/29/30 e volta a 31).
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_recurring_rules_next_run', next_run, id),
+    )
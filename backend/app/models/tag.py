@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 
 from ..db.base import Base
@@ -11,3 +11,21 @@ class Tag(Base):
     name = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'name', name='uq_tags_user_name'),
+    )
+
+class TransactionTag(Base):
+    """Associação transação ↔ tag; a PK atende o caminho transação → tags e o índice o caminho tag → transações.
+
+    Sem FK para `transactions`: particionada por data, ela não tem chave única só em `id`. Os
+    repositórios removem as associações junto com as transações.
+    """
+    __tablename__ = 'transaction_tags'
+    transaction_id = Column(Integer, primary_key=True)
+    tag_id = Column(Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_transaction_tags_tag_transaction', tag_id, transaction_id),
+    )
@@ -1,13 +1,14 @@
 
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, func, ForeignKey, JSON
+from sqlalchemy import DDL, Column, Integer, String, Numeric, Date, DateTime, event, func, ForeignKey, Index, JSON, PrimaryKeyConstraint, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 
 from ..db.base import Base
 
 class Transaction(Base):
     __tablename__ = 'transactions'
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
     account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), nullable=False)
     type = Column(String, nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
@@ -16,5 +17,46 @@ class Transaction(Base):
     category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'), nullable=True)
     merchant = Column(String, nullable=True)
     tx_metadata = Column('metadata', JSON, nullable=True)
+    import_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Não é coluna: nomes vindos de `transaction_tags`, preenchidos pelo repositório após escritas.
+    tags = None
+
+    __table_args__ = (
+        Index('ix_transactions_user_date_id', user_id, date.desc(), id.desc()),
+        Index('ix_transactions_user_account_date', user_id, account_id, date),
+        Index('ix_transactions_user_category_date', user_id, category_id, date),
+        Index('ix_transactions_user_updated_at', user_id, updated_at),
+        # `date` entra na chave única porque no Postgres toda chave única precisa conter a chave de
+        # partição; o hash de importação já inclui a data, então a deduplicação é a mesma.
+        UniqueConstraint('account_id', 'import_hash', 'date', name='uq_transactions_account_import_hash'),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
+# Particionamento por faixa de `date` (só Postgres; ver app/db/partitions.py e a migração 0009). A PK
+# física vira (id, date), exigência da tabela particionada; no ORM e no SQLite continua sendo `id`,
+# que a sequência mantém único. A partição DEFAULT recebe datas sem partição própria.
+DEFAULT_PARTITION = 'transactions_default'
+
+@compiles(PrimaryKeyConstraint, 'postgresql')
+def _partitioned_primary_key(constraint, compiler, **kw):
+    if constraint.table is not Transaction.__table__:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    return 'PRIMARY KEY (id, date)'
+
+event.listen(Transaction.__table__, 'after_create', DDL(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF transactions DEFAULT').execute_if(dialect='postgresql'))
+
+# Busca textual (só Postgres): `search_vector` é uma coluna gerada que o ORM não mapeia, para não
+# trafegar o tsvector em RETURNING. A migração 0006 cria os mesmos objetos em bancos existentes.
+SEARCH_CONFIG = 'portuguese'
+SEARCH_DOCUMENT = "coalesce(description, '') || ' ' || coalesce(merchant, '')"
+SEARCH_DDL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f"ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', {SEARCH_DOCUMENT})) STORED",
+    'CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)',
+    f'CREATE INDEX ix_transactions_search_trgm ON transactions USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)',
+)
+
+for _statement in SEARCH_DDL:
+    event.listen(Transaction.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
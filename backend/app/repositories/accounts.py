@@ -1,20 +1,37 @@
 
-from typing import List
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import Row, delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.account import Account
+from ..models.account_balance import AccountBalance
+from ..models.tag import TransactionTag
+from ..models.transaction import Transaction
 from ..schemas.account import AccountCreate, AccountUpdate
+from .balances import AccountBalanceRepository
+from .rows import as_dicts, fingerprint_columns
+
+READ_COLUMNS = (Account.id, Account.user_id, Account.name, Account.type, Account.currency, Account.initial_balance, Account.created_at, Account.updated_at)
 
 class AccountRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.balances = AccountBalanceRepository(session)
 
-    async def list_accounts(self, user_id: UUID) -> List[Account]:
-        stmt = select(Account).where(Account.user_id == user_id)
+    async def list_accounts(self, user_id: UUID) -> List[Dict[str, Any]]:
+        stmt = select(*READ_COLUMNS).where(Account.user_id == user_id)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return as_dicts(result)
+
+    async def fingerprint(self, user_id: UUID) -> Row:
+        # O saldo atual vem de account_balances, então o último ajuste de saldo entra na impressão digital.
+        balances = select(func.max(AccountBalance.updated_at)).where(AccountBalance.user_id == user_id).scalar_subquery()
+        return (await self.session.execute(select(*fingerprint_columns(Account, Account.user_id == user_id), balances))).one()
+
+    async def net_changes(self, user_id: UUID, account_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        return await self.balances.totals(user_id, account_ids)
 
     async def get(self, user_id: UUID, account_id: int) -> Account | None:
         stmt = select(Account).where(Account.id == account_id, Account.user_id == user_id)
@@ -22,26 +39,25 @@ class AccountRepository:
         return result.scalar_one_or_none()
 
     async def create(self, user_id: UUID, obj_in: AccountCreate) -> Account:
-        account = Account(user_id=user_id, name=obj_in.name, type=obj_in.type, currency=obj_in.currency, initial_balance=obj_in.initial_balance)
-        self.session.add(account)
+        stmt = insert(Account).values(user_id=user_id, name=obj_in.name, type=obj_in.type, currency=obj_in.currency, initial_balance=obj_in.initial_balance).returning(Account)
+        account = (await self.session.execute(stmt)).scalar_one()
         await self.session.commit()
-        await self.session.refresh(account)
         return account
 
     async def update(self, user_id: UUID, account_id: int, obj_in: AccountUpdate) -> Account | None:
-        account = await self.get(user_id, account_id)
-        if not account:
-            return None
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            setattr(account, field, value)
+        values = obj_in.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get(user_id, account_id)
+        stmt = update(Account).where(Account.id == account_id, Account.user_id == user_id).values(**values).returning(Account)
+        account = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        await self.session.refresh(account)
         return account
 
     async def delete(self, user_id: UUID, account_id: int) -> bool:
-        account = await self.get(user_id, account_id)
-        if not account:
-            return False
-        await self.session.delete(account)
+        # As transações saem pelo ON DELETE CASCADE; as associações de tags delas, não.
+        transaction_ids = select(Transaction.id).where(Transaction.account_id == account_id, Transaction.user_id == user_id)
+        await self.session.execute(delete(TransactionTag).where(TransactionTag.transaction_id.in_(transaction_ids)))
+        stmt = delete(Account).where(Account.id == account_id, Account.user_id == user_id).returning(Account.id)
+        deleted = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        return True
+        return deleted is not None
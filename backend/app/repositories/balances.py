@@ -0,0 +1,62 @@
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account_balance import AccountBalance
+from ..models.category_balance import UNCATEGORIZED, CategoryBalance
+
+def signed_amount(type_: str, amount: Decimal) -> Decimal:
+    """Efeito de uma transação no saldo: receitas somam, despesas subtraem, demais tipos usam o sinal informado."""
+    if type_ == 'income':
+        return amount
+    if type_ == 'expense':
+        return -amount
+    return amount
+
+class AccountBalanceRepository:
+    """Mantém `category_balances` (e, por trigger, `account_balances`) sem fazer commit; quem chama
+    controla a transação.
+
+    As variações chegam por (conta, categoria, 1º dia do mês); a categoria None vira UNCATEGORIZED.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def apply(self, user_id: UUID, account_id: int, category_id: Optional[int], day: date, delta: Decimal) -> None:
+        await self.apply_many(user_id, {(account_id, category_id, day.replace(day=1)): delta})
+
+    async def apply_many(self, user_id: UUID, deltas: Dict[Tuple[int, Optional[int], date], Decimal]) -> None:
+        """Aplica variações por (conta, categoria, 1º dia do mês), com um único upsert executemany."""
+        await self.apply_for_users({(user_id, *key): delta for key, delta in deltas.items()})
+
+    async def apply_for_users(self, deltas: Dict[Tuple[UUID, int, Optional[int], date], Decimal]) -> None:
+        """Como `apply_many`, mas com chaves (usuário, conta, categoria, mês): para lotes que misturam usuários."""
+        merged: Dict[Tuple[int, date, int], Tuple[UUID, Decimal]] = {}
+        for (user_id, account_id, category_id, month), delta in deltas.items():
+            key = (account_id, month, category_id or UNCATEGORIZED)
+            merged[key] = (user_id, merged.get(key, (user_id, Decimal(0)))[1] + delta)
+        # Ordem fixa de chaves, (conta, mês) primeiro: transações concorrentes travam as linhas das duas
+        # tabelas (a de account_balances vem do trigger) na mesma ordem, sem deadlock.
+        await self._upsert(CategoryBalance, [CategoryBalance.account_id, CategoryBalance.category_id, CategoryBalance.month], [{'user_id': user_id, 'account_id': account_id, 'category_id': category_id, 'month': month, 'net_change': delta} for (account_id, month, category_id), (user_id, delta) in sorted(merged.items()) if delta])
+
+    async def _upsert(self, model, keys: list, rows: List[dict]) -> None:
+        if not rows:
+            return
+        dialect = postgresql if self.session.bind.dialect.name == 'postgresql' else sqlite
+        stmt = dialect.insert(model)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_={'net_change': model.net_change + stmt.excluded.net_change, 'updated_at': func.now()})
+        await self.session.execute(stmt, rows)
+
+    async def totals(self, user_id: UUID, account_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        """Soma das variações mensais por conta: O(meses), não O(transações)."""
+        stmt = select(AccountBalance.account_id, func.sum(AccountBalance.net_change)).where(AccountBalance.user_id == user_id).group_by(AccountBalance.account_id)
+        if account_ids is not None:
+            stmt = stmt.where(AccountBalance.account_id.in_(list(account_ids)))
+        result = await self.session.execute(stmt)
+        return {account_id: total for account_id, total in result.all()}
@@ -1,23 +1,60 @@
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from datetime import date
-from sqlalchemy import select
+from sqlalchemy import Row, delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.budget import Budget
+from ..models.category import Category
+from ..models.transaction import Transaction
 from ..schemas.budget import BudgetCreate, BudgetUpdate
+from .rows import as_dicts, fingerprint_columns
+
+READ_COLUMNS = (Budget.id, Budget.user_id, Budget.month, Budget.category_id, Budget.limit_amount, Budget.created_at, Budget.updated_at)
 
 class BudgetRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def list(self, user_id: UUID, month: Optional[date] = None) -> List[Budget]:
-        stmt = select(Budget).where(Budget.user_id == user_id)
+    async def list(self, user_id: UUID, month: Optional[date] = None) -> List[Dict[str, Any]]:
+        stmt = select(*READ_COLUMNS).where(Budget.user_id == user_id)
         if month:
             stmt = stmt.where(Budget.month == month)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return as_dicts(result)
+
+    async def fingerprint(self, user_id: UUID, month: Optional[date] = None) -> Row:
+        where = [Budget.user_id == user_id]
+        if month:
+            where.append(Budget.month == month)
+        return (await self.session.execute(select(*fingerprint_columns(Budget, *where)))).one()
+
+    async def status(self, user_id: UUID, month: date, next_month: date) -> List[Row]:
+        """Orçamentos do mês com o gasto da categoria e de todas as subcategorias, numa única consulta.
+
+        A CTE recursiva parte das categorias orçadas e desce por `parent_id`; o UNION (sem ALL)
+        elimina pares repetidos, o que também encerra a recursão se houver ciclo na hierarquia.
+        """
+        tree = select(Budget.category_id.label('root_id'), Budget.category_id.label('category_id')).where(Budget.user_id == user_id, Budget.month == month).cte('category_tree', recursive=True)
+        tree = tree.union(select(tree.c.root_id, Category.id).join(tree, Category.parent_id == tree.c.category_id).where(Category.user_id == user_id))
+        spent = (
+            select(Transaction.category_id, func.sum(Transaction.amount).label('total'))
+            .where(Transaction.user_id == user_id, Transaction.type == 'expense', Transaction.date >= month, Transaction.date < next_month, Transaction.category_id.in_(select(tree.c.category_id)))
+            .group_by(Transaction.category_id)
+            .cte('spent')
+        )
+        stmt = (
+            select(Budget.id, Budget.month, Budget.category_id, Category.name.label('category_name'), Budget.limit_amount, func.sum(spent.c.total).label('spent'))
+            .join(Category, Category.id == Budget.category_id)
+            .outerjoin(tree, tree.c.root_id == Budget.category_id)
+            .outerjoin(spent, spent.c.category_id == tree.c.category_id)
+            .where(Budget.user_id == user_id, Budget.month == month)
+            .group_by(Budget.id, Budget.month, Budget.category_id, Category.name, Budget.limit_amount)
+            .order_by(Category.name, Budget.id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
 
     async def get(self, user_id: UUID, budget_id: int) -> Budget | None:
         stmt = select(Budget).where(Budget.id == budget_id, Budget.user_id == user_id)
@@ -25,26 +62,22 @@ class BudgetRepository:
         return result.scalar_one_or_none()
 
     async def create(self, user_id: UUID, obj_in: BudgetCreate) -> Budget:
-        budget = Budget(user_id=user_id, month=obj_in.month, category_id=obj_in.category_id, limit_amount=obj_in.limit_amount)
-        self.session.add(budget)
+        stmt = insert(Budget).values(user_id=user_id, month=obj_in.month, category_id=obj_in.category_id, limit_amount=obj_in.limit_amount).returning(Budget)
+        budget = (await self.session.execute(stmt)).scalar_one()
         await self.session.commit()
-        await self.session.refresh(budget)
         return budget
 
     async def update(self, user_id: UUID, budget_id: int, obj_in: BudgetUpdate) -> Budget | None:
-        budget = await self.get(user_id, budget_id)
-        if not budget:
-            return None
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            setattr(budget, field, value)
+        values = obj_in.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get(user_id, budget_id)
+        stmt = update(Budget).where(Budget.id == budget_id, Budget.user_id == user_id).values(**values).returning(Budget)
+        budget = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        await self.session.refresh(budget)
         return budget
 
     async def delete(self, user_id: UUID, budget_id: int) -> bool:
-        budget = await self.get(user_id, budget_id)
-        if not budget:
-            return False
-        await self.session.delete(budget)
+        stmt = delete(Budget).where(Budget.id == budget_id, Budget.user_id == user_id).returning(Budget.id)
+        deleted = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        return True
+        return deleted is not None
@@ -1,20 +1,103 @@
 
-from typing import List
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import Row, delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.config import get_settings
 from ..models.category import Category
 from ..schemas.category import CategoryCreate, CategoryUpdate
+from .rows import as_dicts, fingerprint_columns
+
+READ_COLUMNS = (Category.id, Category.user_id, Category.name, Category.type, Category.parent_id, Category.created_at, Category.updated_at)
+
+class CategoryTree:
+    """Fecho transitivo da hierarquia de categorias de um usuário (ancestrais e descendentes)."""
+
+    def __init__(self, edges: Iterable[Tuple[int, Optional[int]]]):
+        parents = dict(edges)
+        self.ancestors: Dict[int, Tuple[int, ...]] = {}
+        descendants: Dict[int, set] = defaultdict(set)
+        for category_id in parents:
+            chain = []
+            seen = {category_id}
+            parent = parents.get(category_id)
+            # `seen` interrompe ciclos que o banco não impede.
+            while parent is not None and parent in parents and parent not in seen:
+                chain.append(parent)
+                seen.add(parent)
+                parent = parents[parent]
+            self.ancestors[category_id] = tuple(chain)
+            descendants[category_id].add(category_id)
+            for ancestor in chain:
+                descendants[ancestor].add(category_id)
+        self.descendants: Dict[int, FrozenSet[int]] = {k: frozenset(v) for k, v in descendants.items()}
+
+    def subtree(self, category_id: int) -> FrozenSet[int]:
+        """A categoria e todas as descendentes; categoria desconhecida resulta só nela mesma."""
+        return self.descendants.get(category_id, frozenset((category_id,)))
+
+class CategoryTreeCache:
+    """LRU de CategoryTree por usuário, invalidado nas escritas de categoria desta réplica.
+
+    O TTL limita por quanto tempo outra réplica pode servir uma árvore desatualizada.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[UUID, Tuple[float, CategoryTree]] = OrderedDict()
+
+    def get(self, user_id: UUID) -> Optional[CategoryTree]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    def put(self, user_id: UUID, tree: CategoryTree) -> None:
+        if not self.maxsize:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, tree)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+_tree_cache: Optional[CategoryTreeCache] = None
+
+def get_category_tree_cache() -> CategoryTreeCache:
+    global _tree_cache
+    if _tree_cache is None:
+        settings = get_settings()
+        _tree_cache = CategoryTreeCache(settings.category_tree_cache_size, settings.category_tree_cache_ttl)
+    return _tree_cache
 
 class CategoryRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def list(self, user_id: UUID) -> List[Category]:
-        stmt = select(Category).where(Category.user_id == user_id)
+    async def list(self, user_id: UUID) -> List[Dict[str, Any]]:
+        stmt = select(*READ_COLUMNS).where(Category.user_id == user_id)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return as_dicts(result)
+
+    async def fingerprint(self, user_id: UUID) -> Row:
+        return (await self.session.execute(select(*fingerprint_columns(Category, Category.user_id == user_id)))).one()
+
+    async def tree(self, user_id: UUID) -> CategoryTree:
+        cache = get_category_tree_cache()
+        tree = cache.get(user_id)
+        if tree is None:
+            result = await self.session.execute(select(Category.id, Category.parent_id).where(Category.user_id == user_id))
+            tree = CategoryTree(result.all())
+            cache.put(user_id, tree)
+        return tree
 
     async def get(self, user_id: UUID, category_id: int) -> Category | None:
         stmt = select(Category).where(Category.id == category_id, Category.user_id == user_id)
@@ -22,26 +105,25 @@ class CategoryRepository:
         return result.scalar_one_or_none()
 
     async def create(self, user_id: UUID, obj_in: CategoryCreate) -> Category:
-        category = Category(user_id=user_id, name=obj_in.name, type=obj_in.type, parent_id=obj_in.parent_id)
-        self.session.add(category)
+        stmt = insert(Category).values(user_id=user_id, name=obj_in.name, type=obj_in.type, parent_id=obj_in.parent_id).returning(Category)
+        category = (await self.session.execute(stmt)).scalar_one()
         await self.session.commit()
-        await self.session.refresh(category)
+        get_category_tree_cache().invalidate(user_id)
         return category
 
     async def update(self, user_id: UUID, category_id: int, obj_in: CategoryUpdate) -> Category | None:
-        category = await self.get(user_id, category_id)
-        if not category:
-            return None
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            setattr(category, field, value)
+        values = obj_in.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get(user_id, category_id)
+        stmt = update(Category).where(Category.id == category_id, Category.user_id == user_id).values(**values).returning(Category)
+        category = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        await self.session.refresh(category)
+        get_category_tree_cache().invalidate(user_id)
         return category
 
     async def delete(self, user_id: UUID, category_id: int) -> bool:
-        category = await self.get(user_id, category_id)
-        if not category:
-            return False
-        await self.session.delete(category)
+        stmt = delete(Category).where(Category.id == category_id, Category.user_id == user_id).returning(Category.id)
+        deleted = (await self.session.execute(stmt)).scalar_one_or_none()
         await self.session.commit()
-        return True
+        get_category_tree_cache().invalidate(user_id)
+        return deleted is not None
@@ -0,0 +1,54 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account
+from ..models.budget import Budget
+from ..models.category_balance import CategoryBalance
+from ..models.recurring_rule import RecurringRule
+from .balances import AccountBalanceRepository
+from .categories import CategoryRepository
+from .recurring import PATTERNS
+
+class ForecastRepository:
+    """Entradas da projeção de saldo, todas de tabelas pequenas: nenhuma consulta lê `transactions`."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.balances = AccountBalanceRepository(session)
+        self.categories = CategoryRepository(session)
+
+    async def accounts(self, user_id: UUID, account_id: Optional[int] = None) -> List[Row]:
+        stmt = select(Account.id, Account.name, Account.initial_balance).where(Account.user_id == user_id).order_by(Account.id)
+        if account_id:
+            stmt = stmt.where(Account.id == account_id)
+        return (await self.session.execute(stmt)).all()
+
+    async def monthly_history(self, user_id: UUID, start: date, end: date) -> List[Row]:
+        """Variação líquida por (conta, categoria, mês) nos meses de `start` (inclusive) a `end` (exclusive)."""
+        stmt = select(CategoryBalance.account_id, CategoryBalance.category_id, CategoryBalance.month, CategoryBalance.net_change).where(CategoryBalance.user_id == user_id, CategoryBalance.month >= start, CategoryBalance.month < end)
+        return (await self.session.execute(stmt)).all()
+
+    async def rules(self, user_id: UUID) -> List[RecurringRule]:
+        """Regras materializáveis (com conta, tipo e valor) que ainda têm ocorrências a gerar."""
+        stmt = (
+            select(RecurringRule)
+            .where(
+                RecurringRule.user_id == user_id,
+                RecurringRule.pattern.in_(PATTERNS),
+                RecurringRule.interval >= 1,
+                RecurringRule.account_id.is_not(None),
+                RecurringRule.type.is_not(None),
+                RecurringRule.amount.is_not(None),
+                (RecurringRule.end_date.is_(None)) | (RecurringRule.next_run <= RecurringRule.end_date),
+            )
+            .order_by(RecurringRule.id)
+        )
+        return (await self.session.execute(stmt)).scalars().all()
+
+    async def budgets(self, user_id: UUID, until: date) -> List[Row]:
+        """Orçamentos até o mês `until`, em ordem de mês: o último de cada categoria vale para os meses seguintes."""
+        stmt = select(Budget.category_id, Budget.month, Budget.limit_amount).where(Budget.user_id == user_id, Budget.month <= until).order_by(Budget.month, Budget.id)
+        return (await self.session.execute(stmt)).all()
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import Row, and_, case, delete, exists, extract, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.category import Category
+from ..models.category_balance import CategoryBalance
+from ..models.goal import Goal, GoalLink
+from ..schemas.goal import GoalCreate, GoalLinkBase, GoalUpdate
+from .transactions import TransactionRepository
+
+GOAL_COLUMNS = (Goal.id, Goal.user_id, Goal.name, Goal.target_amount, Goal.target_date, Goal.initial_amount, Goal.start_date, Goal.created_at, Goal.updated_at)
+
+def _month_number(column):
+    # EXTRACT é portável entre Postgres e SQLite, ao contrário de date_trunc/strftime.
+    return extract('year', column) * 12 + extract('month', column)
+
+class GoalRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # owned_references: valida as contas e categorias dos vínculos.
+        self.transactions = TransactionRepository(session)
+
+    async def progress(self, user_id: UUID, recent_since: date, recent_until: date, goal_id: Optional[int] = None) -> List[Row]:
+        """Metas do usuário com as contribuições, numa única consulta para todas.
+
+        As contribuições vêm de `category_balances` (mantida a cada escrita em transações), a partir do
+        mês de `start_date`: `contributed` é o total e `recent` a parte nos meses de `recent_since` a
+        `recent_until` (exclusive). A CTE recursiva estende os vínculos de categoria às subcategorias;
+        cada linha mensal conta uma vez por meta, mesmo que vários vínculos a cubram.
+        """
+        scope = select(GoalLink.goal_id, GoalLink.account_id, GoalLink.category_id).join(Goal, Goal.id == GoalLink.goal_id).where(Goal.user_id == user_id)
+        if goal_id is not None:
+            scope = scope.where(Goal.id == goal_id)
+        scope = scope.cte('goal_scope', recursive=True)
+        scope = scope.union(select(scope.c.goal_id, scope.c.account_id, Category.id).join(scope, Category.parent_id == scope.c.category_id).where(Category.user_id == user_id))
+        whole_account = exists().where(scope.c.goal_id == Goal.id, scope.c.category_id.is_(None), scope.c.account_id == CategoryBalance.account_id)
+        in_category = exists().where(scope.c.goal_id == Goal.id, scope.c.category_id == CategoryBalance.category_id, or_(scope.c.account_id.is_(None), scope.c.account_id == CategoryBalance.account_id))
+        # Conta vinculada inteira: a variação líquida. Por categoria: o que entrou nela (despesa com sinal trocado).
+        contribution = case((whole_account, CategoryBalance.net_change), (Category.type == 'expense', -CategoryBalance.net_change), else_=CategoryBalance.net_change)
+        recent = case((and_(CategoryBalance.month >= recent_since, CategoryBalance.month < recent_until), contribution))
+        stmt = (
+            select(*GOAL_COLUMNS, func.coalesce(func.sum(contribution), 0).label('contributed'), func.coalesce(func.sum(recent), 0).label('recent'))
+            .outerjoin(CategoryBalance, and_(CategoryBalance.user_id == Goal.user_id, _month_number(CategoryBalance.month) >= _month_number(Goal.start_date), or_(whole_account, in_category)))
+            .outerjoin(Category, Category.id == CategoryBalance.category_id)
+            .where(Goal.user_id == user_id)
+            .group_by(*GOAL_COLUMNS)
+            .order_by(Goal.target_date, Goal.id)
+        )
+        if goal_id is not None:
+            stmt = stmt.where(Goal.id == goal_id)
+        return (await self.session.execute(stmt)).all()
+
+    async def links_for(self, goal_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+        links: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        if not goal_ids:
+            return links
+        stmt = select(GoalLink.goal_id, GoalLink.account_id, GoalLink.category_id).where(GoalLink.goal_id.in_(goal_ids)).order_by(GoalLink.id)
+        for goal_id, account_id, category_id in (await self.session.execute(stmt)).all():
+            links[goal_id].append({'account_id': account_id, 'category_id': category_id})
+        return links
+
+    async def create(self, user_id: UUID, obj_in: GoalCreate, start_date: date) -> int:
+        stmt = insert(Goal).values(user_id=user_id, name=obj_in.name, target_amount=obj_in.target_amount, target_date=obj_in.target_date, initial_amount=obj_in.initial_amount, start_date=obj_in.start_date or start_date).returning(Goal.id)
+        goal_id = (await self.session.execute(stmt)).scalar_one()
+        await self._insert_links(goal_id, obj_in.links)
+        await self.session.commit()
+        return goal_id
+
+    async def update(self, user_id: UUID, goal_id: int, obj_in: GoalUpdate) -> bool:
+        """Atualiza os campos enviados; `links`, se enviado, substitui todos os vínculos."""
+        values = obj_in.model_dump(exclude_unset=True, exclude={'links'})
+        if values.get('start_date', True) is None:
+            values.pop('start_date')
+        # O UPDATE roda mesmo só com vínculos novos: confirma o dono e avança o updated_at.
+        stmt = update(Goal).where(Goal.id == goal_id, Goal.user_id == user_id).values(**values, updated_at=func.now()).returning(Goal.id)
+        if (await self.session.execute(stmt)).scalar_one_or_none() is None:
+            return False
+        if 'links' in obj_in.model_fields_set:
+            await self.session.execute(delete(GoalLink).where(GoalLink.goal_id == goal_id))
+            await self._insert_links(goal_id, obj_in.links)
+        await self.session.commit()
+        return True
+
+    async def delete(self, user_id: UUID, goal_id: int) -> bool:
+        stmt = delete(Goal).where(Goal.id == goal_id, Goal.user_id == user_id).returning(Goal.id)
+        deleted = (await self.session.execute(stmt)).scalar_one_or_none()
+        if deleted is not None:
+            # SQLite não aplica o ON DELETE CASCADE sem PRAGMA foreign_keys.
+            await self.session.execute(delete(GoalLink).where(GoalLink.goal_id == goal_id))
+        await self.session.commit()
+        return deleted is not None
+
+    async def _insert_links(self, goal_id: int, links: Sequence[GoalLinkBase]) -> None:
+        if links:
+            await self.session.execute(insert(GoalLink), [{'goal_id': goal_id, 'account_id': link.account_id, 'category_id': link.category_id} for link in links])
@@ -0,0 +1,66 @@
+
+import hashlib
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Row, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.recurring_rule import RecurringRule
+from ..models.transaction import Transaction
+from .balances import AccountBalanceRepository, signed_amount
+
+PATTERNS = ('daily', 'weekly', 'monthly', 'yearly')
+
+def occurrence_hash(rule_id: int, day: date) -> str:
+    """Chave única por (regra, data), gravada em `import_hash`: a mesma ocorrência nunca é inserida duas vezes."""
+    return hashlib.sha256(f'recurring|{rule_id}|{day.isoformat()}'.encode()).hexdigest()
+
+class RecurringRuleRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.balances = AccountBalanceRepository(session)
+
+    async def lock_due(self, today: date, limit: int) -> List[Row]:
+        """Trava um lote de regras vencidas; SKIP LOCKED deixa as já travadas para outras réplicas."""
+        stmt = (
+            select(RecurringRule)
+            .where(
+                RecurringRule.next_run <= today,
+                RecurringRule.pattern.in_(PATTERNS),
+                RecurringRule.interval >= 1,
+                RecurringRule.account_id.is_not(None),
+                RecurringRule.type.is_not(None),
+                RecurringRule.amount.is_not(None),
+                (RecurringRule.end_date.is_(None)) | (RecurringRule.next_run <= RecurringRule.end_date),
+            )
+            .order_by(RecurringRule.next_run, RecurringRule.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def materialize(self, rows: Sequence[dict], next_runs: Dict[int, date]) -> List[Row]:
+        """Insere as ocorrências, atualiza saldos e avança `next_run` na mesma transação, e faz commit.
+
+        Devolve as transações de fato inseridas (user_id, account_id, category_id, type, amount, date).
+        """
+        inserted: List[Row] = []
+        if rows:
+            dialect = postgresql if self.session.bind.dialect.name == 'postgresql' else sqlite
+            stmt = dialect.insert(Transaction).on_conflict_do_nothing(index_elements=['account_id', 'import_hash', 'date'])
+            stmt = stmt.returning(Transaction.user_id, Transaction.account_id, Transaction.category_id, Transaction.type, Transaction.amount, Transaction.date)
+            inserted = (await self.session.execute(stmt, list(rows))).all()
+        deltas: Dict[Tuple[UUID, int, Optional[int], date], Decimal] = defaultdict(Decimal)
+        for txn in inserted:
+            deltas[(txn.user_id, txn.account_id, txn.category_id, txn.date.replace(day=1))] += signed_amount(txn.type, txn.amount)
+        await self.balances.apply_for_users(deltas)
+        if next_runs:
+            # UPDATE em lote pela chave primária (executemany).
+            await self.session.execute(update(RecurringRule), [{'id': rule_id, 'next_run': day} for rule_id, day in next_runs.items()])
+        await self.session.commit()
+        return inserted
@@ -0,0 +1,74 @@
+
+from typing import List, Optional
+from uuid import UUID
+from datetime import date
+from sqlalchemy import Row, extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.category import Category
+from ..models.tag import Tag, TransactionTag
+from ..models.transaction import Transaction
+from .transactions import transaction_filters
+
+class ReportRepository:
+    """Agregações sobre `transactions` calculadas no banco com GROUP BY."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def totals_by_type(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Row]:
+        stmt = (
+            select(Transaction.type, func.sum(Transaction.amount).label('total'), func.count().label('count'))
+            .where(*transaction_filters(user_id, start_date, end_date, account_id, category_id))
+            .group_by(Transaction.type)
+            .order_by(Transaction.type)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def totals_by_category(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Row]:
+        stmt = (
+            select(Transaction.category_id, Category.name.label('category_name'), Transaction.type, func.sum(Transaction.amount).label('total'), func.count().label('count'))
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .where(*transaction_filters(user_id, start_date, end_date, account_id, category_id))
+            .group_by(Transaction.category_id, Category.name, Transaction.type)
+            .order_by(func.sum(Transaction.amount).desc())
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def totals_by_tag(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Row]:
+        # Uma transação com várias tags conta em cada uma delas; transações sem tag ficam de fora.
+        stmt = (
+            select(Tag.id.label('tag_id'), Tag.name.label('tag_name'), Transaction.type, func.sum(Transaction.amount).label('total'), func.count().label('count'))
+            .join(TransactionTag, TransactionTag.transaction_id == Transaction.id)
+            .join(Tag, Tag.id == TransactionTag.tag_id)
+            .where(*transaction_filters(user_id, start_date, end_date, account_id, category_id))
+            .group_by(Tag.id, Tag.name, Transaction.type)
+            .order_by(func.sum(Transaction.amount).desc())
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def totals_by_month(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Row]:
+        # EXTRACT é portável entre Postgres e SQLite, ao contrário de date_trunc/strftime.
+        year = extract('year', Transaction.date).label('year')
+        month = extract('month', Transaction.date).label('month')
+        stmt = (
+            select(year, month, Transaction.type, func.sum(Transaction.amount).label('total'), func.count().label('count'))
+            .where(*transaction_filters(user_id, start_date, end_date, account_id, category_id))
+            .group_by(year, month, Transaction.type)
+            .order_by(year, month, Transaction.type)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def totals_by_day(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Row]:
+        stmt = (
+            select(Transaction.date, Transaction.type, func.sum(Transaction.amount).label('total'), func.count().label('count'))
+            .where(*transaction_filters(user_id, start_date, end_date, account_id, category_id))
+            .group_by(Transaction.date, Transaction.type)
+            .order_by(Transaction.date, Transaction.type)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
@@ -0,0 +1,14 @@
+
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Result, ScalarSelect, func, select
+
+def as_dicts(result: Result) -> List[Dict[str, Any]]:
+    """Linhas como dicts simples: o pydantic valida dict bem mais rápido que RowMapping ou objetos ORM."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def fingerprint_columns(model: Any, *where: Any) -> Tuple[ScalarSelect, ScalarSelect]:
+    """max(updated_at) e count(*) das linhas de `model` como subconsultas escalares, para compor o
+    ETag de uma listagem com várias tabelas num único SELECT."""
+    return (select(func.max(model.updated_at)).where(*where).scalar_subquery(), select(func.count()).select_from(model).where(*where).scalar_subquery())
@@ -0,0 +1,56 @@
+
+from collections import defaultdict
+from typing import Collection, Dict, Iterable, List, Optional
+from uuid import UUID
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.tag import Tag, TransactionTag
+
+def normalize_tags(names: Optional[Iterable[str]]) -> List[str]:
+    """Remove espaços nas pontas, nomes vazios e repetidos, mantendo a ordem informada."""
+    return list(dict.fromkeys(name.strip() for name in names or () if name and name.strip()))
+
+class TagRepository:
+    """Mantém `tags` e `transaction_tags` sem fazer commit; quem chama controla a transação."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def ensure(self, user_id: UUID, names: Collection[str]) -> Dict[str, int]:
+        """Ids das tags pelo nome, criando as que faltam: um upsert executemany e um SELECT."""
+        if not names:
+            return {}
+        dialect = postgresql if self.session.bind.dialect.name == 'postgresql' else sqlite
+        # Nomes ordenados: escritas concorrentes do mesmo usuário travam as linhas na mesma ordem.
+        stmt = dialect.insert(Tag).on_conflict_do_nothing(index_elements=['user_id', 'name'])
+        await self.session.execute(stmt, [{'user_id': user_id, 'name': name} for name in sorted(names)])
+        result = await self.session.execute(select(Tag.name, Tag.id).where(Tag.user_id == user_id, Tag.name.in_(names)))
+        return dict(result.all())
+
+    async def set_for(self, user_id: UUID, tags_by_transaction: Dict[int, Optional[List[str]]], replace: bool = True) -> Dict[int, List[str]]:
+        """Grava as tags de cada transação, substituindo as atuais se `replace`. Devolve os nomes normalizados."""
+        normalized = {transaction_id: normalize_tags(names) for transaction_id, names in tags_by_transaction.items()}
+        if replace and normalized:
+            await self.session.execute(delete(TransactionTag).where(TransactionTag.transaction_id.in_(normalized)))
+        ids = await self.ensure(user_id, {name for names in normalized.values() for name in names})
+        links = [{'transaction_id': transaction_id, 'tag_id': ids[name]} for transaction_id, names in normalized.items() for name in names]
+        if links:
+            await self.session.execute(insert(TransactionTag), links)
+        return normalized
+
+    async def unlink(self, transaction_ids: Collection[int]) -> None:
+        """Remove as associações de transações apagadas (não há FK com ON DELETE CASCADE para isso)."""
+        if transaction_ids:
+            await self.session.execute(delete(TransactionTag).where(TransactionTag.transaction_id.in_(transaction_ids)))
+
+    async def names_for(self, transaction_ids: Collection[int]) -> Dict[int, List[str]]:
+        """Tags de várias transações num único SELECT, em ordem alfabética."""
+        tags: Dict[int, List[str]] = defaultdict(list)
+        if not transaction_ids:
+            return tags
+        stmt = select(TransactionTag.transaction_id, Tag.name).join(Tag, Tag.id == TransactionTag.tag_id).where(TransactionTag.transaction_id.in_(transaction_ids)).order_by(TransactionTag.transaction_id, Tag.name)
+        for transaction_id, name in await self.session.execute(stmt):
+            tags[transaction_id].append(name)
+        return tags
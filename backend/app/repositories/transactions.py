@@ -1,59 +1,309 @@
 
-from typing import List, Optional
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, AsyncIterator, Collection, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 from datetime import date
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, Numeric, Row, and_, case, cast, delete, func, insert, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models.transaction import Transaction
+from ..models.account import Account
+from ..models.category import Category
+from ..models.tag import Tag, TransactionTag
+from ..models.transaction import SEARCH_CONFIG, Transaction
 from ..schemas.transaction import TransactionCreate, TransactionUpdate
+from .balances import AccountBalanceRepository, signed_amount
+from .categories import CategoryRepository
+from .rows import as_dicts, fingerprint_columns
+from .tags import TagRepository
+
+STREAM_CHUNK_SIZE = 500
+
+# Colunas de TransactionRead menos `tags`, que vêm de transaction_tags numa consulta à parte.
+READ_COLUMNS = (Transaction.id, Transaction.user_id, Transaction.account_id, Transaction.type, Transaction.amount, Transaction.date, Transaction.description, Transaction.category_id, Transaction.merchant, Transaction.created_at, Transaction.updated_at)
+
+EXPORT_COLUMNS = (Transaction.id, Transaction.date, Transaction.type, Transaction.amount, Transaction.account_id, Transaction.category_id, Transaction.description, Transaction.merchant)
+
+def transaction_filters(user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, category_ids: Optional[Collection[int]] = None, tag: Optional[str] = None) -> List:
+    """Predicados WHERE compartilhados pela listagem e pelos relatórios de transações.
+
+    `category_ids` (categoria e subcategorias) substitui `category_id` por um único IN.
+    """
+    clauses = [Transaction.user_id == user_id]
+    if start_date:
+        clauses.append(Transaction.date >= start_date)
+    if end_date:
+        clauses.append(Transaction.date <= end_date)
+    if account_id:
+        clauses.append(Transaction.account_id == account_id)
+    if category_ids:
+        clauses.append(Transaction.category_id.in_(sorted(category_ids)))
+    elif category_id:
+        clauses.append(Transaction.category_id == category_id)
+    if tag:
+        # Semi-join por (user_id, name) em tags e (tag_id, transaction_id) em transaction_tags, sem ler JSON.
+        tagged = select(TransactionTag.transaction_id).join(Tag, Tag.id == TransactionTag.tag_id).where(Tag.user_id == user_id, Tag.name == tag.strip())
+        clauses.append(Transaction.id.in_(tagged))
+    return clauses
+
+# Mesma expressão do índice trigram da migração 0006; as constantes vão literais para o Postgres casá-las com o índice.
+_SEARCH_DOCUMENT = func.coalesce(Transaction.description, literal_column("''")).op('||')(literal_column("' '")).op('||')(func.coalesce(Transaction.merchant, literal_column("''")))
+
+def _like_pattern(term: str, prefix: bool = False) -> str:
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix else f'%{escaped}%'
+
+def transaction_search(q: str, dialect: str) -> Tuple[ColumnElement, ColumnElement]:
+    """Predicado e relevância da busca `q` em descrição e estabelecimento.
+
+    No Postgres combina o tsvector gerado (`websearch_to_tsquery`) com o índice trigram, que cobre
+    trechos de palavras; a relevância soma `ts_rank_cd` e `similarity`. Nos demais bancos todos os
+    termos precisam aparecer (LIKE); a frase inteira pesa mais, e mais ainda no começo do texto.
+    A relevância sai como NUMERIC de 4 casas para poder ser repetida no cursor.
+    """
+    if dialect == 'postgresql':
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+        vector = literal_column('transactions.search_vector')
+        where = or_(vector.op('@@')(query), _SEARCH_DOCUMENT.ilike(_like_pattern(q), escape='\\'))
+        rank = func.ts_rank_cd(vector, query) + func.similarity(_SEARCH_DOCUMENT, q)
+    else:
+        document = func.lower(_SEARCH_DOCUMENT)
+        where = and_(*(document.like(_like_pattern(term.lower()), escape='\\') for term in q.split()))
+        rank = case((document.like(_like_pattern(q.lower(), prefix=True), escape='\\'), 2), (document.like(_like_pattern(q.lower()), escape='\\'), 1), else_=0)
+    return where, cast(rank, Numeric(12, 4)).label('rank')
+
+def balance_deltas(txns: Iterable, sign: int = 1) -> Dict[Tuple[int, Optional[int], date], Decimal]:
+    """Agrupa o efeito de várias transações no saldo por (conta, categoria, 1º dia do mês)."""
+    deltas: Dict[Tuple[int, Optional[int], date], Decimal] = defaultdict(Decimal)
+    for txn in txns:
+        deltas[(txn.account_id, txn.category_id, txn.date.replace(day=1))] += sign * signed_amount(txn.type, txn.amount)
+    return deltas
+
+def _insert_row(user_id: UUID, obj_in: TransactionCreate, **extra) -> dict:
+    return {'user_id': user_id, 'account_id': obj_in.account_id, 'type': obj_in.type, 'amount': obj_in.amount, 'date': obj_in.date, 'description': obj_in.description, 'category_id': obj_in.category_id, 'merchant': obj_in.merchant, **extra}
+
+def _update_values(obj_in: TransactionUpdate) -> dict:
+    """Colunas alteradas em `transactions`; `tags` fica de fora e vai para transaction_tags."""
+    return obj_in.model_dump(exclude_unset=True, exclude={'tags'})
 
 class TransactionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.balances = AccountBalanceRepository(session)
+        self.categories = CategoryRepository(session)
+        self.tags = TagRepository(session)
+
+    def _list_stmt(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, after: Optional[Tuple] = None, category_ids: Optional[Collection[int]] = None, search: Optional[Tuple[ColumnElement, ColumnElement]] = None, tag: Optional[str] = None):
+        """SELECT da listagem; com `search` (de `transaction_search`) ordena por relevância e `after` é (rank, date, id)."""
+        stmt = select(*READ_COLUMNS).where(*transaction_filters(user_id, start_date, end_date, account_id, category_id, category_ids, tag))
+        keys = [Transaction.date, Transaction.id]
+        order = [Transaction.date.desc(), Transaction.id.desc()]
+        if search:
+            where, rank = search
+            stmt = stmt.add_columns(rank).where(where)
+            keys.insert(0, rank.element)
+            order.insert(0, rank.desc())
+        if after:
+            # Keyset: continua estritamente depois da última linha entregue, na ordem ([rank,] date, id) decrescente.
+            stmt = stmt.where(tuple_(*keys) < tuple_(*after))
+            if not search:
+                # Implícito na comparação de tuplas, mas o Postgres só poda partições com predicados na coluna.
+                stmt = stmt.where(Transaction.date <= after[0])
+        return stmt.order_by(*order)
+
+    def _search(self, q: Optional[str]) -> Optional[Tuple[ColumnElement, ColumnElement]]:
+        return transaction_search(q, self.session.bind.dialect.name) if q else None
 
-    async def list(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Transaction]:
-        stmt = select(Transaction).where(Transaction.user_id == user_id)
-        if start_date:
-            stmt = stmt.where(Transaction.date >= start_date)
-        if end_date:
-            stmt = stmt.where(Transaction.date <= end_date)
-        if account_id:
-            stmt = stmt.where(Transaction.account_id == account_id)
-        if category_id:
-            stmt = stmt.where(Transaction.category_id == category_id)
+    async def list(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, limit: Optional[int] = None, after: Optional[Tuple] = None, include_subcategories: bool = False, q: Optional[str] = None, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+        category_ids = await self._subtree(user_id, category_id) if include_subcategories else None
+        stmt = self._list_stmt(user_id, start_date, end_date, account_id, category_id, after, category_ids, self._search(q), tag)
+        if limit:
+            stmt = stmt.limit(limit)
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return await self._with_tags(as_dicts(result))
+
+    async def stream(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, after: Optional[Tuple] = None, include_subcategories: bool = False, q: Optional[str] = None, tag: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        category_ids = await self._subtree(user_id, category_id) if include_subcategories else None
+        stmt = self._list_stmt(user_id, start_date, end_date, account_id, category_id, after, category_ids, self._search(q), tag)
+        result = await self.session.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        keys = list(result.keys())
+        async for partition in result.partitions():
+            for row in await self._with_tags([dict(zip(keys, row)) for row in partition]):
+                yield row
+
+    def _fingerprint_stmt(self, user_id: UUID):
+        """Impressão digital de todas as transações do usuário, sem os filtros da listagem: com o índice
+        (user_id, updated_at) o max é uma descida no índice e o count um index-only scan. As categorias
+        entram porque apagar uma categoria anula `category_id` (SET NULL) sem tocar em updated_at."""
+        return select(*fingerprint_columns(Transaction, Transaction.user_id == user_id), *fingerprint_columns(Category, Category.user_id == user_id))
+
+    async def fingerprint(self, user_id: UUID) -> Row:
+        return (await self.session.execute(self._fingerprint_stmt(user_id))).one()
+
+    async def _with_tags(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Uma consulta por página (ou lote do stream), não uma por transação.
+        names = await self.tags.names_for([row['id'] for row in rows])
+        for row in rows:
+            row['tags'] = names.get(row['id'])
+        return rows
+
+    async def _subtree(self, user_id: UUID, category_id: Optional[int]) -> Optional[Collection[int]]:
+        if not category_id:
+            return None
+        return (await self.categories.tree(user_id)).subtree(category_id)
+
+    async def stream_rows(self, user_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> AsyncIterator[List[Row]]:
+        """Lotes de tuplas (EXPORT_COLUMNS) em ordem cronológica, lidos com cursor do servidor e sem instanciar o ORM."""
+        stmt = select(*EXPORT_COLUMNS).where(*transaction_filters(user_id, start_date, end_date, account_id, category_id)).order_by(Transaction.date, Transaction.id)
+        result = await self.session.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for partition in result.partitions():
+            yield partition
 
     async def get(self, user_id: UUID, transaction_id: int) -> Transaction | None:
         stmt = select(Transaction).where(Transaction.id == transaction_id, Transaction.user_id == user_id)
-        result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        txn = (await self.session.execute(stmt)).scalar_one_or_none()
+        if txn is not None:
+            txn.tags = (await self.tags.names_for([txn.id])).get(txn.id)
+        return txn
 
     async def create(self, user_id: UUID, obj_in: TransactionCreate) -> Transaction:
-        txn = Transaction(user_id=user_id, account_id=obj_in.account_id, type=obj_in.type, amount=obj_in.amount, date=obj_in.date, description=obj_in.description, category_id=obj_in.category_id, merchant=obj_in.merchant, tx_metadata={'tags': obj_in.tags} if obj_in.tags else None)
-        self.session.add(txn)
+        txn = (await self.session.execute(insert(Transaction).values(**_insert_row(user_id, obj_in)).returning(Transaction))).scalar_one()
+        await self.balances.apply(user_id, txn.account_id, txn.category_id, txn.date, signed_amount(txn.type, txn.amount))
+        if obj_in.tags:
+            txn.tags = (await self.tags.set_for(user_id, {txn.id: obj_in.tags}, replace=False))[txn.id] or None
         await self.session.commit()
-        await self.session.refresh(txn)
         return txn
 
     async def update(self, user_id: UUID, transaction_id: int, obj_in: TransactionUpdate) -> Transaction | None:
-        txn = await self.get(user_id, transaction_id)
-        if not txn:
-            return None
-        for field, value in obj_in.model_dump(exclude_unset=True).items():
-            if field == 'tags':
-                setattr(txn, 'tx_metadata', {'tags': value} if value else None)
-            else:
-                setattr(txn, field, value)
+        values = _update_values(obj_in)
+        retag = 'tags' in obj_in.model_fields_set
+        if not values and not retag:
+            return await self.get(user_id, transaction_id)
+        if not values:
+            # Só as tags mudaram: o UPDATE roda mesmo assim para avançar o updated_at.
+            values = {'updated_at': func.now()}
+        old = select(Transaction.id, Transaction.account_id, Transaction.category_id, Transaction.type, Transaction.amount, Transaction.date).where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        if self.session.bind.dialect.name == 'postgresql':
+            # Um único UPDATE ... FROM (SELECT ... FOR UPDATE) devolve a linha nova e os valores antigos para o saldo.
+            old = old.with_for_update().subquery('old')
+            stmt = update(Transaction).where(Transaction.id == old.c.id).values(**values).returning(Transaction, old.c.account_id, old.c.category_id, old.c.type, old.c.amount, old.c.date)
+            row = (await self.session.execute(stmt)).one_or_none()
+            if row is None:
+                return None
+            txn, previous = row[0], row[1:]
+        else:
+            # SQLite não aceita colunas de outra tabela no RETURNING: lê os valores antigos antes.
+            previous = (await self.session.execute(old)).one_or_none()
+            if previous is None:
+                return None
+            previous = previous[1:]
+            stmt = update(Transaction).where(Transaction.id == transaction_id, Transaction.user_id == user_id).values(**values).returning(Transaction)
+            txn = (await self.session.execute(stmt)).scalar_one()
+        account_id, category_id, type_, amount, day = previous
+        deltas = balance_deltas([txn])
+        deltas[(account_id, category_id, day.replace(day=1))] -= signed_amount(type_, amount)
+        await self.balances.apply_many(user_id, deltas)
+        if retag:
+            txn.tags = (await self.tags.set_for(user_id, {txn.id: obj_in.tags}))[txn.id] or None
+        else:
+            txn.tags = (await self.tags.names_for([txn.id])).get(txn.id)
         await self.session.commit()
-        await self.session.refresh(txn)
         return txn
 
     async def delete(self, user_id: UUID, transaction_id: int) -> bool:
-        txn = await self.get(user_id, transaction_id)
-        if not txn:
+        stmt = delete(Transaction).where(Transaction.id == transaction_id, Transaction.user_id == user_id).returning(Transaction.account_id, Transaction.category_id, Transaction.type, Transaction.amount, Transaction.date)
+        deleted = (await self.session.execute(stmt)).one_or_none()
+        if deleted is None:
             return False
-        await self.session.delete(txn)
+        await self.balances.apply(user_id, deleted.account_id, deleted.category_id, deleted.date, -signed_amount(deleted.type, deleted.amount))
+        await self.tags.unlink([transaction_id])
         await self.session.commit()
         return True
+
+    async def owned_references(self, user_id: UUID, account_ids: Set[int], category_ids: Set[int]) -> Tuple[Set[int], Set[int]]:
+        """Dentre os ids informados, quais contas e categorias pertencem ao usuário."""
+        accounts: Set[int] = set()
+        categories: Set[int] = set()
+        if account_ids:
+            result = await self.session.execute(select(Account.id).where(Account.user_id == user_id, Account.id.in_(account_ids)))
+            accounts = set(result.scalars().all())
+        if category_ids:
+            result = await self.session.execute(select(Category.id).where(Category.user_id == user_id, Category.id.in_(category_ids)))
+            categories = set(result.scalars().all())
+        return accounts, categories
+
+    async def bulk_create(self, user_id: UUID, objs_in: Sequence[TransactionCreate]) -> List[Transaction]:
+        if not objs_in:
+            return []
+        rows = [_insert_row(user_id, o) for o in objs_in]
+        # INSERT ... VALUES (...), (...) RETURNING em lotes (insertmanyvalues), uma única transação.
+        if self.session.bind.dialect.name == 'postgresql':
+            result = await self.session.scalars(insert(Transaction).returning(Transaction, sort_by_parameter_order=True), rows)
+            txns = result.all()
+        else:
+            # Sem coluna sentinela no SQLite, sort_by_parameter_order viraria um INSERT por linha. Lá o id
+            # (rowid) cresce na ordem do VALUES, então ordenar pelo id recupera a ordem dos itens.
+            result = await self.session.scalars(insert(Transaction).returning(Transaction), rows)
+            txns = sorted(result.all(), key=lambda txn: txn.id)
+        await self.balances.apply_many(user_id, balance_deltas(txns))
+        # Na ordem dos parâmetros: a i-ésima transação corresponde ao i-ésimo item.
+        tagged = await self.tags.set_for(user_id, {txn.id: obj.tags for txn, obj in zip(txns, objs_in) if obj.tags}, replace=False)
+        for txn in txns:
+            txn.tags = tagged.get(txn.id) or None
+        await self.session.commit()
+        return txns
+
+    async def bulk_update(self, user_id: UUID, changes: Dict[int, TransactionUpdate]) -> List[Transaction]:
+        if not changes:
+            return []
+        result = await self.session.execute(select(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(changes)))
+        txns = result.scalars().all()
+        deltas = balance_deltas(txns, sign=-1)
+        retag = {}
+        for txn in txns:
+            obj_in = changes[txn.id]
+            values = _update_values(obj_in)
+            for field, value in values.items():
+                setattr(txn, field, value)
+            if 'tags' in obj_in.model_fields_set:
+                retag[txn.id] = obj_in.tags
+                if not values:
+                    txn.updated_at = func.now()
+        for key, delta in balance_deltas(txns).items():
+            deltas[key] += delta
+        await self.balances.apply_many(user_id, deltas)
+        await self.tags.set_for(user_id, retag)
+        await self.session.commit()
+        # Recarrega num único SELECT para trazer o updated_at gerado pelo banco.
+        result = await self.session.execute(select(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_([t.id for t in txns])).execution_options(populate_existing=True))
+        txns = result.scalars().all()
+        names = await self.tags.names_for([t.id for t in txns])
+        for txn in txns:
+            txn.tags = names.get(txn.id)
+        return txns
+
+    async def bulk_delete(self, user_id: UUID, transaction_ids: Sequence[int]) -> List[int]:
+        if not transaction_ids:
+            return []
+        stmt = delete(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(transaction_ids)).returning(Transaction.id, Transaction.account_id, Transaction.category_id, Transaction.type, Transaction.amount, Transaction.date)
+        result = await self.session.execute(stmt.execution_options(synchronize_session=False))
+        deleted = result.all()
+        await self.balances.apply_many(user_id, balance_deltas(deleted, sign=-1))
+        await self.tags.unlink([row.id for row in deleted])
+        await self.session.commit()
+        return [row.id for row in deleted]
+
+    async def import_chunk(self, user_id: UUID, items: Sequence[Tuple[TransactionCreate, str]]) -> int:
+        """Insere um lote importado ignorando hashes já existentes na conta e faz commit do lote."""
+        if not items:
+            return 0
+        rows = [_insert_row(user_id, o, import_hash=import_hash) for o, import_hash in items]
+        dialect = postgresql if self.session.bind.dialect.name == 'postgresql' else sqlite
+        stmt = dialect.insert(Transaction).on_conflict_do_nothing(index_elements=['account_id', 'import_hash', 'date'])
+        stmt = stmt.returning(Transaction.account_id, Transaction.category_id, Transaction.type, Transaction.amount, Transaction.date)
+        result = await self.session.execute(stmt, rows)
+        inserted = result.all()
+        await self.balances.apply_many(user_id, balance_deltas(inserted))
+        await self.session.commit()
+        return len(inserted)
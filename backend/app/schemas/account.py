@@ -26,4 +26,4 @@ class AccountInDB(AccountBase):
         from_attributes = True
 
 class AccountRead(AccountInDB):
-    pass
+    current_balance: Decimal = Field(default=0)
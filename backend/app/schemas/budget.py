@@ -2,6 +2,7 @@
 from uuid import UUID
 from datetime import datetime, date
 from decimal import Decimal
+from typing import Optional
 from pydantic import BaseModel
 
 class BudgetBase(BaseModel):
@@ -25,3 +26,13 @@ class BudgetInDB(BudgetBase):
 
 class BudgetRead(BudgetInDB):
     pass
+
+class BudgetStatus(BaseModel):
+    id: int
+    month: date
+    category_id: int
+    category_name: str
+    limit_amount: Decimal
+    spent: Decimal
+    remaining: Decimal
+    percent: Optional[Decimal] = None
@@ -0,0 +1,17 @@
+from datetime import date
+from decimal import Decimal
+from typing import List
+from pydantic import BaseModel
+
+class ForecastPoint(BaseModel):
+    date: date
+    balance: Decimal
+    # Faixa de ~80% em torno do saldo projetado, pela variação histórica mensal das categorias.
+    low: Decimal
+    high: Decimal
+
+class AccountForecast(BaseModel):
+    account_id: int
+    name: str
+    current_balance: Decimal
+    points: List[ForecastPoint]
@@ -0,0 +1,46 @@
+from uuid import UUID
+from datetime import datetime, date
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+class GoalLinkBase(BaseModel):
+    account_id: Optional[int] = None
+    category_id: Optional[int] = None
+
+    @model_validator(mode='after')
+    def _account_or_category(self):
+        if self.account_id is None and self.category_id is None:
+            raise ValueError('account_id or category_id is required')
+        return self
+
+class GoalBase(BaseModel):
+    name: str
+    target_amount: Decimal
+    target_date: date
+    initial_amount: Decimal = Field(default=0)
+    # Padrão: hoje. As contribuições contam a partir do mês desta data.
+    start_date: Optional[date] = None
+    links: List[GoalLinkBase] = Field(default_factory=list)
+
+class GoalCreate(GoalBase):
+    pass
+
+class GoalUpdate(GoalBase):
+    pass
+
+class GoalRead(GoalBase):
+    id: int
+    user_id: UUID
+    start_date: date
+    created_at: datetime
+    updated_at: datetime
+    contributed: Decimal
+    current_amount: Decimal
+    remaining: Decimal
+    percent: Optional[Decimal] = None
+    # Média mensal das contribuições nos últimos meses completos.
+    monthly_rate: Decimal
+    required_monthly: Decimal
+    projected_completion: Optional[date] = None
+    on_track: bool
@@ -0,0 +1,13 @@
+
+from typing import List
+from pydantic import BaseModel
+
+class ImportLineError(BaseModel):
+    line: int
+    detail: str
+
+class ImportResult(BaseModel):
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: List[ImportLineError] = []
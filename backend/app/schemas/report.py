@@ -0,0 +1,21 @@
+
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from pydantic import BaseModel
+
+class TypeTotal(BaseModel):
+    type: str
+    total: Decimal
+    count: int
+
+class CategoryTotal(TypeTotal):
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+
+class TagTotal(TypeTotal):
+    tag_id: int
+    tag_name: str
+
+class PeriodTotal(TypeTotal):
+    period: date
@@ -3,7 +3,9 @@ from uuid import UUID
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+BULK_MAX_ITEMS = 5000
 
 class TransactionBase(BaseModel):
     account_id: int
@@ -31,3 +33,25 @@ class TransactionInDB(TransactionBase):
 
 class TransactionRead(TransactionInDB):
     pass
+
+class TransactionPage(BaseModel):
+    items: List[TransactionRead]
+    next_cursor: Optional[str] = None
+
+class TransactionBulkUpdateItem(TransactionUpdate):
+    id: int
+
+class TransactionBulkDelete(BaseModel):
+    ids: List[int] = Field(..., max_length=BULK_MAX_ITEMS)
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: str
+
+class TransactionBulkResult(BaseModel):
+    items: List[TransactionRead]
+    errors: List[BulkItemError]
+
+class TransactionBulkDeleteResult(BaseModel):
+    deleted: List[int]
+    errors: List[BulkItemError]
@@ -1,8 +1,15 @@
 
 from uuid import UUID
+from decimal import Decimal
 from typing import List
+from pydantic import TypeAdapter
 from ..schemas.account import AccountCreate, AccountUpdate, AccountRead
+from ..models.account import Account
 from ..repositories.accounts import AccountRepository
+from ..core.cache import ACCOUNTS, TRANSACTIONS, get_response_cache
+from ..core.responses import weak_etag
+
+_READ_LIST = TypeAdapter(List[AccountRead])
 
 class AccountService:
     def __init__(self, repo: AccountRepository, user_id: UUID):
@@ -10,24 +17,46 @@ class AccountService:
         self.user_id = user_id
 
     async def list_accounts(self) -> List[AccountRead]:
-        accounts = await self.repo.list_accounts(self.user_id)
-        return [AccountRead.model_validate(a) for a in accounts]
+        rows = await self.repo.list_accounts(self.user_id)
+        net = await self.repo.net_changes(self.user_id)
+        # Tuplas validadas numa única passada do TypeAdapter, sem instanciar o ORM.
+        accounts = _READ_LIST.validate_python(rows)
+        for account in accounts:
+            account.current_balance = account.initial_balance + net.get(account.id, 0)
+        return accounts
+
+    async def list_etag(self) -> str:
+        return weak_etag('accounts', *await self.repo.fingerprint(self.user_id))
 
     async def get_account(self, account_id: int) -> AccountRead | None:
         account = await self.repo.get(self.user_id, account_id)
         if not account:
             return None
-        return AccountRead.model_validate(account)
+        net = await self.repo.net_changes(self.user_id, [account.id])
+        return self._to_read(account, net.get(account.id, 0))
 
     async def create_account(self, obj_in: AccountCreate) -> AccountRead:
         account = await self.repo.create(self.user_id, obj_in)
-        return AccountRead.model_validate(account)
+        await get_response_cache().bump(self.user_id, ACCOUNTS)
+        return self._to_read(account, 0)
 
     async def update_account(self, account_id: int, obj_in: AccountUpdate) -> AccountRead | None:
         account = await self.repo.update(self.user_id, account_id, obj_in)
         if not account:
             return None
-        return AccountRead.model_validate(account)
+        await get_response_cache().bump(self.user_id, ACCOUNTS)
+        net = await self.repo.net_changes(self.user_id, [account.id])
+        return self._to_read(account, net.get(account.id, 0))
 
     async def delete_account(self, account_id: int) -> bool:
-        return await self.repo.delete(self.user_id, account_id)
+        deleted = await self.repo.delete(self.user_id, account_id)
+        if deleted:
+            # As transações da conta saem junto (ON DELETE CASCADE).
+            await get_response_cache().bump(self.user_id, ACCOUNTS, TRANSACTIONS)
+        return deleted
+
+    @staticmethod
+    def _to_read(account: Account, net_change: Decimal) -> AccountRead:
+        read = AccountRead.model_validate(account)
+        read.current_balance = read.initial_balance + net_change
+        return read
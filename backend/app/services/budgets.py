@@ -1,9 +1,15 @@
 
 from uuid import UUID
 from typing import List, Optional
+from pydantic import TypeAdapter
 from datetime import date
-from ..schemas.budget import BudgetCreate, BudgetUpdate, BudgetRead
+from decimal import Decimal
+from ..schemas.budget import BudgetCreate, BudgetUpdate, BudgetRead, BudgetStatus
 from ..repositories.budgets import BudgetRepository
+from ..core.cache import BUDGETS, get_response_cache
+from ..core.responses import weak_etag
+
+_READ_LIST = TypeAdapter(List[BudgetRead])
 
 class BudgetService:
     def __init__(self, repo: BudgetRepository, user_id: UUID):
@@ -11,8 +17,16 @@ class BudgetService:
         self.user_id = user_id
 
     async def list_budgets(self, month: Optional[date] = None) -> List[BudgetRead]:
-        budgets = await self.repo.list(self.user_id, month)
-        return [BudgetRead.model_validate(b) for b in budgets]
+        return _READ_LIST.validate_python(await self.repo.list(self.user_id, month))
+
+    async def list_etag(self, month: Optional[date] = None) -> str:
+        return weak_etag('budgets', month, *await self.repo.fingerprint(self.user_id, month))
+
+    async def budget_status(self, month: date) -> List[BudgetStatus]:
+        start = month.replace(day=1)
+        next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        rows = await self.repo.status(self.user_id, start, next_month)
+        return [self._to_status(r) for r in rows]
 
     async def get_budget(self, budget_id: int) -> BudgetRead | None:
         budget = await self.repo.get(self.user_id, budget_id)
@@ -22,13 +36,24 @@ class BudgetService:
 
     async def create_budget(self, obj_in: BudgetCreate) -> BudgetRead:
         budget = await self.repo.create(self.user_id, obj_in)
+        await get_response_cache().bump(self.user_id, BUDGETS)
         return BudgetRead.model_validate(budget)
 
     async def update_budget(self, budget_id: int, obj_in: BudgetUpdate) -> BudgetRead | None:
         budget = await self.repo.update(self.user_id, budget_id, obj_in)
         if not budget:
             return None
+        await get_response_cache().bump(self.user_id, BUDGETS)
         return BudgetRead.model_validate(budget)
 
     async def delete_budget(self, budget_id: int) -> bool:
-        return await self.repo.delete(self.user_id, budget_id)
+        deleted = await self.repo.delete(self.user_id, budget_id)
+        if deleted:
+            await get_response_cache().bump(self.user_id, BUDGETS)
+        return deleted
+
+    @staticmethod
+    def _to_status(row) -> BudgetStatus:
+        spent = row.spent if row.spent is not None else Decimal('0.00')
+        percent = (spent * 100 / row.limit_amount).quantize(Decimal('0.01')) if row.limit_amount else None
+        return BudgetStatus(id=row.id, month=row.month, category_id=row.category_id, category_name=row.category_name, limit_amount=row.limit_amount, spent=spent, remaining=row.limit_amount - spent, percent=percent)
@@ -1,8 +1,13 @@
 
 from uuid import UUID
 from typing import List
+from pydantic import TypeAdapter
 from ..schemas.category import CategoryCreate, CategoryUpdate, CategoryRead
 from ..repositories.categories import CategoryRepository
+from ..core.cache import CATEGORIES, TRANSACTIONS, get_response_cache
+from ..core.responses import weak_etag
+
+_READ_LIST = TypeAdapter(List[CategoryRead])
 
 class CategoryService:
     def __init__(self, repo: CategoryRepository, user_id: UUID):
@@ -10,8 +15,10 @@ class CategoryService:
         self.user_id = user_id
 
     async def list_categories(self) -> List[CategoryRead]:
-        categories = await self.repo.list(self.user_id)
-        return [CategoryRead.model_validate(c) for c in categories]
+        return _READ_LIST.validate_python(await self.repo.list(self.user_id))
+
+    async def list_etag(self) -> str:
+        return weak_etag('categories', *await self.repo.fingerprint(self.user_id))
 
     async def get_category(self, category_id: int) -> CategoryRead | None:
         category = await self.repo.get(self.user_id, category_id)
@@ -21,13 +28,19 @@ class CategoryService:
 
     async def create_category(self, obj_in: CategoryCreate) -> CategoryRead:
         category = await self.repo.create(self.user_id, obj_in)
+        await get_response_cache().bump(self.user_id, CATEGORIES)
         return CategoryRead.model_validate(category)
 
     async def update_category(self, category_id: int, obj_in: CategoryUpdate) -> CategoryRead | None:
         category = await self.repo.update(self.user_id, category_id, obj_in)
         if not category:
             return None
+        await get_response_cache().bump(self.user_id, CATEGORIES)
         return CategoryRead.model_validate(category)
 
     async def delete_category(self, category_id: int) -> bool:
-        return await self.repo.delete(self.user_id, category_id)
+        deleted = await self.repo.delete(self.user_id, category_id)
+        if deleted:
+            # As transações da categoria ficam sem categoria (ON DELETE SET NULL).
+            await get_response_cache().bump(self.user_id, CATEGORIES, TRANSACTIONS)
+        return deleted
@@ -0,0 +1,84 @@
+
+import csv
+import io
+from typing import AsyncIterator, List
+
+from sqlalchemy import Row
+
+from ..repositories.transactions import EXPORT_COLUMNS
+
+HEADER = [column.key for column in EXPORT_COLUMNS]
+FLUSH_SIZE = 64 * 1024
+
+async def iter_csv(partitions: AsyncIterator[List[Row]]) -> AsyncIterator[bytes]:
+    """Converte os lotes em CSV, enviando o cabeçalho imediatamente e depois blocos de ~64 KiB."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    async for rows in partitions:
+        writer.writerows(rows)
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escrita do ParquetWriter que acumula bytes até serem drenados para a resposta."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+async def iter_parquet(partitions: AsyncIterator[List[Row]]) -> AsyncIterator[bytes]:
+    """Escreve um row group Parquet por lote; requer o pacote opcional `pyarrow`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.date32()),
+        ('type', pa.string()),
+        ('amount', pa.decimal128(12, 2)),
+        ('account_id', pa.int64()),
+        ('category_id', pa.int64()),
+        ('description', pa.string()),
+        ('merchant', pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in partitions:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from ..models.category_balance import UNCATEGORIZED
+from ..repositories.balances import signed_amount
+from ..repositories.forecast import ForecastRepository
+from .recurring import MAX_OCCURRENCES_PER_RULE, add_months, due_occurrences
+
+# Meses completos de histórico usados nas estatísticas por categoria.
+HISTORY_MONTHS = 12
+# Quantil de 90% da normal: low/high cobrem ~80% dos cenários.
+BAND_Z = 1.2816
+# Ocorrências por mês de cada padrão com intervalo 1.
+OCCURRENCES_PER_MONTH = {'daily': 365.25 / 12, 'weekly': 365.25 / 12 / 7, 'monthly': 1.0, 'yearly': 1 / 12}
+
+def _month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+def _money(value: float) -> Decimal:
+    # O + 0.0 troca -0.0 por 0.0, que sairia como "-0.00".
+    return Decimal(f'{round(value, 2) + 0.0:.2f}')
+
+class ForecastService:
+    """Projeção diária do saldo de cada conta nos próximos meses, somando ao saldo atual:
+
+    - as ocorrências das regras recorrentes, na data exata (as vencidas e ainda não geradas, hoje);
+    - o variável de cada (conta, categoria): a média mensal do histórico em `category_balances` menos
+      o que as regras da mesma conta e categoria já explicam, distribuída por igual nos dias do mês;
+    - os orçamentos: o gasto variável projetado da categoria (com subcategorias) não passa do limite
+      do mês descontadas as regras; sem orçamento no mês vale o último anterior.
+
+    O desvio-padrão mensal de cada categoria, acumulado dia a dia, dá a faixa low/high. As contas
+    são feitas em matrizes NumPy (categorias × meses, contas × dias) sobre agregados mensais, sem ler
+    `transactions`: o custo depende de meses e categorias, não do tamanho do histórico.
+    """
+
+    def __init__(self, repo: ForecastRepository, user_id: UUID):
+        self.repo = repo
+        self.user_id = user_id
+
+    async def forecast(self, months: int, account_id: Optional[int] = None, history_months: int = HISTORY_MONTHS, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        today = today or date.today()
+        end = add_months(today, months, today.day)
+        this_month = today.replace(day=1)
+        accounts = await self.repo.accounts(self.user_id, account_id)
+        if not accounts:
+            return []
+        index = {account.id: i for i, account in enumerate(accounts)}
+        net = await self.repo.balances.totals(self.user_id, index)
+        history = [row for row in await self.repo.monthly_history(self.user_id, add_months(this_month, -history_months, 1), this_month) if row.account_id in index]
+        rules = [rule for rule in await self.repo.rules(self.user_id) if rule.account_id in index]
+        budgets = await self.repo.budgets(self.user_id, end.replace(day=1))
+        tree = await self.repo.categories.tree(self.user_id)
+
+        def category(category_id: Optional[int]) -> int:
+            # Categorias apagadas continuam em category_balances com o id antigo.
+            return category_id if category_id in tree.descendants else UNCATEGORIZED
+
+        days = np.arange(np.datetime64(today, 'D'), np.datetime64(end, 'D') + 1)
+        day_months = days.astype('datetime64[M]')
+        month_of_day = (day_months - np.datetime64(this_month, 'M')).astype(int)
+        days_in_month = ((day_months + 1).astype('datetime64[D]') - day_months.astype('datetime64[D]')).astype(float)
+        n_months = int(month_of_day[-1]) + 1
+
+        # Histórico: uma linha por (conta, categoria), uma coluna por mês desde a primeira movimentação da janela.
+        keys: Dict[Tuple[int, int], int] = {}
+        cells = [(keys.setdefault((row.account_id, category(row.category_id)), len(keys)), _month_index(row.month), float(row.net_change)) for row in history]
+        first = min((cell[1] for cell in cells), default=_month_index(this_month))
+        window = _month_index(this_month) - first
+        matrix = np.zeros((len(keys), window))
+        if cells:
+            rows, columns, values = zip(*cells)
+            np.add.at(matrix, (np.array(rows), np.array(columns) - first), values)
+        mean = matrix.mean(axis=1) if window else np.zeros(len(keys))
+        variance = matrix.var(axis=1, ddof=1) if window > 1 else np.zeros(len(keys))
+
+        # Regras: ocorrências futuras no fluxo diário e seu equivalente mensal, para não contar em dobro.
+        flows = np.zeros((len(accounts), len(days)))
+        explained = np.zeros(len(keys))
+        rule_spend: Dict[int, float] = {}
+        occurrences: List[Tuple[int, int, float]] = []
+        for rule in rules:
+            amount = float(signed_amount(rule.type, rule.amount))
+            due, _ = due_occurrences(rule, end, limit=len(days) + MAX_OCCURRENCES_PER_RULE)
+            occurrences.extend((index[rule.account_id], max(0, (day - today).days), amount) for day in due)
+            monthly = amount * OCCURRENCES_PER_MONTH[rule.pattern] / rule.interval
+            if monthly < 0:
+                rule_spend[category(rule.category_id)] = rule_spend.get(category(rule.category_id), 0.0) - monthly
+            key = keys.get((rule.account_id, category(rule.category_id)))
+            if key is not None:
+                # Só a parte da janela em que a regra já existia está no histórico.
+                active_from = max(_month_index(rule.start_date) if rule.start_date else first, first)
+                explained[key] += monthly * min(window, max(0, _month_index(this_month) - active_from)) / window
+        if occurrences:
+            owners, offsets, amounts = zip(*occurrences)
+            np.add.at(flows, (np.array(owners), np.array(offsets)), amounts)
+        variable = mean - explained
+        # O que as regras explicam não inverte o sinal da categoria: no máximo zera o variável.
+        variable = np.where(mean < 0, np.minimum(variable, 0), np.maximum(variable, 0))
+
+        # Orçamentos: fator por (conta, categoria) e mês que reduz o gasto variável ao limite.
+        factors = np.ones((len(keys), n_months))
+        limits: Dict[int, np.ndarray] = {}
+        for budget in budgets:
+            offset = max(0, _month_index(budget.month) - _month_index(this_month))
+            limits.setdefault(budget.category_id, np.full(n_months, np.nan))[offset:] = float(budget.limit_amount)
+        key_categories = np.array([category_id for _, category_id in keys], dtype=int)
+        # Subcategorias antes das categorias-pai: o limite do pai vale sobre o já limitado.
+        for category_id, limit in sorted(limits.items(), key=lambda item: len(tree.subtree(item[0]))):
+            subtree = tree.subtree(category_id)
+            members = np.isin(key_categories, list(subtree)) & (variable < 0)
+            if not members.any():
+                continue
+            spend = -(variable[members, None] * factors[members]).sum(axis=0)
+            allowed = np.maximum(limit - sum(rule_spend.get(member, 0.0) for member in subtree), 0)
+            factors[members] *= np.where(np.isnan(limit) | (spend <= allowed), 1.0, allowed / spend)
+
+        owner = np.array([index[account_id] for account_id, _ in keys], dtype=int)
+        monthly = np.zeros((len(accounts), n_months))
+        np.add.at(monthly, owner, variable[:, None] * factors)
+        monthly_variance = np.zeros((len(accounts), n_months))
+        np.add.at(monthly_variance, owner, variance[:, None] * factors ** 2)
+        daily = monthly[:, month_of_day] / days_in_month
+        daily_variance = monthly_variance[:, month_of_day] / days_in_month
+        # O dia de hoje já está em andamento: o variável começa amanhã.
+        daily[:, 0] = 0
+        daily_variance[:, 0] = 0
+        current = [account.initial_balance + net.get(account.id, 0) for account in accounts]
+        balance = np.array([float(value) for value in current])[:, None] + np.cumsum(daily + flows, axis=1)
+        spread = BAND_Z * np.sqrt(np.cumsum(daily_variance, axis=1))
+
+        dates = [today + timedelta(days=offset) for offset in range(len(days))]
+        return [
+            {'account_id': account.id, 'name': account.name, 'current_balance': current[i], 'points': [{'date': day, 'balance': _money(b), 'low': _money(b - s), 'high': _money(b + s)} for day, b, s in zip(dates, balance[i].tolist(), spread[i].tolist())]}
+            for i, account in enumerate(accounts)
+        ]
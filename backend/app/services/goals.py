@@ -0,0 +1,89 @@
+import math
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from ..schemas.goal import GoalCreate, GoalRead, GoalUpdate
+from ..repositories.goals import GoalRepository
+from ..core.cache import GOALS, get_response_cache
+from .recurring import add_months
+
+# Meses completos mais recentes usados no ritmo de contribuição.
+RATE_MONTHS = 3
+DAYS_PER_MONTH = Decimal('30.4375')
+CENTS = Decimal('0.01')
+
+def _month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+class GoalService:
+    def __init__(self, repo: GoalRepository, user_id: UUID):
+        self.repo = repo
+        self.user_id = user_id
+
+    async def list_goals(self, today: Optional[date] = None) -> List[GoalRead]:
+        return await self._progress(today or date.today())
+
+    async def get_goal(self, goal_id: int, today: Optional[date] = None) -> GoalRead | None:
+        goals = await self._progress(today or date.today(), goal_id)
+        return goals[0] if goals else None
+
+    async def missing_reference(self, obj_in: GoalCreate | GoalUpdate) -> Optional[str]:
+        """Mensagem de erro se algum vínculo aponta para conta ou categoria de outro usuário."""
+        account_ids = {link.account_id for link in obj_in.links if link.account_id is not None}
+        category_ids = {link.category_id for link in obj_in.links if link.category_id is not None}
+        accounts, categories = await self.repo.transactions.owned_references(self.user_id, account_ids, category_ids)
+        if account_ids - accounts:
+            return 'Account not found'
+        if category_ids - categories:
+            return 'Category not found'
+        return None
+
+    async def create_goal(self, obj_in: GoalCreate) -> GoalRead:
+        goal_id = await self.repo.create(self.user_id, obj_in, date.today())
+        await get_response_cache().bump(self.user_id, GOALS)
+        return await self.get_goal(goal_id)
+
+    async def update_goal(self, goal_id: int, obj_in: GoalUpdate) -> GoalRead | None:
+        if not await self.repo.update(self.user_id, goal_id, obj_in):
+            return None
+        await get_response_cache().bump(self.user_id, GOALS)
+        return await self.get_goal(goal_id)
+
+    async def delete_goal(self, goal_id: int) -> bool:
+        deleted = await self.repo.delete(self.user_id, goal_id)
+        if deleted:
+            await get_response_cache().bump(self.user_id, GOALS)
+        return deleted
+
+    async def _progress(self, today: date, goal_id: Optional[int] = None) -> List[GoalRead]:
+        this_month = today.replace(day=1)
+        rows = await self.repo.progress(self.user_id, add_months(this_month, -RATE_MONTHS, 1), this_month, goal_id)
+        links = await self.repo.links_for([row.id for row in rows])
+        return [self._to_read(row, links.get(row.id, []), today) for row in rows]
+
+    @staticmethod
+    def _to_read(row, links: List[Dict], today: date) -> GoalRead:
+        contributed = Decimal(row.contributed)
+        current = row.initial_amount + contributed
+        remaining = max(row.target_amount - current, Decimal('0.00'))
+        percent = (current * 100 / row.target_amount).quantize(CENTS) if row.target_amount else None
+        # Meses de hoje até o da data-alvo, contando os dois; com a data vencida, o restante é devido já.
+        months_left = max(1, _month_index(row.target_date) - _month_index(today) + 1)
+        # O ritmo só usa meses completos desde o início da meta: o mês corrente ainda está em andamento.
+        rate_months = min(RATE_MONTHS, max(0, _month_index(today) - _month_index(row.start_date)))
+        monthly_rate = (Decimal(row.recent) / rate_months).quantize(CENTS) if rate_months else Decimal('0.00')
+        if not remaining:
+            projected = None
+        elif monthly_rate > 0:
+            projected = today + timedelta(days=math.ceil(remaining / monthly_rate * DAYS_PER_MONTH))
+        else:
+            projected = None
+        return GoalRead(
+            id=row.id, user_id=row.user_id, name=row.name, target_amount=row.target_amount, target_date=row.target_date,
+            initial_amount=row.initial_amount, start_date=row.start_date, links=links, created_at=row.created_at, updated_at=row.updated_at,
+            contributed=contributed.quantize(CENTS), current_amount=current.quantize(CENTS), remaining=remaining.quantize(CENTS), percent=percent,
+            monthly_rate=monthly_rate, required_monthly=(remaining / months_left).quantize(CENTS), projected_completion=projected,
+            on_track=not remaining or (projected is not None and projected <= row.target_date),
+        )
@@ -0,0 +1,222 @@
+
+import codecs
+import csv
+import hashlib
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from fastapi import UploadFile
+from pydantic import ValidationError
+
+from ..schemas.imports import ImportLineError, ImportResult
+from ..schemas.transaction import TransactionCreate
+from ..repositories.transactions import TransactionRepository
+from ..core.cache import TRANSACTIONS, get_response_cache
+
+READ_SIZE = 64 * 1024
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+async def iter_lines(upload: UploadFile, encoding: str = 'utf-8') -> AsyncIterator[str]:
+    """Lê o upload em blocos e entrega linhas decodificadas, sem carregar o arquivo inteiro."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    pending = ''
+    while True:
+        block = await upload.read(READ_SIZE)
+        pending += decoder.decode(block, final=not block)
+        lines = pending.splitlines(keepends=True)
+        # Um '\r' no fim do bloco pode ser a metade de um '\r\n': essa linha espera o próximo bloco.
+        if lines and (not lines[-1].endswith(('\n', '\r')) or (block and lines[-1].endswith('\r'))):
+            pending = lines.pop()
+        else:
+            pending = ''
+        for line in lines:
+            yield line
+        if not block:
+            break
+    if pending:
+        yield pending
+
+async def iter_csv_records(lines: AsyncIterator[str], delimiter: Optional[str] = None) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+    """Gera (número da linha, registro) a partir do cabeçalho; suporta campos entre aspas com quebras de linha."""
+    header: Optional[List[str]] = None
+    record = ''
+    line_no = 0
+    start = 1
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start = line_no
+        record += line
+        # Registro incompleto enquanto houver aspas abertas.
+        if record.count('"') % 2:
+            continue
+        text, record = record, ''
+        if not text.strip():
+            continue
+        if header is None:
+            text = text.lstrip('\ufeff')
+            delimiter = delimiter or (';' if text.count(';') > text.count(',') else ',')
+            header = [h.strip().lower() for h in next(csv.reader([text], delimiter=delimiter))]
+            continue
+        values = next(csv.reader([text], delimiter=delimiter))
+        yield start, dict(zip(header, (v.strip() for v in values)))
+
+async def iter_ofx_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+    """Extrai os blocos <STMTTRN> de um OFX (SGML ou XML) linha a linha."""
+    current: Optional[Dict[str, str]] = None
+    line_no = 0
+    start = 0
+    async for line in lines:
+        line_no += 1
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield start, current
+                    current = None
+                elif not closing:
+                    current, start = {}, line_no
+            elif current is not None and not closing and value.strip():
+                current[tag.lower()] = value.strip()
+
+def parse_amount(raw: str) -> Decimal:
+    value = raw.replace('R$', '').replace(' ', '')
+    if ',' in value and '.' in value:
+        # Formato brasileiro: 1.234,56
+        value = value.replace('.', '').replace(',', '.') if value.rfind(',') > value.rfind('.') else value.replace(',', '')
+    elif ',' in value:
+        value = value.replace(',', '.')
+    try:
+        return Decimal(value)
+    except InvalidOperation as exc:
+        raise ValueError(f'invalid amount {raw!r}') from exc
+
+def parse_date(raw: str) -> date:
+    value = raw.strip()
+    for fmt, size in (('%Y-%m-%d', 10), ('%d/%m/%Y', 10), ('%Y%m%d', 8)):
+        try:
+            return datetime.strptime(value[:size], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'invalid date {raw!r}')
+
+def csv_to_transaction(account_id: int, record: Dict[str, str]) -> TransactionCreate:
+    amount = parse_amount(record.get('amount') or record.get('valor') or '')
+    type_ = (record.get('type') or record.get('tipo') or '').lower() or ('expense' if amount < 0 else 'income')
+    category = record.get('category_id')
+    return TransactionCreate(account_id=account_id, type=type_, amount=abs(amount), date=parse_date(record.get('date') or record.get('data') or ''), description=record.get('description') or record.get('descricao') or record.get('descrição') or None, merchant=record.get('merchant') or None, category_id=int(category) if category else None)
+
+def ofx_to_transaction(account_id: int, record: Dict[str, str]) -> TransactionCreate:
+    amount = parse_amount(record.get('trnamt', ''))
+    description = record.get('memo') or record.get('name')
+    return TransactionCreate(account_id=account_id, type='expense' if amount < 0 else 'income', amount=abs(amount), date=parse_date(record.get('dtposted', '')), description=description, merchant=record.get('name'))
+
+def iter_statement(upload: UploadFile, fmt: str) -> Tuple[AsyncIterator[Tuple[int, Dict[str, str]]], Callable[[int, Dict[str, str]], TransactionCreate]]:
+    """Registros do extrato no formato `fmt` e a função que converte cada um em transação."""
+    lines = iter_lines(upload)
+    if fmt == 'ofx':
+        return iter_ofx_records(lines), ofx_to_transaction
+    return iter_csv_records(lines), csv_to_transaction
+
+class ImportService:
+    def __init__(self, repo: TransactionRepository, user_id: UUID):
+        self.repo = repo
+        self.user_id = user_id
+
+    @staticmethod
+    def import_hash(obj: TransactionCreate, occurrence: int) -> str:
+        """Chave de deduplicação por (conta, data, valor, descrição).
+
+        `occurrence` distingue linhas idênticas no mesmo dia (ex.: dois cafés iguais), mantendo a
+        reimportação do mesmo extrato idempotente.
+        """
+        description = ' '.join((obj.description or '').lower().split())
+        key = f'{obj.account_id}|{obj.date.isoformat()}|{obj.amount.quantize(Decimal("0.01"))}|{description}|{occurrence}'
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    async def import_statement(self, upload: UploadFile, account_id: int, fmt: str) -> ImportResult:
+        result = ImportResult()
+        records, convert = iter_statement(upload, fmt)
+        chunk: List[Tuple[int, TransactionCreate, str]] = []
+        # A n-ésima linha idêntica do mesmo dia recebe sempre o mesmo hash, em qualquer ordem de linhas.
+        # Extratos vêm agrupados por data: só o dia corrente é contado, e a memória fica limitada às
+        # linhas de um dia (mais o conjunto de dias vistos). Um dia que volta depois de deixado para trás
+        # denuncia um arquivo fora de ordem: recontamos o início do arquivo uma vez e, daí em diante, as
+        # ocorrências de todos os dias ficam guardadas (um hash de 64 caracteres por linha distinta).
+        occurrences: Dict[str, int] = {}
+        days: Set[date] = set()
+        day: Optional[date] = None
+        unordered = False
+        async for line_no, record in records:
+            try:
+                obj = convert(account_id, record)
+            except (ValueError, ValidationError) as exc:
+                self._error(result, line_no, str(exc).splitlines()[0])
+                continue
+            if not unordered and obj.date != day:
+                if obj.date in days:
+                    occurrences = await self._count_before(upload, account_id, fmt, line_no)
+                    unordered = True
+                else:
+                    occurrences.clear()
+                    days.add(obj.date)
+                    day = obj.date
+            base = self.import_hash(obj, 0)
+            occurrence = occurrences.get(base, 0)
+            occurrences[base] = occurrence + 1
+            chunk.append((line_no, obj, base if occurrence == 0 else self.import_hash(obj, occurrence)))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await self._flush(result, chunk)
+                chunk = []
+        await self._flush(result, chunk)
+        return result
+
+    async def _count_before(self, upload: UploadFile, account_id: int, fmt: str, line_no: int) -> Dict[str, int]:
+        """Ocorrências de cada hash base nas linhas anteriores a `line_no`, relendo o upload do início."""
+        position = upload.file.tell()
+        await upload.seek(0)
+        counts: Dict[str, int] = {}
+        records, convert = iter_statement(upload, fmt)
+        async for record_line, record in records:
+            if record_line >= line_no:
+                break
+            try:
+                base = self.import_hash(convert(account_id, record), 0)
+            except (ValueError, ValidationError):
+                continue
+            counts[base] = counts.get(base, 0) + 1
+        await records.aclose()
+        # O leitor principal continua de onde parou.
+        await upload.seek(position)
+        return counts
+
+    async def _flush(self, result: ImportResult, chunk: List[Tuple[int, TransactionCreate, str]]) -> None:
+        """Grava um lote em sua própria transação; um arquivo grande nunca vira uma transação gigante."""
+        if not chunk:
+            return
+        category_ids = {obj.category_id for _, obj, _ in chunk if obj.category_id is not None}
+        _, categories = await self.repo.owned_references(self.user_id, set(), category_ids)
+        items = []
+        for line_no, obj, import_hash in chunk:
+            if obj.category_id is not None and obj.category_id not in categories:
+                self._error(result, line_no, 'Category not found')
+            else:
+                items.append((obj, import_hash))
+        inserted = await self.repo.import_chunk(self.user_id, items)
+        if inserted:
+            # Cada lote já está commitado: invalida a cada lote, não só no fim do arquivo.
+            await get_response_cache().bump(self.user_id, TRANSACTIONS)
+        result.imported += inserted
+        result.duplicates += len(items) - inserted
+
+    @staticmethod
+    def _error(result: ImportResult, line_no: int, detail: str) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(ImportLineError(line=line_no, detail=detail))
@@ -0,0 +1,58 @@
+
+import calendar
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from ..core.cache import TRANSACTIONS, get_response_cache
+from ..models.recurring_rule import RecurringRule
+from ..repositories.recurring import RecurringRuleRepository, occurrence_hash
+
+RECURRING_BATCH_SIZE = 1000
+# Limite de ocorrências geradas por regra a cada lote; o restante fica para o próximo lote.
+MAX_OCCURRENCES_PER_RULE = 400
+
+def add_months(day: date, months: int, anchor_day: int) -> date:
+    """Soma meses mantendo o dia de referência, limitado ao último dia do mês (31/01 + 1 mês = 28/02)."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(anchor_day, calendar.monthrange(year, month + 1)[1]))
+
+def next_occurrence(pattern: str, interval: int, current: date, anchor_day: int) -> date:
+    if pattern == 'daily':
+        return current + timedelta(days=interval)
+    if pattern == 'weekly':
+        return current + timedelta(weeks=interval)
+    if pattern == 'monthly':
+        return add_months(current, interval, anchor_day)
+    if pattern == 'yearly':
+        return add_months(current, 12 * interval, anchor_day)
+    raise ValueError(f'Unknown recurrence pattern: {pattern}')
+
+def due_occurrences(rule: RecurringRule, today: date, limit: int = MAX_OCCURRENCES_PER_RULE) -> Tuple[List[date], date]:
+    """Ocorrências vencidas (até hoje e até `end_date`) e o novo `next_run`."""
+    anchor_day = (rule.start_date or rule.next_run).day
+    until = min(today, rule.end_date) if rule.end_date else today
+    days: List[date] = []
+    current = rule.next_run
+    while current <= until and len(days) < limit:
+        days.append(current)
+        current = next_occurrence(rule.pattern, rule.interval, current, anchor_day)
+    return days, current
+
+class RecurringService:
+    """Materializa regras recorrentes em transações; roda no scheduler, fora do contexto de um usuário."""
+
+    def __init__(self, repo: RecurringRuleRepository):
+        self.repo = repo
+
+    async def run_batch(self, today: date, batch_size: int = RECURRING_BATCH_SIZE) -> Tuple[int, int]:
+        """Processa um lote de regras numa única transação. Retorna (regras, transações inseridas)."""
+        rules = await self.repo.lock_due(today, batch_size)
+        rows: List[dict] = []
+        next_runs: Dict[int, date] = {}
+        for rule in rules:
+            days, next_runs[rule.id] = due_occurrences(rule, today)
+            rows.extend({'user_id': rule.user_id, 'account_id': rule.account_id, 'category_id': rule.category_id, 'type': rule.type, 'amount': rule.amount, 'date': day, 'description': rule.description, 'merchant': rule.merchant, 'import_hash': occurrence_hash(rule.id, day)} for day in days)
+        inserted = await self.repo.materialize(rows, next_runs)
+        await get_response_cache().bump_users({txn.user_id for txn in inserted}, TRANSACTIONS)
+        return len(rules), len(inserted)
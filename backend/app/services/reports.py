@@ -0,0 +1,31 @@
+
+from uuid import UUID
+from typing import List, Optional
+from datetime import date
+from ..schemas.report import TypeTotal, CategoryTotal, PeriodTotal, TagTotal
+from ..repositories.reports import ReportRepository
+
+class ReportService:
+    def __init__(self, repo: ReportRepository, user_id: UUID):
+        self.repo = repo
+        self.user_id = user_id
+
+    async def summary(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[TypeTotal]:
+        rows = await self.repo.totals_by_type(self.user_id, start_date, end_date, account_id, category_id)
+        return [TypeTotal(type=r.type, total=r.total, count=r.count) for r in rows]
+
+    async def by_category(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[CategoryTotal]:
+        rows = await self.repo.totals_by_category(self.user_id, start_date, end_date, account_id, category_id)
+        return [CategoryTotal(category_id=r.category_id, category_name=r.category_name, type=r.type, total=r.total, count=r.count) for r in rows]
+
+    async def by_tag(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[TagTotal]:
+        rows = await self.repo.totals_by_tag(self.user_id, start_date, end_date, account_id, category_id)
+        return [TagTotal(tag_id=r.tag_id, tag_name=r.tag_name, type=r.type, total=r.total, count=r.count) for r in rows]
+
+    async def by_month(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[PeriodTotal]:
+        rows = await self.repo.totals_by_month(self.user_id, start_date, end_date, account_id, category_id)
+        return [PeriodTotal(period=date(int(r.year), int(r.month), 1), type=r.type, total=r.total, count=r.count) for r in rows]
+
+    async def by_day(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[PeriodTotal]:
+        rows = await self.repo.totals_by_day(self.user_id, start_date, end_date, account_id, category_id)
+        return [PeriodTotal(period=r.date, type=r.type, total=r.total, count=r.count) for r in rows]
@@ -1,18 +1,72 @@
 
 from uuid import UUID
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from datetime import date
-from ..schemas.transaction import TransactionCreate, TransactionUpdate, TransactionRead
+from ..core.pagination import DEFAULT_PAGE_SIZE, decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+from ..schemas.transaction import TransactionCreate, TransactionUpdate, TransactionRead, TransactionPage, TransactionBulkUpdateItem, TransactionBulkResult, TransactionBulkDeleteResult, BulkItemError
 from ..repositories.transactions import TransactionRepository
+from ..core.cache import TRANSACTIONS, get_response_cache
+from ..core.responses import weak_etag
+
+ItemT = TypeVar('ItemT', bound=BaseModel)
+
+_READ_LIST = TypeAdapter(List[TransactionRead])
+
+def _validate_items(model: Type[ItemT], raw_items: Sequence[Any]) -> Tuple[List[Tuple[int, ItemT]], List[BulkItemError]]:
+    valid: List[Tuple[int, ItemT]] = []
+    errors: List[BulkItemError] = []
+    for index, raw in enumerate(raw_items):
+        try:
+            valid.append((index, model.model_validate(raw)))
+        except ValidationError as exc:
+            detail = '; '.join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+            errors.append(BulkItemError(index=index, detail=detail))
+    return valid, errors
+
+def _normalize_query(q: Optional[str]) -> Optional[str]:
+    return ' '.join((q or '').split()) or None
+
+def _decode_after(cursor: Optional[str], q: Optional[str]) -> Optional[Tuple]:
+    # Na busca a ordem é por relevância, então o cursor carrega também o rank da última linha.
+    if not cursor:
+        return None
+    return decode_search_cursor(cursor) if q else decode_cursor(cursor)
 
 class TransactionService:
     def __init__(self, repo: TransactionRepository, user_id: UUID):
         self.repo = repo
         self.user_id = user_id
 
-    async def list_transactions(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None) -> List[TransactionRead]:
-        txns = await self.repo.list(self.user_id, start_date, end_date, account_id, category_id)
-        return [TransactionRead.model_validate(t) for t in txns]
+    async def list_transactions(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, include_subcategories: bool = False, q: Optional[str] = None, tag: Optional[str] = None) -> TransactionPage:
+        q = _normalize_query(q)
+        after = _decode_after(cursor, q)
+        # Busca uma linha a mais para saber se existe próxima página sem um COUNT.
+        rows = await self.repo.list(self.user_id, start_date, end_date, account_id, category_id, limit=limit + 1, after=after, include_subcategories=include_subcategories, q=q, tag=tag)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_search_cursor(last['rank'], last['date'], last['id']) if q else encode_cursor(last['date'], last['id'])
+        return TransactionPage(items=_READ_LIST.validate_python(rows), next_cursor=next_cursor)
+
+    def check_cursor(self, cursor: Optional[str], q: Optional[str] = None) -> None:
+        """Lança ValueError se o cursor não decodifica para o tipo de listagem (busca ou não)."""
+        _decode_after(cursor, _normalize_query(q))
+
+    async def list_etag(self) -> str:
+        # Muda com qualquer escrita nas transações do usuário, qualquer que seja o filtro; o ETag vale por URL.
+        return weak_etag('transactions', *await self.repo.fingerprint(self.user_id))
+
+    def stream_transactions(self, start_date: Optional[date] = None, end_date: Optional[date] = None, account_id: Optional[int] = None, category_id: Optional[int] = None, cursor: Optional[str] = None, include_subcategories: bool = False, q: Optional[str] = None, tag: Optional[str] = None) -> AsyncIterator[TransactionRead]:
+        # O cursor é validado antes de devolver o iterador, para que erros virem 400 e não um stream interrompido.
+        q = _normalize_query(q)
+        after = _decode_after(cursor, q)
+        return self._stream(self.repo.stream(self.user_id, start_date, end_date, account_id, category_id, after=after, include_subcategories=include_subcategories, q=q, tag=tag))
+
+    async def _stream(self, rows: AsyncIterator) -> AsyncIterator[TransactionRead]:
+        async for row in rows:
+            yield TransactionRead.model_validate(row)
 
     async def get_transaction(self, transaction_id: int) -> TransactionRead | None:
         txn = await self.repo.get(self.user_id, transaction_id)
@@ -22,13 +76,64 @@ class TransactionService:
 
     async def create_transaction(self, obj_in: TransactionCreate) -> TransactionRead:
         txn = await self.repo.create(self.user_id, obj_in)
+        await get_response_cache().bump(self.user_id, TRANSACTIONS)
         return TransactionRead.model_validate(txn)
 
     async def update_transaction(self, transaction_id: int, obj_in: TransactionUpdate) -> TransactionRead | None:
         txn = await self.repo.update(self.user_id, transaction_id, obj_in)
         if not txn:
             return None
+        await get_response_cache().bump(self.user_id, TRANSACTIONS)
         return TransactionRead.model_validate(txn)
 
     async def delete_transaction(self, transaction_id: int) -> bool:
-        return await self.repo.delete(self.user_id, transaction_id)
+        deleted = await self.repo.delete(self.user_id, transaction_id)
+        if deleted:
+            await get_response_cache().bump(self.user_id, TRANSACTIONS)
+        return deleted
+
+    async def _check_references(self, items: List[Tuple[int, TransactionCreate]], errors: List[BulkItemError]) -> List[Tuple[int, TransactionCreate]]:
+        accounts, categories = await self.repo.owned_references(self.user_id, {o.account_id for _, o in items}, {o.category_id for _, o in items if o.category_id is not None})
+        valid = []
+        for index, obj in items:
+            if obj.account_id not in accounts:
+                errors.append(BulkItemError(index=index, detail='Account not found'))
+            elif obj.category_id is not None and obj.category_id not in categories:
+                errors.append(BulkItemError(index=index, detail='Category not found'))
+            else:
+                valid.append((index, obj))
+        return valid
+
+    async def bulk_create(self, raw_items: Sequence[Any]) -> TransactionBulkResult:
+        items, errors = _validate_items(TransactionCreate, raw_items)
+        items = await self._check_references(items, errors)
+        txns = await self.repo.bulk_create(self.user_id, [obj for _, obj in items])
+        if txns:
+            await get_response_cache().bump(self.user_id, TRANSACTIONS)
+        return TransactionBulkResult(items=[TransactionRead.model_validate(t) for t in txns], errors=sorted(errors, key=lambda e: e.index))
+
+    async def bulk_update(self, raw_items: Sequence[Any]) -> TransactionBulkResult:
+        items, errors = _validate_items(TransactionBulkUpdateItem, raw_items)
+        seen: Dict[int, int] = {}
+        unique = []
+        for index, obj in items:
+            if obj.id in seen:
+                errors.append(BulkItemError(index=index, detail=f'Duplicate id (item {seen[obj.id]})'))
+            else:
+                seen[obj.id] = index
+                unique.append((index, obj))
+        unique = await self._check_references(unique, errors)
+        changes = {obj.id: TransactionUpdate.model_validate(obj.model_dump(exclude={'id'}, exclude_unset=True)) for _, obj in unique}
+        txns = await self.repo.bulk_update(self.user_id, changes)
+        if txns:
+            await get_response_cache().bump(self.user_id, TRANSACTIONS)
+        found = {t.id for t in txns}
+        errors.extend(BulkItemError(index=index, detail='Transaction not found') for index, obj in unique if obj.id not in found)
+        return TransactionBulkResult(items=[TransactionRead.model_validate(t) for t in txns], errors=sorted(errors, key=lambda e: e.index))
+
+    async def bulk_delete(self, transaction_ids: List[int]) -> TransactionBulkDeleteResult:
+        deleted = set(await self.repo.bulk_delete(self.user_id, transaction_ids))
+        if deleted:
+            await get_response_cache().bump(self.user_id, TRANSACTIONS)
+        errors = [BulkItemError(index=index, detail='Transaction not found') for index, tid in enumerate(transaction_ids) if tid not in deleted]
+        return TransactionBulkDeleteResult(deleted=sorted(deleted), errors=errors)
@@ -1,12 +1,67 @@
 
+import logging
+from datetime import date, datetime
+from typing import List
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from ..core.config import get_settings
+from ..db.partitions import ensure_partitions, next_period, period_start
+from ..db.session import async_session, engine
+from ..repositories.recurring import RecurringRuleRepository
+from ..services.recurring import RecurringService
+
+logger = logging.getLogger(__name__)
+
 scheduler = AsyncIOScheduler()
 
-def example_job():
-    print('Running scheduled job...')
+async def materialize_recurring_job(today: date | None = None) -> int:
+    """Gera as transações de todas as regras vencidas, um lote (e uma transação) por vez.
 
-# scheduler.add_job(example_job, 'interval', hours=24)
+    Seguro com várias réplicas rodando ao mesmo tempo: cada lote trava suas regras com
+    FOR UPDATE SKIP LOCKED e as ocorrências têm chave única por (regra, data).
+    """
+    settings = get_settings()
+    today = today or date.today()
+    rules = inserted = 0
+    while True:
+        async with async_session() as session:
+            batch_rules, batch_inserted = await RecurringService(RecurringRuleRepository(session)).run_batch(today, settings.recurring_batch_size)
+        if not batch_rules:
+            break
+        rules += batch_rules
+        inserted += batch_inserted
+    logger.info('Recurring rules processed: %d rules, %d transactions', rules, inserted)
+    return inserted
+
+async def create_partitions_job(today: date | None = None) -> List[str]:
+    """Cria as partições de `transactions` do período atual e dos TRANSACTION_PARTITIONS_AHEAD seguintes.
+
+    Datas sem partição caem na DEFAULT e são movidas quando a partição delas é criada; no SQLite não faz nada.
+    """
+    if engine.dialect.name != 'postgresql':
+        return []
+    settings = get_settings()
+    interval = settings.transaction_partition_interval
+    start = period_start(today or date.today(), interval)
+    end = start
+    for _ in range(settings.transaction_partitions_ahead):
+        end = next_period(end, interval)
+    async with engine.begin() as conn:
+        created = await conn.run_sync(ensure_partitions, start, end, interval)
+    if created:
+        logger.info('Transaction partitions created: %s', ', '.join(created))
+    return created
 
 async def start_scheduler():
+    settings = get_settings()
+    if settings.recurring_interval_minutes > 0:
+        # max_instances=1 e coalesce evitam execuções sobrepostas na mesma réplica.
+        scheduler.add_job(materialize_recurring_job, 'interval', minutes=settings.recurring_interval_minutes, id='materialize_recurring', replace_existing=True, max_instances=1, coalesce=True, next_run_time=datetime.now())
+    if settings.transaction_partitions_ahead > 0:
+        scheduler.add_job(create_partitions_job, 'interval', hours=24, id='create_partitions', replace_existing=True, max_instances=1, coalesce=True, next_run_time=datetime.now())
     scheduler.start()
+
+async def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
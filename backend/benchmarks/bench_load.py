@@ -0,0 +1,339 @@
+"""Carga concorrente sobre todas as rotas da API, com razões sintéticos e comparação com um baseline.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.bench_load [--url URL] [--users N] [--max-transactions N] [--concurrency C]
+        [--requests N] [--output report.json] [--baseline ARQUIVO] [--tolerance 0.5] [--save-baseline]
+
+Sem `--url` usa um SQLite temporário; para Postgres passe a URL de um banco descartável (o schema é
+recriado). A aplicação roda no mesmo processo via `httpx.ASGITransport`, com a autenticação trocada
+por um cabeçalho `X-Bench-User`; o resto da pilha (rotas, serviços, cache, pool, instrumentação) é o
+de produção. O relatório JSON traz p50/p95/p99, vazão e o pico de RSS por cenário; com `--baseline`
+o processo termina com código 1 se algum cenário regredir além de `--tolerance`.
+
+Exemplo em escala (milhares de usuários, até 500k transações no maior):
+
+    python -m benchmarks.bench_load --url postgresql+asyncpg://localhost/bench --users 2000 --max-transactions 500000 --requests 50000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .ledger import END_DATE, Ledger, UserLedger, seed
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'bench_load_sqlite.json')
+# Parâmetros que precisam coincidir para que dois relatórios sejam comparáveis.
+COMPARABLE = ('dialect', 'users', 'max_transactions', 'concurrency', 'cache_backend')
+# Diferenças de latência abaixo disto são ruído de agendamento, não regressão.
+MIN_DELTA_MS = 2.0
+# Amostras mínimas no baseline para comparar o p50 e o p95 de um cenário.
+MIN_SAMPLES = 20
+MIN_SAMPLES_P95 = 100
+
+Request = Callable[[], Awaitable[httpx.Response]]
+Scenario = Callable[[httpx.AsyncClient, UserLedger, random.Random], Awaitable[Request]]
+
+def _headers(user: UserLedger, **extra: str) -> Dict[str, str]:
+    return {'X-Bench-User': str(user.id), **extra}
+
+def _get(path: str, **params: Any) -> Scenario:
+    async def scenario(client: httpx.AsyncClient, user: UserLedger, rnd: random.Random) -> Request:
+        return lambda: client.get(path, params=params, headers=_headers(user))
+    return scenario
+
+def _month(rnd: random.Random, user: UserLedger) -> date:
+    months = max(1, (END_DATE - user.first_date).days // 30)
+    return (END_DATE - timedelta(days=30 * rnd.randrange(months))).replace(day=1)
+
+def _transaction_body(user: UserLedger, rnd: random.Random) -> Dict[str, Any]:
+    return {'account_id': user.account_ids[0], 'category_id': user.category_ids['Mercado'], 'type': 'expense', 'amount': f'{rnd.randint(100, 50000) / 100:.2f}', 'date': str(END_DATE - timedelta(days=rnd.randrange(60))), 'description': 'Compra no mercado', 'merchant': 'Supermercado Extra', 'tags': [rnd.choice(user.tags)]}
+
+async def _revalidate(client, user, rnd) -> Request:
+    # Segunda leitura com If-None-Match: mede o caminho do 304.
+    path = rnd.choice(('/api/v1/accounts/', '/api/v1/categories/', '/api/v1/transactions/'))
+    if path not in user.etags:
+        user.etags[path] = (await client.get(path, headers=_headers(user))).headers.get('etag', '')
+    return lambda: client.get(path, headers=_headers(user, **{'If-None-Match': user.etags[path]}))
+
+async def _transactions_page(client, user, rnd) -> Request:
+    params: Dict[str, Any] = {'limit': 50}
+    kind = rnd.random()
+    if kind < 0.3:
+        month = _month(rnd, user)
+        params.update(start_date=str(month), end_date=str(month + timedelta(days=31)))
+    elif kind < 0.5:
+        params.update(account_id=rnd.choice(user.account_ids))
+    elif kind < 0.7:
+        params.update(category_id=rnd.choice(user.parent_category_ids), include_subcategories='true')
+    elif kind < 0.8:
+        params.update(tag=rnd.choice(user.tags))
+    return lambda: client.get('/api/v1/transactions/', params=params, headers=_headers(user))
+
+async def _transactions_next_page(client, user, rnd) -> Request:
+    first = await client.get('/api/v1/transactions/', params={'limit': 50}, headers=_headers(user))
+    cursor = first.json().get('next_cursor')
+    return lambda: client.get('/api/v1/transactions/', params={'limit': 50, **({'cursor': cursor} if cursor else {})}, headers=_headers(user))
+
+async def _transactions_search(client, user, rnd) -> Request:
+    q = rnd.choice(('mercado', 'uber', 'padaria', 'ifood', 'aluguel', 'farm'))
+    return lambda: client.get('/api/v1/transactions/', params={'q': q, 'limit': 50}, headers=_headers(user))
+
+async def _transactions_stream(client, user, rnd) -> Request:
+    month = _month(rnd, user)
+    return lambda: client.get('/api/v1/transactions/', params={'stream': 'true', 'start_date': str(month), 'end_date': str(month + timedelta(days=31))}, headers=_headers(user))
+
+async def _transactions_export(client, user, rnd) -> Request:
+    month = _month(rnd, user)
+    return lambda: client.get('/api/v1/transactions/export', params={'start_date': str(month - timedelta(days=60)), 'end_date': str(month + timedelta(days=31))}, headers=_headers(user))
+
+async def _transaction_get(client, user, rnd) -> Request:
+    txn_id = user.first_transaction_id + rnd.randrange(user.transaction_count)
+    return lambda: client.get(f'/api/v1/transactions/{txn_id}', headers=_headers(user))
+
+async def _transaction_create(client, user, rnd) -> Request:
+    body = _transaction_body(user, rnd)
+
+    async def request() -> httpx.Response:
+        response = await client.post('/api/v1/transactions/', json=body, headers=_headers(user))
+        if response.status_code == 201:
+            user.created.append(response.json()['id'])
+        return response
+    return request
+
+async def _transaction_update(client, user, rnd) -> Request:
+    # O PUT substitui a transação inteira: parte da linha atual e muda só o valor e as tags.
+    txn_id = user.first_transaction_id + rnd.randrange(user.transaction_count)
+    current = (await client.get(f'/api/v1/transactions/{txn_id}', headers=_headers(user))).json()
+    body = {key: current[key] for key in ('account_id', 'category_id', 'type', 'date', 'description', 'merchant')}
+    body.update(amount=f'{rnd.randint(100, 50000) / 100:.2f}', tags=[rnd.choice(user.tags)])
+    return lambda: client.put(f'/api/v1/transactions/{txn_id}', json=body, headers=_headers(user))
+
+async def _transaction_delete(client, user, rnd) -> Request:
+    # Apaga só o que o próprio benchmark criou, para não encolher o razão semeado.
+    if not user.created:
+        created = await client.post('/api/v1/transactions/', json=_transaction_body(user, rnd), headers=_headers(user))
+        user.created.append(created.json()['id'])
+    txn_id = user.created.pop()
+    return lambda: client.delete(f'/api/v1/transactions/{txn_id}', headers=_headers(user))
+
+async def _transactions_bulk(client, user, rnd) -> Request:
+    body = [_transaction_body(user, rnd) for _ in range(20)]
+    return lambda: client.post('/api/v1/transactions/bulk', json=body, headers=_headers(user))
+
+async def _transactions_import(client, user, rnd) -> Request:
+    lines = ['date,amount,description'] + [f'{END_DATE - timedelta(days=rnd.randrange(30))},{-rnd.randint(100, 20000) / 100},Importado {rnd.getrandbits(32)}' for _ in range(50)]
+    files = {'file': ('extrato.csv', '\n'.join(lines).encode())}
+    return lambda: client.post('/api/v1/transactions/import', params={'account_id': user.account_ids[0]}, files=files, headers=_headers(user))
+
+async def _budget_status(client, user, rnd) -> Request:
+    return lambda: client.get('/api/v1/budgets/status', params={'month': str(END_DATE.replace(day=1))}, headers=_headers(user))
+
+async def _budgets(client, user, rnd) -> Request:
+    return lambda: client.get('/api/v1/budgets/', params={'month': str(END_DATE.replace(day=1))}, headers=_headers(user))
+
+async def _account_get(client, user, rnd) -> Request:
+    return lambda: client.get(f'/api/v1/accounts/{rnd.choice(user.account_ids)}', headers=_headers(user))
+
+async def _category_get(client, user, rnd) -> Request:
+    return lambda: client.get(f'/api/v1/categories/{rnd.choice(list(user.category_ids.values()))}', headers=_headers(user))
+
+async def _report(client, user, rnd) -> Request:
+    path = rnd.choice(('summary', 'by-category', 'by-tag', 'by-month'))
+    return lambda: client.get(f'/api/v1/reports/{path}', headers=_headers(user))
+
+async def _report_by_day(client, user, rnd) -> Request:
+    month = _month(rnd, user)
+    return lambda: client.get('/api/v1/reports/by-day', params={'start_date': str(month), 'end_date': str(month + timedelta(days=31))}, headers=_headers(user))
+
+async def _forecast(client, user, rnd) -> Request:
+    # Janela longa: o razão sintético termina em END_DATE, antes de hoje.
+    return lambda: client.get('/api/v1/forecast/', params={'months': rnd.choice((3, 6, 12)), 'history_months': 60}, headers=_headers(user))
+
+# Nome -> (cenário, peso). O mix imita o uso do app: muita leitura de listas e relatórios, algumas escritas.
+SCENARIOS: Dict[str, Tuple[Scenario, float]] = {
+    'accounts.list': (_get('/api/v1/accounts/'), 8),
+    'accounts.get': (_account_get, 2),
+    'categories.list': (_get('/api/v1/categories/'), 5),
+    'categories.get': (_category_get, 1),
+    'budgets.list': (_budgets, 3),
+    'budgets.status': (_budget_status, 5),
+    'transactions.list': (_transactions_page, 20),
+    'transactions.next_page': (_transactions_next_page, 5),
+    'transactions.search': (_transactions_search, 5),
+    'transactions.stream': (_transactions_stream, 1),
+    'transactions.export': (_transactions_export, 1),
+    'transactions.get': (_transaction_get, 4),
+    'transactions.create': (_transaction_create, 6),
+    'transactions.update': (_transaction_update, 3),
+    'transactions.delete': (_transaction_delete, 2),
+    'transactions.bulk': (_transactions_bulk, 1),
+    'transactions.import': (_transactions_import, 0.5),
+    'reports': (_report, 8),
+    'reports.by_day': (_report_by_day, 2),
+    'forecast': (_forecast, 2),
+    'revalidate': (_revalidate, 5),
+    'users.me': (_get('/api/v1/users/me'), 1),
+    'health': (_get('/health'), 0.5),
+    'metrics': (_get('/metrics'), 0.5),
+}
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if len(samples) < 2:
+        value = round(samples[0] * 1000, 3) if samples else 0.0
+        return {'p50_ms': value, 'p95_ms': value, 'p99_ms': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50_ms': round(cuts[49] * 1000, 3), 'p95_ms': round(cuts[94] * 1000, 3), 'p99_ms': round(cuts[98] * 1000, 3)}
+
+def peak_rss_mb() -> float:
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _bench_app():
+    """A aplicação real, com a autenticação trocada pelo cabeçalho X-Bench-User."""
+    from fastapi import Header
+    from app.api.deps import get_current_user
+    from app.main import app
+
+    async def bench_user(x_bench_user: str = Header(...)) -> dict:
+        return {'id': uuid.UUID(x_bench_user), 'email': 'bench@example.com'}
+
+    app.dependency_overrides[get_current_user] = bench_user
+    return app
+
+async def _load(client: httpx.AsyncClient, ledger: Ledger, requests: int, concurrency: int, seed_value: int) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][1] for name in names]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = requests
+
+    async def worker(index: int) -> None:
+        nonlocal remaining
+        rnd = random.Random(seed_value * 1000 + index)
+        while remaining > 0:
+            remaining -= 1
+            name = rnd.choices(names, weights)[0]
+            user = rnd.choice(ledger.users)
+            request = await SCENARIOS[name][0](client, user, rnd)
+            start = time.perf_counter()
+            response = await request()
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+async def run(url: str, users: int, max_transactions: int, requests: int, concurrency: int, warmup: int, seed_value: int) -> Dict[str, Any]:
+    # As Settings são lidas na importação de app.*: a URL do benchmark precisa estar no ambiente antes.
+    os.environ['DATABASE_URL'] = url
+    os.environ.setdefault('SUPABASE_JWKS_URL', 'http://bench.invalid/jwks.json')
+    os.environ.setdefault('SUPABASE_JWT_AUDIENCE', 'authenticated')
+    os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+    from app.core.config import get_settings
+    from app.db.session import engine
+
+    started = time.perf_counter()
+    ledger = await seed(engine, users, max_transactions, seed=seed_value, log=lambda msg: print(msg, file=sys.stderr))
+    seeded = time.perf_counter() - started
+    app = _bench_app()
+    try:
+        # Exceções da aplicação viram 500 e entram na contagem de erros, em vez de derrubar a rodada.
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url='http://bench', timeout=None) as client:
+            if warmup:
+                await _load(client, ledger, warmup, concurrency, seed_value + 1)
+            latencies, errors, elapsed = await _load(client, ledger, requests, concurrency, seed_value)
+    finally:
+        await engine.dispose()
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'meta': {'dialect': engine.dialect.name, 'users': users, 'max_transactions': max_transactions, 'transactions': ledger.transaction_count, 'concurrency': concurrency, 'requests': requests, 'warmup': warmup, 'seed': seed_value, 'cache_backend': get_settings().cache_backend, 'python': platform.python_version(), 'machine': platform.machine(), 'seed_seconds': round(seeded, 2)},
+        'totals': {'requests': len(every), 'errors': sum(errors.values()), 'duration_s': round(elapsed, 3), 'throughput_rps': round(len(every) / elapsed, 1), **percentiles(every), 'peak_rss_mb': peak_rss_mb()},
+        'scenarios': {name: {'requests': len(samples), 'errors': errors.get(name, 0), 'throughput_rps': round(len(samples) / elapsed, 2), **percentiles(samples)} for name, samples in sorted(latencies.items())},
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressões do relatório frente ao baseline: vazão total abaixo de (1 - tolerance), RSS, p95 total e
+    latência por cenário acima de (1 + tolerance), e qualquer erro HTTP.
+
+    Por cenário compara-se o p50, e o p95 só com amostras suficientes no baseline: com poucas dezenas
+    de requisições o p95 é decidido por uma ou duas amostras e varia mais que a tolerância entre rodadas.
+    """
+    mismatched = [key for key in COMPARABLE if report['meta'].get(key) != baseline['meta'].get(key)]
+    if mismatched:
+        return [f'baseline not comparable: {key} is {report["meta"].get(key)!r}, baseline has {baseline["meta"].get(key)!r}' for key in mismatched]
+    problems = []
+    totals, base_totals = report['totals'], baseline['totals']
+    if totals['throughput_rps'] < base_totals['throughput_rps'] * (1 - tolerance):
+        problems.append(f'throughput {totals["throughput_rps"]} rps < baseline {base_totals["throughput_rps"]} rps')
+    if totals['peak_rss_mb'] > base_totals['peak_rss_mb'] * (1 + tolerance):
+        problems.append(f'peak RSS {totals["peak_rss_mb"]} MB > baseline {base_totals["peak_rss_mb"]} MB')
+
+    def slower(name: str, key: str, current: Dict[str, Any], base: Dict[str, Any]) -> None:
+        if current[key] > base[key] * (1 + tolerance) and current[key] - base[key] > MIN_DELTA_MS:
+            problems.append(f'{name}: {key[:3]} {current[key]} ms > baseline {base[key]} ms')
+
+    slower('total', 'p95_ms', totals, base_totals)
+    for name, base in baseline['scenarios'].items():
+        current = report['scenarios'].get(name)
+        if current is None or base['requests'] < MIN_SAMPLES:
+            continue
+        slower(name, 'p50_ms', current, base)
+        if base['requests'] >= MIN_SAMPLES_P95:
+            slower(name, 'p95_ms', current, base)
+    problems.extend(f'{name}: {current["errors"]} HTTP errors' for name, current in report['scenarios'].items() if current['errors'])
+    return problems
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None, help='URL do banco (o schema é recriado); padrão: SQLite temporário')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--max-transactions', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=None, help='requisições simultâneas; padrão: 16, ou 4 no SQLite')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='grava o relatório JSON neste arquivo (além de imprimir)')
+    parser.add_argument('--baseline', help=f'compara com este relatório (ex.: {os.path.relpath(DEFAULT_BASELINE)})')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='folga relativa antes de acusar regressão (padrão 0.5: latência de relógio em máquina compartilhada varia ~25%% entre rodadas)')
+    parser.add_argument('--save-baseline', action='store_true', help='grava o relatório como baseline em --baseline')
+    args = parser.parse_args()
+    url = args.url or 'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_load.db')
+    # O SQLite tem um único escritor: com muitas escritas simultâneas as esperas passam do timeout
+    # de lock e viram 500 ("database is locked"), o que mede o SQLite e não a aplicação.
+    concurrency = args.concurrency or (4 if url.startswith('sqlite') else 16)
+    report = asyncio.run(run(url, args.users, args.max_transactions, args.requests, concurrency, args.warmup, args.seed))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            fh.write(text + '\n')
+    elif args.baseline:
+        with open(args.baseline) as fh:
+            problems = compare(report, json.load(fh), args.tolerance)
+        for problem in problems:
+            print(f'REGRESSION {problem}', file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+
+"""Custo de serialização das listagens: ORM + model_validate + response_model vs. tuplas + TypeAdapter + orjson.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.bench_serialization [--url URL] [--rows N] [--repeat R]
+
+Sem `--url` usa um SQLite temporário (nunca o `DATABASE_URL` do ambiente); com `--url`, passe um
+banco descartável: o schema é apagado e recriado. Os tempos são normalizados por 10k linhas e o
+benchmark confere que os dois caminhos geram o mesmo JSON (Decimal e datas exatos).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.responses import ORJSONResponse
+from app.db.base import Base
+from app.models.account import Account
+from app.models.account_balance import AccountBalance  # noqa: F401
+from app.models.budget import Budget  # noqa: F401
+from app.models.category import Category  # noqa: F401
+from app.models.transaction import Transaction
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionRead
+
+RESPONSE_ADAPTER = TypeAdapter(List[TransactionRead])
+
+async def _seed(sessionmaker, user_id: uuid.UUID, rows: int) -> None:
+    async with sessionmaker() as session:
+        await session.execute(insert(Account).values(id=1, user_id=user_id, name='Conta', type='checking', currency='BRL', initial_balance=0))
+        start = date(2020, 1, 1)
+        await session.execute(insert(Transaction), [{'user_id': user_id, 'account_id': 1, 'type': 'expense' if i % 3 else 'income', 'amount': Decimal(i % 100000) / 100, 'date': start + timedelta(days=i % 1500), 'description': f'Compra {i}', 'merchant': 'Mercado' if i % 2 else None} for i in range(rows)])
+        await session.commit()
+
+async def _legacy(session, user_id: uuid.UUID, timings: dict) -> bytes:
+    """Caminho anterior: instâncias ORM, model_validate por linha e revalidação pelo response_model."""
+    start = time.perf_counter()
+    txns = (await session.execute(select(Transaction).where(Transaction.user_id == user_id).order_by(Transaction.date.desc(), Transaction.id.desc()))).scalars().all()
+    fetched = time.perf_counter()
+    items = [TransactionRead.model_validate(t) for t in txns]
+    validated = time.perf_counter()
+    # O que o FastAPI faz com `response_model`: valida de novo, converte para JSON-able e usa json.dumps.
+    body = JSONResponse(RESPONSE_ADAPTER.dump_python(RESPONSE_ADAPTER.validate_python(items), mode='json')).body
+    rendered = time.perf_counter()
+    timings['fetch'].append(fetched - start)
+    timings['validate'].append(validated - fetched)
+    timings['render'].append(rendered - validated)
+    return body
+
+async def _fast(session, user_id: uuid.UUID, timings: dict, limit: int) -> bytes:
+    """Caminho atual: tuplas -> dicts, uma passada do TypeAdapter e render com orjson."""
+    start = time.perf_counter()
+    rows = await TransactionRepository(session).list(user_id, limit=limit)
+    fetched = time.perf_counter()
+    items = RESPONSE_ADAPTER.validate_python(rows)
+    validated = time.perf_counter()
+    body = ORJSONResponse(items).body
+    rendered = time.perf_counter()
+    timings['fetch'].append(fetched - start)
+    timings['validate'].append(validated - fetched)
+    timings['render'].append(rendered - validated)
+    return body
+
+def _summary(timings: dict, rows: int) -> dict:
+    scale = 10000 / rows * 1000
+    result = {phase: round(statistics.median(samples) * scale, 2) for phase, samples in timings.items()}
+    result['total'] = round(sum(result.values()), 2)
+    return result
+
+async def run(url: str, rows: int, repeat: int, recreate: bool = False) -> dict:
+    engine = create_async_engine(url, future=True)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            # drop_all só num banco pedido explicitamente; o SQLite temporário nasce vazio.
+            if recreate:
+                await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        user_id = uuid.UUID('a' + uuid.uuid4().hex[1:])
+        await _seed(sessionmaker, user_id, rows)
+        before = {'fetch': [], 'validate': [], 'render': []}
+        after = {'fetch': [], 'validate': [], 'render': []}
+        for _ in range(repeat):
+            async with sessionmaker() as session:
+                legacy_body = await _legacy(session, user_id, before)
+            async with sessionmaker() as session:
+                fast_body = await _fast(session, user_id, after, rows)
+        assert json.loads(legacy_body) == json.loads(fast_body), 'as duas respostas divergem'
+        if recreate:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
+    return {'dialect': engine.dialect.name, 'rows': rows, 'ms_per_10k_rows': {'before': _summary(before, rows), 'after': _summary(after, rows)}}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default=None, help='URL de um banco descartável (o schema é recriado); padrão: SQLite temporário')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    url = args.url or 'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')
+    print(json.dumps(asyncio.run(run(url, args.rows, args.repeat, recreate=args.url is not None)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+
+"""Round trips e latência por escrita: padrão antigo (get + commit + refresh) vs. RETURNING.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.bench_writes [--url URL] [--writes N]
+
+Sem `--url` usa um SQLite temporário (nunca o `DATABASE_URL` do ambiente); com `--url`, passe um
+banco descartável: o schema é apagado e recriado. Round trips = statements enviados ao banco + COMMITs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.account_balance import AccountBalance  # noqa: F401
+from app.models.budget import Budget  # noqa: F401
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.repositories.accounts import AccountRepository
+from app.repositories.balances import signed_amount
+from app.repositories.categories import CategoryRepository
+from app.repositories.transactions import TransactionRepository
+from app.schemas.account import AccountCreate, AccountUpdate
+from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+
+class LegacyRepository:
+    """Reprodução das escritas antes do RETURNING, para comparação."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.transactions = TransactionRepository(session)
+
+    async def _get(self, model, user_id, obj_id):
+        return (await self.session.execute(select(model).where(model.id == obj_id, model.user_id == user_id))).scalar_one_or_none()
+
+    async def create(self, model, user_id, obj_in):
+        obj = model(user_id=user_id, **obj_in.model_dump())
+        self.session.add(obj)
+        await self.session.commit()
+        await self.session.refresh(obj)
+        return obj
+
+    async def update(self, model, user_id, obj_id, obj_in):
+        obj = await self._get(model, user_id, obj_id)
+        for field, value in obj_in.model_dump(exclude_unset=True).items():
+            setattr(obj, field, value)
+        await self.session.commit()
+        await self.session.refresh(obj)
+        return obj
+
+    async def delete(self, model, user_id, obj_id):
+        obj = await self._get(model, user_id, obj_id)
+        await self.session.delete(obj)
+        await self.session.commit()
+
+    async def create_transaction(self, user_id, obj_in):
+        txn = Transaction(user_id=user_id, **obj_in.model_dump(exclude={'tags'}))
+        self.session.add(txn)
+        await self.transactions.balances.apply(user_id, txn.account_id, txn.category_id, txn.date, signed_amount(txn.type, txn.amount))
+        await self.session.commit()
+        await self.session.refresh(txn)
+        return txn
+
+    async def update_transaction(self, user_id, transaction_id, obj_in):
+        txn = await self._get(Transaction, user_id, transaction_id)
+        await self.transactions.balances.apply(user_id, txn.account_id, txn.category_id, txn.date, -signed_amount(txn.type, txn.amount))
+        for field, value in obj_in.model_dump(exclude_unset=True).items():
+            setattr(txn, field, value)
+        await self.transactions.balances.apply(user_id, txn.account_id, txn.category_id, txn.date, signed_amount(txn.type, txn.amount))
+        await self.session.commit()
+        await self.session.refresh(txn)
+        return txn
+
+    async def delete_transaction(self, user_id, transaction_id):
+        txn = await self._get(Transaction, user_id, transaction_id)
+        await self.transactions.balances.apply(user_id, txn.account_id, txn.category_id, txn.date, -signed_amount(txn.type, txn.amount))
+        await self.session.delete(txn)
+        await self.session.commit()
+
+def _operations(session: AsyncSession, legacy: bool, user_id: uuid.UUID, account_id: int):
+    """Pares (nome, fábrica de corrotina) para cada tipo de escrita medida."""
+    old = LegacyRepository(session)
+    accounts, categories, transactions = AccountRepository(session), CategoryRepository(session), TransactionRepository(session)
+    txn_in = TransactionCreate(account_id=account_id, type='expense', amount=Decimal('12.34'), date=date(2025, 1, 15))
+    txn_update = TransactionUpdate(**txn_in.model_dump(exclude={'amount', 'date'}), amount=Decimal('20.00'), date=date(2025, 2, 1))
+    account_in = AccountCreate(name='Conta', type='checking', currency='BRL', initial_balance=Decimal('0'))
+    account_update = AccountUpdate(**account_in.model_dump(exclude={'name'}), name='Renomeada')
+    category_in = CategoryCreate(name='Mercado', type='expense')
+    category_update = CategoryUpdate(**category_in.model_dump(exclude={'name'}), name='Feira')
+    if legacy:
+        return {
+            'account.create': lambda: old.create(Account, user_id, account_in),
+            'account.update': lambda obj_id: old.update(Account, user_id, obj_id, account_update),
+            'account.delete': lambda obj_id: old.delete(Account, user_id, obj_id),
+            'category.create': lambda: old.create(Category, user_id, category_in),
+            'category.update': lambda obj_id: old.update(Category, user_id, obj_id, category_update),
+            'category.delete': lambda obj_id: old.delete(Category, user_id, obj_id),
+            'transaction.create': lambda: old.create_transaction(user_id, txn_in),
+            'transaction.update': lambda obj_id: old.update_transaction(user_id, obj_id, txn_update),
+            'transaction.delete': lambda obj_id: old.delete_transaction(user_id, obj_id),
+        }
+    return {
+        'account.create': lambda: accounts.create(user_id, account_in),
+        'account.update': lambda obj_id: accounts.update(user_id, obj_id, account_update),
+        'account.delete': lambda obj_id: accounts.delete(user_id, obj_id),
+        'category.create': lambda: categories.create(user_id, category_in),
+        'category.update': lambda obj_id: categories.update(user_id, obj_id, category_update),
+        'category.delete': lambda obj_id: categories.delete(user_id, obj_id),
+        'transaction.create': lambda: transactions.create(user_id, txn_in),
+        'transaction.update': lambda obj_id: transactions.update(user_id, obj_id, txn_update),
+        'transaction.delete': lambda obj_id: transactions.delete(user_id, obj_id),
+    }
+
+async def _measure(sessionmaker, counter, legacy: bool, writes: int, user_id: uuid.UUID, account_id: int) -> dict:
+    results = {}
+    for entity in ('account', 'category', 'transaction'):
+        timings = {'create': [], 'update': [], 'delete': []}
+        trips = {'create': 0, 'update': 0, 'delete': 0}
+        for _ in range(writes):
+            # Sessão nova por escrita, como numa requisição da API.
+            obj_id = None
+            for action in ('create', 'update', 'delete'):
+                async with sessionmaker() as session:
+                    op = _operations(session, legacy, user_id, account_id)[f'{entity}.{action}']
+                    counter['n'] = 0
+                    start = time.perf_counter()
+                    obj = await (op() if action == 'create' else op(obj_id))
+                    timings[action].append(time.perf_counter() - start)
+                    trips[action] += counter['n']
+                    if action == 'create':
+                        obj_id = obj.id
+        for action, samples in timings.items():
+            results[f'{entity}.{action}'] = {'round_trips': trips[action] / writes, 'p50_ms': round(statistics.median(samples) * 1000, 3), 'mean_ms': round(statistics.fmean(samples) * 1000, 3)}
+    return results
+
+async def run(url: str, writes: int, recreate: bool = False) -> dict:
+    engine = create_async_engine(url, future=True)
+    counter = {'n': 0}
+
+    def _count(*args, **kwargs):
+        counter['n'] += 1
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', _count)
+    event.listen(engine.sync_engine, 'commit', _count)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            # drop_all só num banco pedido explicitamente; o SQLite temporário nasce vazio.
+            if recreate:
+                await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        user_id = uuid.UUID('a' + uuid.uuid4().hex[1:])
+        async with sessionmaker() as session:
+            account_id = (await AccountRepository(session).create(user_id, AccountCreate(name='Base', type='checking', currency='BRL', initial_balance=Decimal('0')))).id
+        before = await _measure(sessionmaker, counter, True, writes, user_id, account_id)
+        after = await _measure(sessionmaker, counter, False, writes, user_id, account_id)
+        if recreate:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
+    return {'dialect': engine.dialect.name, 'writes': writes, 'results': {op: {'before': before[op], 'after': after[op]} for op in before}}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default=None, help='URL de um banco descartável (o schema é recriado); padrão: SQLite temporário')
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+    url = args.url or 'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_writes.db')
+    print(json.dumps(asyncio.run(run(url, args.writes, recreate=args.url is not None)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Gerador de razões sintéticos para os benchmarks: usuários com contas, árvore de categorias, tags,
+orçamentos e um histórico de transações com cara de extrato real.
+
+O tamanho dos históricos segue uma distribuição log-uniforme entre `min_transactions` e
+`max_transactions` (muitos usuários pequenos, poucos grandes) e o primeiro usuário sempre recebe
+`max_transactions`, para que o pior caso esteja em toda rodada. Tudo é determinístico pela `seed`.
+"""
+import math
+import random
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.partitions import ensure_partitions
+from app.models.account import Account
+from app.models.account_balance import AccountBalance  # noqa: F401
+from app.models.category_balance import UNCATEGORIZED, CategoryBalance
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.goal import Goal  # noqa: F401
+from app.models.recurring_rule import RecurringRule  # noqa: F401
+from app.models.tag import Tag, TransactionTag
+from app.models.transaction import Transaction
+
+END_DATE = date(2025, 6, 30)
+BATCH_SIZE = 10000
+MAX_SPAN_DAYS = 3650
+
+# Categoria pai -> subcategorias; as de `INCOME` são de receita.
+CATEGORY_TREE = {
+    'Moradia': ('Aluguel', 'Energia', 'Internet', 'Condomínio'),
+    'Alimentação': ('Mercado', 'Restaurantes', 'Padaria', 'Delivery'),
+    'Transporte': ('Combustível', 'Aplicativos', 'Estacionamento'),
+    'Lazer': ('Streaming', 'Viagens', 'Cinema'),
+    'Saúde': ('Farmácia', 'Consultas'),
+    'Renda': ('Salário', 'Freelance', 'Rendimentos'),
+}
+INCOME = {'Renda'}
+
+# (descrição, estabelecimento, subcategoria, valor mínimo, valor máximo, peso)
+PURCHASES = (
+    ('Compra no mercado', 'Supermercado Extra', 'Mercado', 40, 650, 14),
+    ('Compra no mercado', 'Carrefour', 'Mercado', 30, 800, 10),
+    ('Pão e café', 'Padaria Pão Quente', 'Padaria', 8, 45, 12),
+    ('Almoço', 'Restaurante Sabor Caseiro', 'Restaurantes', 25, 90, 9),
+    ('Jantar', 'Outback', 'Restaurantes', 90, 320, 3),
+    ('Pedido', 'iFood', 'Delivery', 30, 140, 10),
+    ('Corrida', 'Uber', 'Aplicativos', 12, 70, 10),
+    ('Corrida', '99', 'Aplicativos', 10, 60, 6),
+    ('Abastecimento', 'Posto Shell', 'Combustível', 80, 350, 6),
+    ('Estacionamento', 'Estapar', 'Estacionamento', 10, 40, 3),
+    ('Remédios', 'Drogasil', 'Farmácia', 15, 250, 5),
+    ('Consulta', 'Clínica Vida', 'Consultas', 150, 450, 1),
+    ('Cinema', 'Cinemark', 'Cinema', 25, 90, 2),
+    ('Passagem aérea', 'LATAM', 'Viagens', 300, 2500, 1),
+    ('Hospedagem', 'Booking.com', 'Viagens', 250, 1800, 1),
+    ('Pix recebido', None, 'Freelance', 200, 3000, 2),
+)
+# (descrição, estabelecimento, subcategoria, valor mínimo, valor máximo, dia do mês)
+MONTHLY = (
+    ('Salário', 'Empresa S.A.', 'Salário', 3500, 15000, 5),
+    ('Aluguel', 'Imobiliária Central', 'Aluguel', 1200, 4500, 10),
+    ('Conta de luz', 'Enel', 'Energia', 90, 450, 15),
+    ('Internet', 'Vivo Fibra', 'Internet', 99, 199, 20),
+    ('Assinatura', 'Netflix', 'Streaming', 39, 59, 22),
+)
+TAGS = ('casa', 'trabalho', 'viagem', 'reembolsável', 'recorrente', 'cartão', 'família', 'presente')
+ACCOUNTS = (('Conta corrente', 'checking'), ('Cartão de crédito', 'credit'), ('Poupança', 'savings'))
+
+@dataclass
+class UserLedger:
+    """O que os cenários de carga precisam saber de cada usuário semeado."""
+    id: uuid.UUID
+    account_ids: List[int]
+    category_ids: Dict[str, int]
+    parent_category_ids: List[int]
+    tags: List[str]
+    first_transaction_id: int
+    transaction_count: int
+    first_date: date
+    created: List[int] = field(default_factory=list)
+    etags: Dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class Ledger:
+    users: List[UserLedger]
+
+    @property
+    def transaction_count(self) -> int:
+        return sum(user.transaction_count for user in self.users)
+
+def user_sizes(users: int, min_transactions: int, max_transactions: int, seed: int = 0) -> List[int]:
+    """Quantidade de transações de cada usuário: log-uniforme, com o primeiro no máximo."""
+    rnd = random.Random(seed)
+    low, high = math.log(max(min_transactions, 1)), math.log(max(max_transactions, 1))
+    return [max_transactions] + [int(math.exp(rnd.uniform(low, high))) for _ in range(users - 1)]
+
+class _Ids:
+    def __init__(self):
+        self.next: Dict[str, int] = defaultdict(lambda: 1)
+
+    def take(self, table: str, count: int = 1) -> int:
+        first = self.next[table]
+        self.next[table] += count
+        return first
+
+def _money(rnd: random.Random, low: float, high: float) -> Decimal:
+    return Decimal(rnd.randint(int(low * 100), int(high * 100))) / 100
+
+def _user_rows(rnd: random.Random, ids: _Ids, user_id: uuid.UUID, size: int) -> Tuple[UserLedger, Dict[str, list], Iterator[Tuple[list, list]]]:
+    """Linhas fixas do usuário (contas, categorias, tags, orçamentos) e um iterador de lotes de
+    (transações, transaction_tags). Os saldos mensais são acumulados em `fixed['category_balances']`
+    conforme o iterador avança; `account_balances` é preenchida pelo trigger ao inseri-los."""
+    accounts = ACCOUNTS[:rnd.randint(1, len(ACCOUNTS))]
+    first_account = ids.take('accounts', len(accounts))
+    fixed: Dict[str, list] = defaultdict(list)
+    account_ids = list(range(first_account, first_account + len(accounts)))
+    for account_id, (name, type_) in zip(account_ids, accounts):
+        fixed['accounts'].append({'id': account_id, 'user_id': user_id, 'name': name, 'type': type_, 'currency': 'BRL', 'initial_balance': _money(rnd, 0, 5000)})
+    category_ids: Dict[str, int] = {}
+    parents: List[int] = []
+    for parent, children in CATEGORY_TREE.items():
+        type_ = 'income' if parent in INCOME else 'expense'
+        parent_id = ids.take('categories')
+        parents.append(parent_id)
+        category_ids[parent] = parent_id
+        fixed['categories'].append({'id': parent_id, 'user_id': user_id, 'name': parent, 'parent_id': None, 'type': type_})
+        for child in children:
+            category_ids[child] = ids.take('categories')
+            fixed['categories'].append({'id': category_ids[child], 'user_id': user_id, 'name': child, 'parent_id': parent_id, 'type': type_})
+    tag_names = rnd.sample(TAGS, rnd.randint(3, len(TAGS)))
+    first_tag = ids.take('tags', len(tag_names))
+    fixed['tags'] = [{'id': first_tag + i, 'user_id': user_id, 'name': name} for i, name in enumerate(tag_names)]
+    for months_back in range(3):
+        month = date(END_DATE.year - (END_DATE.month - 1 - months_back < 0), (END_DATE.month - 1 - months_back) % 12 + 1, 1)
+        for name in ('Mercado', 'Restaurantes', 'Delivery', 'Aplicativos'):
+            fixed['budgets'].append({'id': ids.take('budgets'), 'user_id': user_id, 'month': month, 'category_id': category_ids[name], 'limit_amount': _money(rnd, 200, 1500)})
+    # Históricos maiores cobrem mais tempo: ~3 transações por dia, entre 3 meses e 10 anos.
+    span = max(90, min(MAX_SPAN_DAYS, size // 3))
+    first_date = END_DATE - timedelta(days=span)
+    first_txn = ids.take('transactions', size)
+    user = UserLedger(id=user_id, account_ids=account_ids, category_ids=category_ids, parent_category_ids=parents, tags=tag_names, first_transaction_id=first_txn, transaction_count=size, first_date=first_date)
+    balances: Dict[Tuple[int, int, date], Decimal] = defaultdict(Decimal)
+    weights = [p[-1] for p in PURCHASES]
+
+    def _transaction(txn_id: int) -> dict:
+        # ~1 em 12 é um lançamento mensal (salário, aluguel, contas) no dia fixo do mês.
+        if rnd.random() < 1 / 12:
+            description, merchant, category, low, high, day = rnd.choice(MONTHLY)
+            when = first_date + timedelta(days=rnd.randint(0, span))
+            when = when.replace(day=min(day, 28))
+        else:
+            description, merchant, category, low, high, _ = rnd.choices(PURCHASES, weights)[0]
+            when = first_date + timedelta(days=rnd.randint(0, span))
+        type_ = 'income' if category in ('Salário', 'Freelance', 'Rendimentos') else 'expense'
+        account_id = account_ids[0] if type_ == 'income' or len(account_ids) == 1 else rnd.choice(account_ids[:2])
+        amount = _money(rnd, low, high)
+        category_id = category_ids[category] if rnd.random() > 0.05 else None
+        balances[(account_id, category_id or UNCATEGORIZED, when.replace(day=1))] += amount if type_ == 'income' else -amount
+        return {'id': txn_id, 'user_id': user_id, 'account_id': account_id, 'category_id': category_id, 'type': type_, 'amount': amount, 'date': when, 'description': description, 'merchant': merchant}
+
+    def _batches() -> Iterator[Tuple[list, list]]:
+        for start in range(0, size, BATCH_SIZE):
+            txns = [_transaction(first_txn + i) for i in range(start, min(start + BATCH_SIZE, size))]
+            links = []
+            for txn in txns:
+                # ~15% das transações têm uma ou duas tags.
+                if rnd.random() < 0.15:
+                    for tag_offset in rnd.sample(range(len(tag_names)), rnd.randint(1, 2)):
+                        links.append({'transaction_id': txn['id'], 'tag_id': first_tag + tag_offset})
+            yield txns, links
+        fixed['category_balances'] = [{'account_id': account_id, 'category_id': category_id, 'month': month, 'user_id': user_id, 'net_change': net} for (account_id, category_id, month), net in balances.items()]
+
+    return user, fixed, _batches()
+
+async def seed(engine: AsyncEngine, users: int, max_transactions: int, min_transactions: int = 20, seed: int = 0, log: Optional[Callable[[str], None]] = None) -> Ledger:
+    """Recria o schema e semeia `users` usuários; devolve o resumo usado pelos cenários."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == 'postgresql':
+            # Partições de todo o período semeado, como o job e a migração deixariam em produção.
+            await conn.run_sync(ensure_partitions, END_DATE - timedelta(days=MAX_SPAN_DAYS), END_DATE, get_settings().transaction_partition_interval)
+    rnd = random.Random(seed)
+    ids = _Ids()
+    ledger = Ledger(users=[])
+    for index, size in enumerate(user_sizes(users, min_transactions, max_transactions, seed)):
+        user_id = uuid.UUID(int=rnd.getrandbits(128), version=4)
+        user, fixed, batches = _user_rows(rnd, ids, user_id, size)
+        async with engine.begin() as conn:
+            for model in (Account, Category, Tag, Budget):
+                await conn.execute(insert(model), fixed[model.__tablename__])
+            for txns, links in batches:
+                await conn.execute(insert(Transaction), txns)
+                if links:
+                    await conn.execute(insert(TransactionTag), links)
+            await conn.execute(insert(CategoryBalance), fixed['category_balances'])
+        ledger.users.append(user)
+        if log and (index + 1) % 100 == 0:
+            log(f'{index + 1}/{users} usuários, {ledger.transaction_count} transações')
+    async with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            # Os ids foram atribuídos aqui: as sequências precisam continuar depois deles.
+            for table in ('accounts', 'categories', 'tags', 'budgets', 'transactions'):
+                await conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        await conn.execute(text('ANALYZE'))
+    return ledger
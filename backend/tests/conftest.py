@@ -5,7 +5,7 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.main import app
 from app.db.base import Base
-from app.db.session import get_session
+from app.api.deps import get_db
 
 DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
@@ -37,10 +37,10 @@ async def db_session():
 
 @pytest.fixture()
 async def client(db_session):
-    async def override_get_session():
+    async def override_get_db():
         async with db_session as session:
             yield session
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_db] = override_get_db
     async with AsyncClient(app=app, base_url='http://testserver') as c:
         yield c
     app.dependency_overrides.clear()
@@ -0,0 +1,60 @@
+import uuid
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.account_balance import AccountBalance
+from app.models.transaction import Transaction
+from app.repositories.balances import AccountBalanceRepository, signed_amount
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000005')
+
+def _txn(account_id, type_, amount, day):
+    return TransactionCreate(account_id=account_id, type=type_, amount=Decimal(amount), date=day)
+
+async def _assert_matches_transactions(session: AsyncSession) -> None:
+    expected = defaultdict(Decimal)
+    for txn in (await session.scalars(select(Transaction))).all():
+        expected[(txn.account_id, txn.date.replace(day=1))] += signed_amount(txn.type, txn.amount)
+    stored = {(row.account_id, row.month): row.net_change for row in (await session.scalars(select(AccountBalance))).all()}
+    # Meses que voltaram a zero podem ficar com a linha; o que importa é o valor.
+    assert {key: value for key, value in stored.items() if value} == {key: value for key, value in expected.items() if value}
+
+@pytest.mark.anyio
+async def test_account_balances_match_transactions_after_every_write():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': USER, 'name': f'Conta {i}', 'type': 'checking', 'currency': 'BRL', 'initial_balance': Decimal('100.00')} for i in (1, 2)])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        repo = TransactionRepository(session)
+        first = await repo.create(USER, _txn(1, 'income', '500.00', date(2025, 5, 31)))
+        second = await repo.create(USER, _txn(1, 'expense', '80.00', date(2025, 5, 10)))
+        await _assert_matches_transactions(session)
+
+        # Troca de conta, de mês, de valor e de tipo: o mês antigo é desfeito e o novo recebe o valor.
+        await repo.update(USER, first.id, TransactionUpdate(account_id=2, type='income', amount=Decimal('500.00'), date=date(2025, 5, 31)))
+        await _assert_matches_transactions(session)
+        await repo.update(USER, first.id, TransactionUpdate(account_id=2, type='income', amount=Decimal('500.00'), date=date(2025, 6, 1)))
+        await _assert_matches_transactions(session)
+        await repo.update(USER, second.id, TransactionUpdate(account_id=1, type='income', amount=Decimal('95.25'), date=date(2025, 5, 10)))
+        await _assert_matches_transactions(session)
+
+        created = await repo.bulk_create(USER, [_txn(1, 'expense', '12.00', date(2025, 4, 1)), _txn(2, 'expense', '7.50', date(2025, 6, 3))])
+        await repo.bulk_update(USER, {created[0].id: TransactionUpdate(account_id=2, type='expense', amount=Decimal('15.00'), date=date(2025, 7, 2))})
+        await _assert_matches_transactions(session)
+        await repo.bulk_delete(USER, [created[1].id])
+        assert await repo.delete(USER, second.id)
+        await _assert_matches_transactions(session)
+
+        totals = await AccountBalanceRepository(session).totals(USER)
+        assert {account_id: total for account_id, total in totals.items() if total} == {2: Decimal('485.00')}
+    await engine.dispose()
@@ -0,0 +1,45 @@
+import copy
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.account_balance import AccountBalance
+from app.models.transaction import Transaction
+from benchmarks.bench_load import compare
+from benchmarks.ledger import seed, user_sizes
+
+def test_user_sizes_are_deterministic_with_the_largest_first():
+    sizes = user_sizes(200, 20, 5000, seed=1)
+    assert sizes == user_sizes(200, 20, 5000, seed=1)
+    assert sizes[0] == 5000 and all(20 <= size <= 5000 for size in sizes)
+    # Log-uniforme: bem mais usuários pequenos que grandes.
+    assert sum(size < 500 for size in sizes) > sum(size >= 500 for size in sizes)
+
+@pytest.mark.anyio
+async def test_seed_balances_match_transactions():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    ledger = await seed(engine, users=3, max_transactions=300, seed=2)
+    async with engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).select_from(Transaction)) == ledger.transaction_count
+        signed = func.sum(func.iif(Transaction.type == 'income', Transaction.amount, -Transaction.amount))
+        expected = await conn.scalar(select(signed))
+        assert Decimal(str(await conn.scalar(select(func.sum(AccountBalance.net_change))))).quantize(Decimal('0.01')) == Decimal(str(expected)).quantize(Decimal('0.01'))
+    await engine.dispose()
+
+def _report(p50: float, p95: float, rps: float = 100.0, errors: int = 0) -> dict:
+    scenario = {'requests': 200, 'errors': errors, 'p50_ms': p50, 'p95_ms': p95}
+    return {'meta': {'dialect': 'sqlite', 'users': 10, 'max_transactions': 100, 'concurrency': 4, 'cache_backend': 'memory'}, 'totals': {'throughput_rps': rps, 'peak_rss_mb': 100.0, 'p95_ms': p95}, 'scenarios': {'transactions.list': scenario}}
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = _report(20.0, 40.0)
+    assert compare(_report(24.0, 48.0), baseline, 0.25) == []
+    # Acima da tolerância relativa, mas dentro do piso absoluto: ruído.
+    assert compare(_report(1.0, 2.0), _report(0.5, 1.0), 0.25) == []
+    assert compare(_report(30.0, 40.0), baseline, 0.25) == ['transactions.list: p50 30.0 ms > baseline 20.0 ms']
+    assert compare(_report(20.0, 40.0, rps=60.0), baseline, 0.25) == ['throughput 60.0 rps < baseline 100.0 rps']
+    assert compare(_report(20.0, 40.0, errors=1), baseline, 0.25) == ['transactions.list: 1 HTTP errors']
+    other = copy.deepcopy(baseline)
+    other['meta']['concurrency'] = 16
+    assert compare(baseline, other, 0.25) == ["baseline not comparable: concurrency is 4, baseline has 16"]
@@ -0,0 +1,54 @@
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.repositories.budgets import BudgetRepository
+from app.services.budgets import BudgetService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000002')
+
+@pytest.mark.anyio
+async def test_budget_status_rolls_up_subcategories():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+        await conn.execute(insert(Category), [
+            {'id': 1, 'user_id': USER, 'name': 'Casa', 'type': 'expense', 'parent_id': None},
+            {'id': 2, 'user_id': USER, 'name': 'Mercado', 'type': 'expense', 'parent_id': 1},
+            {'id': 3, 'user_id': USER, 'name': 'Feira', 'type': 'expense', 'parent_id': 2},
+            {'id': 4, 'user_id': OTHER, 'name': 'Alheia', 'type': 'expense', 'parent_id': 1},
+        ])
+        await conn.execute(insert(Budget), [
+            {'id': 1, 'user_id': USER, 'month': date(2025, 5, 1), 'category_id': 1, 'limit_amount': Decimal('200.00')},
+            {'id': 2, 'user_id': USER, 'month': date(2025, 5, 1), 'category_id': 2, 'limit_amount': Decimal('0.00')},
+        ])
+        await conn.execute(insert(Transaction), [
+            {'user_id': USER, 'account_id': 1, 'category_id': 1, 'type': 'expense', 'amount': Decimal('10.10'), 'date': date(2025, 5, 1)},
+            {'user_id': USER, 'account_id': 1, 'category_id': 3, 'type': 'expense', 'amount': Decimal('40.00'), 'date': date(2025, 5, 31)},
+            {'user_id': USER, 'account_id': 1, 'category_id': 3, 'type': 'expense', 'amount': Decimal('99.00'), 'date': date(2025, 6, 1)},
+            {'user_id': USER, 'account_id': 1, 'category_id': 2, 'type': 'income', 'amount': Decimal('5.00'), 'date': date(2025, 5, 2)},
+            {'user_id': OTHER, 'account_id': 1, 'category_id': 4, 'type': 'expense', 'amount': Decimal('500.00'), 'date': date(2025, 5, 2)},
+        ])
+        # Ciclo na hierarquia não pode travar a CTE recursiva.
+        await conn.execute(update(Category).where(Category.id == 1).values(parent_id=3))
+    async with AsyncSession(engine) as session:
+        status = await BudgetService(BudgetRepository(session), user_id=USER).budget_status(date(2025, 5, 20))
+    await engine.dispose()
+    by_category = {s.category_name: s for s in status}
+    assert by_category['Casa'].spent == Decimal('50.10')
+    assert by_category['Casa'].remaining == Decimal('149.90')
+    assert by_category['Casa'].percent == Decimal('25.05')
+    assert by_category['Mercado'].spent == Decimal('50.10')
+    assert by_category['Mercado'].percent is None
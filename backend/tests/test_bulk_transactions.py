@@ -0,0 +1,105 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.deps import get_current_user, get_db
+from app.api.routers import transactions
+from app.db.base import Base
+from app.models.account import Account
+from app.models.category import Category
+from app.repositories.balances import AccountBalanceRepository
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionCreate
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000006')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000007')
+
+def _item(account_id=1, amount='10.00', day='2025-05-10', type_='expense', **extra):
+    return {'account_id': account_id, 'type': type_, 'amount': amount, 'date': day, **extra}
+
+@pytest.mark.anyio
+async def test_bulk_routes_report_partial_failures_and_keep_balances():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': owner, 'name': f'Conta {i}', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i, owner in ((1, USER), (2, USER), (3, OTHER))])
+        await conn.execute(insert(Category), [{'id': 1, 'user_id': USER, 'name': 'Mercado', 'type': 'expense'}, {'id': 2, 'user_id': OTHER, 'name': 'Alheia', 'type': 'expense'}])
+
+    app = FastAPI()
+    app.include_router(transactions.router)
+    app.dependency_overrides[get_current_user] = lambda: {'id': app.state.user}
+
+    async def db():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = db
+
+    async def call(method, json, user=USER):
+        app.state.user = user
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+            response = await client.request(method, '/transactions/bulk', json=json)
+            assert response.status_code == 200
+            return response.json()
+
+    async def totals():
+        async with AsyncSession(engine) as session:
+            return {account_id: total for account_id, total in (await AccountBalanceRepository(session).totals(USER)).items() if total}
+
+    other = await call('POST', [_item(account_id=3, amount='1.00')], user=OTHER)
+    foreign_id = other['items'][0]['id']
+
+    created = await call('POST', [
+        _item(amount='100.00', category_id=1),
+        {'account_id': 1, 'type': 'expense', 'date': '2025-05-10'},
+        _item(account_id=3),
+        _item(category_id=2),
+        _item(account_id=2, type_='income', amount='40.00'),
+    ])
+    # Os índices dos erros são os da requisição; os itens válidos são gravados mesmo assim.
+    assert [(e['index'], e['detail']) for e in created['errors']][1:] == [(2, 'Account not found'), (3, 'Category not found')]
+    assert created['errors'][0]['index'] == 1 and 'amount' in created['errors'][0]['detail']
+    assert [(t['account_id'], t['amount']) for t in created['items']] == [(1, '100.00'), (2, '40.00')]
+    assert await totals() == {1: Decimal('-100.00'), 2: Decimal('40.00')}
+    first, second = (t['id'] for t in created['items'])
+
+    updated = await call('PUT', [
+        {'id': first, **_item(account_id=2, amount='60.00')},
+        {'id': first, **_item(amount='1.00')},
+        {'id': foreign_id, **_item()},
+        {'id': second, **_item(account_id=2, type_='income', amount='40.00', category_id=2)},
+        {'id': 999999, **_item()},
+    ])
+    assert [(e['index'], e['detail']) for e in updated['errors']] == [(1, 'Duplicate id (item 0)'), (2, 'Transaction not found'), (3, 'Category not found'), (4, 'Transaction not found')]
+    assert [(t['id'], t['account_id'], t['amount']) for t in updated['items']] == [(first, 2, '60.00')]
+    assert await totals() == {2: Decimal('-20.00')}
+
+    deleted = await call('DELETE', {'ids': [first, foreign_id, 424242]})
+    assert deleted['deleted'] == [first]
+    assert [(e['index'], e['detail']) for e in deleted['errors']] == [(1, 'Transaction not found'), (2, 'Transaction not found')]
+    assert await totals() == {2: Decimal('40.00')}
+    # A transação do outro usuário continua intacta.
+    async with AsyncSession(engine) as session:
+        assert await AccountBalanceRepository(session).totals(OTHER) == {3: Decimal('-1.00')}
+    await engine.dispose()
+
+@pytest.mark.anyio
+async def test_bulk_create_sends_one_insert_in_item_order():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': USER, 'name': f'Conta {i}', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i in (1, 2)])
+    statements = []
+    event.listen(engine.sync_engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    items = [TransactionCreate(account_id=1 + i % 2, type='expense', amount=Decimal(f'{i + 1}.00'), date=date(2025, 5, 10 - i)) for i in range(5)]
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        created = await TransactionRepository(session).bulk_create(USER, items)
+    assert len([s for s in statements if s.startswith('INSERT INTO transactions')]) == 1
+    assert [(t.account_id, t.amount, t.date) for t in created] == [(o.account_id, o.amount, o.date) for o in items]
+    await engine.dispose()
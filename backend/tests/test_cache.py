@@ -0,0 +1,154 @@
+
+import time
+import uuid
+
+import pytest
+
+from app.core.cache import ACCOUNTS, TRANSACTIONS, MemoryBackend, RedisBackend, ResponseCache
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000002')
+
+class FakeRedis:
+    """Subconjunto do redis.asyncio usado pelo RedisBackend, em memória."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _alive(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._alive(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and self._alive(key) is not None:
+            return None
+        self.data[key] = (value if isinstance(value, bytes) else str(value).encode(), time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def mget(self, keys):
+        return [self._alive(key) for key in keys]
+
+    async def incr(self, key):
+        value = int(self._alive(key) or 0) + 1
+        self.data[key] = (str(value).encode(), None)
+        return value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return [{'call': self.calls}]
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache(request):
+    backend = MemoryBackend(1024 * 1024) if request.param == 'memory' else RedisBackend(FakeRedis())
+    return ResponseCache(backend, ttl=60)
+
+@pytest.mark.anyio
+async def test_hits_until_a_dependency_is_bumped(cache):
+    produce = Counter()
+    first = await cache.respond(USER, 'accounts', {}, produce)
+    second = await cache.respond(USER, 'accounts', {}, produce)
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert second.body == first.body == b'[{"call":1}]'
+    # Contas dependem das transações (saldo atual): escrever uma transação invalida a listagem.
+    await cache.bump(USER, TRANSACTIONS)
+    assert (await cache.respond(USER, 'accounts', {}, produce)).body == b'[{"call":2}]'
+    await cache.bump(USER, 'budgets')
+    assert (await cache.respond(USER, 'accounts', {}, produce)).headers['X-Cache'] == 'HIT'
+    await cache.bump(OTHER, ACCOUNTS)
+    assert (await cache.respond(USER, 'accounts', {}, produce)).headers['X-Cache'] == 'HIT'
+    assert (await cache.respond(USER, 'accounts', {'page': 2}, produce)).headers['X-Cache'] == 'MISS'
+    assert produce.calls == 3
+
+@pytest.mark.anyio
+async def test_backend_failure_falls_back_to_database():
+    class Broken(MemoryBackend):
+        async def generations(self, keys):
+            raise ConnectionError('down')
+    cache = ResponseCache(Broken(1024), ttl=60)
+    produce = Counter()
+    await cache.respond(USER, 'accounts', {}, produce)
+    await cache.respond(USER, 'accounts', {}, produce)
+    assert produce.calls == 2 and cache.errors == 2
+
+@pytest.mark.anyio
+async def test_memory_backend_evicts_by_size():
+    backend = MemoryBackend(max_bytes=10)
+    await backend.set('a', b'12345', ttl=60)
+    await backend.set('b', b'12345', ttl=60)
+    await backend.get('a')
+    await backend.set('c', b'12345', ttl=60)
+    assert (await backend.get('a'), await backend.get('b'), await backend.get('c')) == (b'12345', None, b'12345')
+    assert backend.size == 10
+
+@pytest.mark.anyio
+async def test_memory_backend_bounds_generations_and_an_evicted_one_never_serves_a_stale_entry():
+    cache = ResponseCache(MemoryBackend(1024 * 1024, max_generations=2), ttl=60)
+    produce = Counter()
+    await cache.respond(USER, 'categories', {}, produce)
+    await cache.bump(USER, 'categories')
+    assert (await cache.respond(USER, 'categories', {}, produce)).body == b'[{"call":2}]'
+    # Outros usuários empurram o contador de USER para fora do LRU.
+    for source in ('budgets', 'goals'):
+        await cache.bump(OTHER, source)
+    assert len(cache.backend._generations) == 2
+    # O contador recomeça acima dos valores antigos: a resposta anterior não volta.
+    assert (await cache.respond(USER, 'categories', {}, produce)).headers['X-Cache'] == 'MISS'
+    assert (await cache.respond(USER, 'categories', {}, produce)).headers['X-Cache'] == 'HIT'
+    assert produce.calls == 3
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('backend', ['memory', 'none'])
+async def test_etag_answers_not_modified(backend):
+    cache = ResponseCache(MemoryBackend(1024 * 1024) if backend == 'memory' else None, ttl=60)
+    produce, fingerprints = Counter(), Counter()
+    async def etag():
+        await fingerprints()
+        return 'W/"v1"'
+    first = await cache.respond(USER, 'accounts', {}, produce, etag=etag)
+    tag = first.headers['ETag']
+    assert first.status_code == 200 and (tag == 'W/"v1"') == (backend == 'none')
+    second = await cache.respond(USER, 'accounts', {}, produce, etag=etag, if_none_match=f'"v0", {tag}')
+    assert second.status_code == 304 and second.body == b''
+    assert produce.calls == 1
+    # Num HIT o ETag vem do cache, sem repetir a consulta de impressão digital.
+    assert fingerprints.calls == (1 if backend == 'memory' else 2)
+
+@pytest.mark.anyio
+async def test_etag_changes_on_every_bump_even_when_the_fingerprint_does_not(cache):
+    produce = Counter()
+    async def etag():
+        # Duas atualizações no mesmo segundo: max(updated_at) e a contagem não mudam.
+        return 'W/"same-second"'
+    first = await cache.respond(USER, 'accounts', {}, produce, etag=etag)
+    await cache.bump(USER, ACCOUNTS)
+    second = await cache.respond(USER, 'accounts', {}, produce, etag=etag, if_none_match=first.headers['ETag'])
+    assert second.status_code == 200 and second.headers['ETag'] != first.headers['ETag']
+    third = await cache.respond(USER, 'accounts', {}, produce, etag=etag, if_none_match=second.headers['ETag'])
+    assert third.status_code == 304 and produce.calls == 2
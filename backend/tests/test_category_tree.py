@@ -0,0 +1,58 @@
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.repositories.categories import CategoryRepository, CategoryTree, CategoryTreeCache, get_category_tree_cache
+from app.repositories.transactions import TransactionRepository
+from app.schemas.category import CategoryCreate
+from app.schemas.transaction import TransactionCreate
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+
+def test_tree_closure_handles_cycles():
+    tree = CategoryTree([(1, None), (2, 1), (3, 2), (4, 1), (5, 6), (6, 5)])
+    assert tree.subtree(1) == {1, 2, 3, 4}
+    assert tree.subtree(2) == {2, 3}
+    assert tree.ancestors[3] == (2, 1)
+    assert tree.subtree(5) == {5, 6}
+    assert tree.subtree(99) == {99}
+
+def test_cache_expires_and_evicts():
+    cache = CategoryTreeCache(maxsize=1, ttl=0)
+    cache.put(USER, CategoryTree([]))
+    assert cache.get(USER) is None
+    cache = CategoryTreeCache(maxsize=1, ttl=60)
+    cache.put(USER, CategoryTree([]))
+    cache.put(uuid.UUID(int=2), CategoryTree([]))
+    assert cache.get(USER) is None
+
+@pytest.mark.anyio
+async def test_list_includes_subcategories_and_cache_invalidates_on_write():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+        await conn.execute(insert(Category), [
+            {'id': 1, 'user_id': USER, 'name': 'Alimentação', 'type': 'expense', 'parent_id': None},
+            {'id': 2, 'user_id': USER, 'name': 'Mercado', 'type': 'expense', 'parent_id': 1},
+            {'id': 3, 'user_id': USER, 'name': 'Lazer', 'type': 'expense', 'parent_id': None},
+        ])
+        await conn.execute(insert(Transaction), [{'user_id': USER, 'account_id': 1, 'category_id': c, 'type': 'expense', 'amount': Decimal('1.00'), 'date': date(2025, 1, c)} for c in (1, 2, 3)])
+    get_category_tree_cache().invalidate(USER)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        repo = TransactionRepository(session)
+        assert [r['category_id'] for r in await repo.list(USER, category_id=1, include_subcategories=True)] == [2, 1]
+        assert [r['category_id'] for r in await repo.list(USER, category_id=1)] == [1]
+        created = await CategoryRepository(session).create(USER, CategoryCreate(name='Feira', type='expense', parent_id=2))
+        await repo.create(USER, TransactionCreate(account_id=1, type='expense', amount=Decimal('2.00'), date=date(2025, 1, 9), category_id=created.id))
+        assert [r['category_id'] for r in await repo.list(USER, category_id=1, include_subcategories=True)] == [created.id, 2, 1]
+    await engine.dispose()
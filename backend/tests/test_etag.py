@@ -0,0 +1,52 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.responses import etag_matches
+from app.db.base import Base
+from app.models.account import Account
+from app.models.category import Category
+from app.repositories.accounts import AccountRepository
+from app.repositories.categories import CategoryRepository
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionCreate
+from app.services.accounts import AccountService
+from app.services.transactions import TransactionService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000002')
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('"x", W/"abc"', 'W/"abc"')
+    assert etag_matches('*', 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+@pytest.mark.anyio
+async def test_list_etags_follow_writes():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': 1, 'user_id': USER, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0}, {'id': 2, 'user_id': OTHER, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0}])
+        await conn.execute(insert(Category), [{'id': 1, 'user_id': USER, 'name': 'Mercado', 'type': 'expense'}])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        accounts = AccountService(AccountRepository(session), USER)
+        transactions = TransactionService(TransactionRepository(session), USER)
+        before = (await accounts.list_etag(), await transactions.list_etag())
+        assert before == (await accounts.list_etag(), await transactions.list_etag())
+        await TransactionRepository(session).create(OTHER, TransactionCreate(account_id=2, type='expense', amount=Decimal('1.00'), date=date(2025, 5, 1)))
+        assert before == (await accounts.list_etag(), await transactions.list_etag())
+        # Uma transação nova muda a listagem de transações e o saldo atual das contas.
+        await transactions.create_transaction(TransactionCreate(account_id=1, category_id=1, type='expense', amount=Decimal('9.90'), date=date(2025, 5, 1)))
+        after = (await accounts.list_etag(), await transactions.list_etag())
+        assert after[0] != before[0] and after[1] != before[1]
+        # Apagar a categoria anula category_id sem tocar em transactions.updated_at.
+        await CategoryRepository(session).delete(USER, 1)
+        assert await transactions.list_etag() != after[1]
+    await engine.dispose()
@@ -0,0 +1,61 @@
+import csv
+import io
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.deps import get_current_user, get_db
+from app.api.routers import transactions
+from app.db.base import Base
+from app.models.account import Account
+from app.models.transaction import Transaction
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000009')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000010')
+
+@pytest.mark.anyio
+async def test_export_csv_and_parquet_fallback(monkeypatch):
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': owner, 'name': f'Conta {i}', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i, owner in ((1, USER), (2, OTHER))])
+        # Inseridas fora de ordem: a exportação ordena por (date, id).
+        await conn.execute(insert(Transaction), [
+            {'id': 3, 'user_id': USER, 'account_id': 1, 'type': 'expense', 'amount': Decimal('12.50'), 'date': date(2025, 5, 20), 'description': 'Padaria, centro', 'merchant': None},
+            {'id': 1, 'user_id': USER, 'account_id': 1, 'type': 'income', 'amount': Decimal('3000'), 'date': date(2025, 5, 1), 'description': 'Salário', 'merchant': 'ACME'},
+            {'id': 2, 'user_id': USER, 'account_id': 1, 'type': 'expense', 'amount': Decimal('7.10'), 'date': date(2025, 4, 30), 'description': None, 'merchant': None},
+            {'id': 4, 'user_id': OTHER, 'account_id': 2, 'type': 'expense', 'amount': Decimal('1.00'), 'date': date(2025, 5, 2), 'description': 'Alheia', 'merchant': None},
+        ])
+
+    app = FastAPI()
+    app.include_router(transactions.router)
+    app.dependency_overrides[get_current_user] = lambda: {'id': USER}
+
+    async def db():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+        response = await client.get('/transactions/export')
+        assert response.status_code == 200 and response.headers['content-type'].startswith('text/csv')
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows == [
+            ['id', 'date', 'type', 'amount', 'account_id', 'category_id', 'description', 'merchant'],
+            ['2', '2025-04-30', 'expense', '7.10', '1', '', '', ''],
+            ['1', '2025-05-01', 'income', '3000.00', '1', '', 'Salário', 'ACME'],
+            ['3', '2025-05-20', 'expense', '12.50', '1', '', 'Padaria, centro', ''],
+        ]
+        filtered = await client.get('/transactions/export', params={'start_date': '2025-05-01', 'end_date': '2025-05-19'})
+        assert [row[0] for row in csv.reader(io.StringIO(filtered.text))] == ['id', '1']
+
+        monkeypatch.setattr(transactions, 'parquet_available', lambda: False)
+        response = await client.get('/transactions/export', params={'format': 'parquet'})
+        assert (response.status_code, response.json()) == (501, {'detail': 'Parquet export requires pyarrow'})
+    await engine.dispose()
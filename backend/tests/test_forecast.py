@@ -0,0 +1,80 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.account_balance import AccountBalance
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.category_balance import CategoryBalance
+from app.models.recurring_rule import RecurringRule
+from app.repositories.forecast import ForecastRepository
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.forecast import ForecastService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+
+async def _engine():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': 1, 'user_id': USER, 'name': 'Corrente', 'type': 'checking', 'currency': 'BRL', 'initial_balance': Decimal('1000.00')}, {'id': 2, 'user_id': USER, 'name': 'Cartão', 'type': 'credit', 'currency': 'BRL', 'initial_balance': 0}])
+        await conn.execute(insert(Category), [
+            {'id': 1, 'user_id': USER, 'name': 'Salário', 'type': 'income', 'parent_id': None},
+            {'id': 2, 'user_id': USER, 'name': 'Casa', 'type': 'expense', 'parent_id': None},
+            {'id': 3, 'user_id': USER, 'name': 'Mercado', 'type': 'expense', 'parent_id': 2},
+            {'id': 4, 'user_id': USER, 'name': 'Lazer', 'type': 'expense', 'parent_id': None},
+        ])
+    return engine
+
+def _txn(category_id, type_, amount, day, account_id=1):
+    return TransactionCreate(account_id=account_id, category_id=category_id, type=type_, amount=Decimal(amount), date=day)
+
+@pytest.mark.anyio
+async def test_category_balances_follow_writes():
+    engine = await _engine()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        repo = TransactionRepository(session)
+        first = await repo.create(USER, _txn(3, 'expense', '50.00', date(2025, 5, 3)))
+        await repo.bulk_create(USER, [_txn(None, 'expense', '20.00', date(2025, 5, 4)), _txn(1, 'income', '900.00', date(2025, 5, 5))])
+        # Troca de categoria, conta e mês numa única edição.
+        await repo.update(USER, first.id, TransactionUpdate(account_id=2, category_id=4, type='expense', amount=Decimal('70.00'), date=date(2025, 6, 1)))
+        cells = {(row.account_id, row.category_id, row.month): row.net_change for row in (await session.scalars(select(CategoryBalance))).all()}
+        assert {key: value for key, value in cells.items() if value} == {(1, 0, date(2025, 5, 1)): Decimal('-20.00'), (1, 1, date(2025, 5, 1)): Decimal('900.00'), (2, 4, date(2025, 6, 1)): Decimal('-70.00')}
+        by_account = dict((await session.execute(select(AccountBalance.account_id, func.sum(AccountBalance.net_change)).group_by(AccountBalance.account_id))).all())
+        assert by_account == {1: Decimal('880.00'), 2: Decimal('-70.00')}
+    await engine.dispose()
+
+@pytest.mark.anyio
+async def test_forecast_combines_rules_history_and_budgets():
+    engine = await _engine()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        history = []
+        for month in range(1, 7):
+            day = date(2025, month, 5)
+            history += [_txn(1, 'income', '5000.00', day), _txn(3, 'expense', '500.00' if month % 2 else '700.00', day, account_id=2), _txn(4, 'expense', '300.00', day)]
+        await TransactionRepository(session).bulk_create(USER, history)
+        # O salário é uma regra (a ocorrência de junho já foi gerada); Casa, mãe de Mercado, tem orçamento de 400.
+        await session.execute(insert(RecurringRule).values(user_id=USER, pattern='monthly', interval=1, next_run=date(2025, 7, 5), start_date=date(2024, 1, 5), account_id=1, category_id=1, type='income', amount=Decimal('5000.00')))
+        await session.execute(insert(Budget).values(user_id=USER, month=date(2025, 6, 1), category_id=2, limit_amount=Decimal('400.00')))
+        await session.commit()
+        forecast = await ForecastService(ForecastRepository(session), USER).forecast(1, today=date(2025, 6, 10), history_months=5)
+    await engine.dispose()
+    checking, card = forecast
+    assert checking['current_balance'] == Decimal('29200.00') and card['current_balance'] == Decimal('-3600.00')
+    assert len(checking['points']) == 31 and checking['points'][-1]['date'] == date(2025, 7, 10)
+    today, salary_eve, salary_day, last = (checking['points'][i] for i in (0, 24, 25, 30))
+    assert today['balance'] == today['low'] == today['high'] == Decimal('29200.00')
+    # A regra explica toda a média do salário; Lazer sai a 300/mês, distribuído por dia.
+    assert abs(salary_day['balance'] - salary_eve['balance'] - Decimal('4990.32')) <= Decimal('0.01')
+    assert last['balance'] == Decimal('29200.00') + Decimal('5000.00') - Decimal('200.00') - Decimal('96.77')
+    assert last['low'] == last['balance'] == last['high']
+    # Mercado: média de 580 nos 5 meses, limitada ao orçamento de Casa (400) em junho e julho.
+    assert card['points'][-1]['balance'] == Decimal('-3600.00') - Decimal('266.67') - Decimal('129.03')
+    assert card['points'][-1]['low'] < card['points'][-1]['balance'] < card['points'][-1]['high']
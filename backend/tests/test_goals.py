@@ -0,0 +1,72 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.category import Category
+from app.repositories.goals import GoalRepository
+from app.repositories.transactions import TransactionRepository
+from app.schemas.goal import GoalCreate, GoalLinkBase, GoalUpdate
+from app.schemas.transaction import TransactionCreate
+from app.services.goals import GoalService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000002')
+TODAY = date(2025, 6, 15)
+
+def _txn(account_id, category_id, type_, amount, day):
+    return TransactionCreate(account_id=account_id, category_id=category_id, type=type_, amount=Decimal(amount), date=day)
+
+@pytest.mark.anyio
+async def test_goal_progress_from_links():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': 1, 'user_id': USER, 'name': 'Corrente', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0}, {'id': 2, 'user_id': USER, 'name': 'Poupança', 'type': 'savings', 'currency': 'BRL', 'initial_balance': 0}])
+        await conn.execute(insert(Category), [
+            {'id': 1, 'user_id': USER, 'name': 'Salário', 'type': 'income', 'parent_id': None},
+            {'id': 2, 'user_id': USER, 'name': 'Investimentos', 'type': 'expense', 'parent_id': None},
+            {'id': 3, 'user_id': USER, 'name': 'Tesouro', 'type': 'expense', 'parent_id': 2},
+        ])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await TransactionRepository(session).bulk_create(USER, [
+            # Conta 2: fevereiro fica antes do início da meta; junho entra no total, mas não no ritmo.
+            _txn(2, 1, 'income', '500.00', date(2025, 2, 10)),
+            _txn(2, 1, 'income', '200.00', date(2025, 3, 10)),
+            _txn(2, None, 'income', '200.00', date(2025, 4, 10)),
+            _txn(2, 1, 'income', '100.00', date(2025, 5, 10)),
+            _txn(2, None, 'expense', '50.00', date(2025, 5, 11)),
+            _txn(2, 1, 'income', '30.00', date(2025, 6, 1)),
+            # Categoria 2 com a subcategoria, em qualquer conta: despesa aplicada é contribuição.
+            _txn(1, 3, 'expense', '100.00', date(2025, 4, 5)),
+            _txn(1, 2, 'expense', '40.00', date(2025, 5, 5)),
+            _txn(1, 1, 'income', '3000.00', date(2025, 5, 1)),
+        ])
+        service = GoalService(GoalRepository(session), user_id=USER)
+        savings = await service.create_goal(GoalCreate(name='Reserva', target_amount=Decimal('1000.00'), target_date=date(2025, 12, 31), initial_amount=Decimal('100.00'), start_date=date(2025, 3, 10), links=[GoalLinkBase(account_id=2)]))
+        invest = await service.create_goal(GoalCreate(name='Viagem', target_amount=Decimal('1000.00'), target_date=date(2025, 7, 31), start_date=date(2025, 1, 1), links=[GoalLinkBase(category_id=2)]))
+        await service.create_goal(GoalCreate(name='Quitada', target_amount=Decimal('100.00'), target_date=date(2025, 8, 1), initial_amount=Decimal('200.00'), start_date=date(2025, 6, 1)))
+
+        goals = {goal.name: goal for goal in await service.list_goals(TODAY)}
+        reserva = goals['Reserva']
+        assert (reserva.contributed, reserva.current_amount, reserva.remaining, reserva.percent) == (Decimal('480.00'), Decimal('580.00'), Decimal('420.00'), Decimal('58.00'))
+        # 420 em 7 meses (junho a dezembro); ritmo de 150/mês (março a maio) termina em ~86 dias.
+        assert (reserva.monthly_rate, reserva.required_monthly, reserva.projected_completion, reserva.on_track) == (Decimal('150.00'), Decimal('60.00'), date(2025, 9, 9), True)
+        assert reserva.links == [GoalLinkBase(account_id=2)]
+        viagem = goals['Viagem']
+        assert (viagem.contributed, viagem.monthly_rate, viagem.required_monthly, viagem.on_track) == (Decimal('140.00'), Decimal('46.67'), Decimal('430.00'), False)
+        quitada = goals['Quitada']
+        assert (quitada.remaining, quitada.monthly_rate, quitada.projected_completion, quitada.on_track) == (Decimal('0.00'), Decimal('0.00'), None, True)
+
+        # Vínculo da subcategoria só na conta 1; sem start_date, mantém o início.
+        updated = await service.update_goal(invest.id, GoalUpdate(name='Viagem 2026', target_amount=Decimal('1000.00'), target_date=date(2026, 7, 31), links=[GoalLinkBase(account_id=1, category_id=3)]))
+        assert (updated.contributed, updated.start_date, updated.name) == (Decimal('100.00'), date(2025, 1, 1), 'Viagem 2026')
+        assert (await service.get_goal(invest.id, TODAY)).links == [GoalLinkBase(account_id=1, category_id=3)]
+        assert await service.missing_reference(GoalCreate(name='x', target_amount=1, target_date=TODAY, links=[GoalLinkBase(category_id=99)])) == 'Category not found'
+        assert await service.delete_goal(savings.id)
+        assert await service.get_goal(savings.id) is None
+    await engine.dispose()
@@ -0,0 +1,100 @@
+import io
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.repositories.transactions import TransactionRepository
+from app.services import imports
+from app.services.imports import READ_SIZE, ImportService, csv_to_transaction, iter_csv_records, iter_lines, iter_ofx_records, ofx_to_transaction
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000008')
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename='extrato.csv')
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+@pytest.mark.anyio
+async def test_iter_lines_keeps_crlf_split_across_blocks():
+    first = 'a' * (READ_SIZE - 1) + '\r'
+    data = (first + '\nsegunda\r\nterceira').encode()
+    assert data[READ_SIZE - 1:READ_SIZE + 1] == b'\r\n'
+    assert await _collect(iter_lines(_upload(data))) == ['a' * (READ_SIZE - 1) + '\r\n', 'segunda\r\n', 'terceira']
+    # Caractere multibyte cortado no limite do bloco.
+    data = ('x' * (READ_SIZE - 1) + 'ç\n').encode()
+    assert await _collect(iter_lines(_upload(data))) == ['x' * (READ_SIZE - 1) + 'ç\n']
+
+@pytest.mark.anyio
+async def test_csv_and_ofx_parsers():
+    csv_data = '﻿Data;Valor;Descrição\r\n10/05/2025;-1.234,56;"Aluguel\r\nmaio"\r\n\r\n2025-05-11;R$ 99,90;Reembolso\r\n'.encode()
+    records = await _collect(iter_csv_records(iter_lines(_upload(csv_data))))
+    assert records == [(2, {'data': '10/05/2025', 'valor': '-1.234,56', 'descrição': 'Aluguel\r\nmaio'}), (5, {'data': '2025-05-11', 'valor': 'R$ 99,90', 'descrição': 'Reembolso'})]
+    rent, refund = (csv_to_transaction(1, record) for _, record in records)
+    assert (rent.type, rent.amount, rent.date) == ('expense', Decimal('1234.56'), date(2025, 5, 10))
+    assert (refund.type, refund.amount, refund.date) == ('income', Decimal('99.90'), date(2025, 5, 11))
+
+    ofx_data = b'OFXHEADER:100\n<OFX><BANKTRANLIST>\n<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250510120000[-3:BRT]\n<TRNAMT>-45.00\n<NAME>Padaria\n</STMTTRN>\n<STMTTRN><DTPOSTED>20250511<TRNAMT>10.5<MEMO>Pix</STMTTRN>\n</BANKTRANLIST></OFX>\n'
+    records = await _collect(iter_ofx_records(iter_lines(_upload(ofx_data))))
+    assert [line_no for line_no, _ in records] == [3, 9]
+    bakery, pix = (ofx_to_transaction(1, record) for _, record in records)
+    assert (bakery.type, bakery.amount, bakery.date, bakery.description) == ('expense', Decimal('45.00'), date(2025, 5, 10), 'Padaria')
+    assert (pix.type, pix.amount, pix.date, pix.description) == ('income', Decimal('10.5'), date(2025, 5, 11), 'Pix')
+
+@pytest.mark.anyio
+async def test_unsorted_statement_keeps_identical_same_day_rows():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+    # Dois cafés iguais no dia 10, separados por uma linha de outro dia; o arquivo não está ordenado.
+    data = b'date,amount,description\n2025-05-10,-5.00,Cafe\n2025-05-09,-20.00,Mercado\n2025-05-10,-5.00,Cafe\nbad,1,x\n2025-05-08,100.00,Pix\n'
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = ImportService(TransactionRepository(session), user_id=USER)
+        result = await service.import_statement(_upload(data), 1, 'csv')
+        assert (result.imported, result.duplicates, result.failed, [e.line for e in result.errors]) == (4, 0, 1, [5])
+        # Reimportar, mesmo em outra ordem, não duplica nada.
+        lines = data.splitlines(keepends=True)
+        result = await service.import_statement(_upload(lines[0] + b''.join(reversed(lines[1:]))), 1, 'csv')
+        assert (result.imported, result.duplicates) == (0, 4)
+        days = (await session.scalars(select(Transaction.date).order_by(Transaction.date))).all()
+        assert days == [date(2025, 5, 8), date(2025, 5, 9), date(2025, 5, 10), date(2025, 5, 10)]
+    await engine.dispose()
+
+@pytest.mark.anyio
+async def test_sorted_statement_is_counted_per_day_and_a_late_row_triggers_one_recount(monkeypatch):
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+    monkeypatch.setattr(imports, 'IMPORT_CHUNK_SIZE', 500)
+    recounts = []
+    count_before = ImportService._count_before
+
+    async def spy(self, *args):
+        recounts.append(args[-1])
+        return await count_before(self, *args)
+
+    monkeypatch.setattr(ImportService, '_count_before', spy)
+    # Três cafés idênticos por dia, em ordem de data; o arquivo passa de um bloco de leitura.
+    sorted_rows = b'date,amount,description\n' + b''.join(f'{date(2025, 1, 1) + timedelta(days=i // 3)},-5.00,Cafe\n'.encode() for i in range(3000))
+    assert len(sorted_rows) > READ_SIZE
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        service = ImportService(TransactionRepository(session), user_id=USER)
+        result = await service.import_statement(_upload(sorted_rows), 1, 'csv')
+        assert (result.imported, result.duplicates, recounts) == (3000, 0, [])
+        # Um quarto café do primeiro dia no fim do arquivo: o início é recontado uma única vez.
+        late = sorted_rows + b'2025-01-01,-5.00,Cafe\n'
+        result = await service.import_statement(_upload(late), 1, 'csv')
+        assert (result.imported, result.duplicates, recounts) == (1, 3000, [3002])
+        result = await service.import_statement(_upload(late), 1, 'csv')
+        assert (result.imported, result.duplicates) == (0, 3001)
+    await engine.dispose()
@@ -0,0 +1,51 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import metrics
+from app.core.metrics import Histogram, Metrics, MetricsMiddleware, instrument_engine
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency_seconds', 'Latência.', (0.1, 1.0), ('route',))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, '/a"b')
+    assert list(histogram.render())[2:] == [
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a\\"b"} 3.65',
+        'latency_seconds_count{route="/a\\"b"} 4',
+    ]
+
+@pytest.mark.anyio
+async def test_requests_record_route_queries_and_n_plus_one(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, '_metrics', Metrics(slow_query_ms=0, n_plus_one_threshold=3))
+    engine = create_async_engine('sqlite+aiosqlite://')
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get('/items/{item_id}')
+    async def item(item_id: int):
+        async with engine.connect() as conn:
+            for _ in range(item_id):
+                await conn.execute(text('SELECT 1'))
+        return {}
+
+    caplog.set_level(logging.WARNING, logger='app.core.metrics')
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+        await client.get('/items/1')
+        await client.get('/items/4')
+        await client.get('/missing')
+    await engine.dispose()
+    text_format = metrics.get_metrics().render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in text_format
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in text_format
+    assert 'http_request_db_queries_sum{method="GET",route="/items/{item_id}"} 5' in text_format
+    assert 'db_slow_queries_total{route="/items/{item_id}"} 5' in text_format
+    assert 'db_repeated_statements_total{route="/items/{item_id}"} 1' in text_format
+    assert any('Possible N+1 on GET /items/{item_id}: 4 executions of SELECT 1' in r.getMessage() for r in caplog.records)
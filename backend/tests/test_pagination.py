@@ -0,0 +1,47 @@
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.deps import get_current_user, get_db
+from app.api.routers import transactions
+from app.core.pagination import decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+from app.services.transactions import TransactionService
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor(date(2025, 5, 10), 42)
+    assert decode_cursor(cursor) == (date(2025, 5, 10), 42)
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+def test_search_cursor_roundtrip_and_kind_mismatch():
+    cursor = encode_search_cursor(Decimal('1.2500'), date(2025, 5, 10), 42)
+    assert decode_search_cursor(cursor) == (Decimal('1.2500'), date(2025, 5, 10), 42)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+    with pytest.raises(ValueError):
+        decode_search_cursor(encode_cursor(date(2025, 5, 10), 42))
+
+@pytest.mark.anyio
+async def test_only_cursor_errors_become_400(monkeypatch):
+    app = FastAPI()
+    app.include_router(transactions.router)
+    app.dependency_overrides[get_current_user] = lambda: {'id': uuid.uuid4()}
+    app.dependency_overrides[get_db] = lambda: None
+
+    async def failing_list(self, *args, **kwargs):
+        raise ValueError('query layer')
+
+    monkeypatch.setattr(TransactionService, 'list_transactions', failing_list)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url='http://t') as client:
+        response = await client.get('/transactions/', params={'cursor': 'not-a-cursor'})
+        assert (response.status_code, response.json()) == (400, {'detail': 'Invalid cursor'})
+        # Um cursor de listagem usado numa busca também é inválido.
+        assert (await client.get('/transactions/', params={'cursor': encode_cursor(date(2025, 5, 10), 42), 'q': 'mercado'})).status_code == 400
+        assert (await client.get('/transactions/', params={'cursor': encode_cursor(date(2025, 5, 10), 42)})).status_code == 500
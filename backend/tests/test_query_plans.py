@@ -0,0 +1,124 @@
+
+"""Verifica via EXPLAIN que as consultas mais frequentes usam os índices compostos.
+
+Roda sempre contra SQLite e, se `TEST_POSTGRES_URL` estiver definida, também contra Postgres, onde
+`transactions` é particionada por ano.
+"""
+import os
+import random
+import re
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base import Base
+from app.db.partitions import ensure_partitions
+from app.models.account import Account
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.repositories.rows import fingerprint_columns
+from app.repositories.transactions import TransactionRepository
+
+USERS = 50
+TRANSACTIONS_PER_USER = 1000
+
+ENGINE_URLS = ['sqlite+aiosqlite://']
+if os.getenv('TEST_POSTGRES_URL'):
+    ENGINE_URLS.append(os.environ['TEST_POSTGRES_URL'])
+
+def _uuid() -> uuid.UUID:
+    # Hex com letras: o SQLite daria afinidade numérica a um UUID só de dígitos.
+    return uuid.UUID('a' + uuid.uuid4().hex[1:])
+
+async def _seed(conn) -> uuid.UUID:
+    rnd = random.Random(42)
+    users = [_uuid() for _ in range(USERS)]
+    await conn.execute(insert(Account), [{'id': i + 1, 'user_id': u, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i, u in enumerate(users)])
+    await conn.execute(insert(Category), [{'id': i + 1, 'user_id': u, 'name': 'Mercado', 'type': 'expense'} for i, u in enumerate(users)])
+    start = date(2015, 1, 1)
+    rows = []
+    for i, u in enumerate(users):
+        for _ in range(TRANSACTIONS_PER_USER):
+            rows.append({'user_id': u, 'account_id': i + 1, 'category_id': i + 1, 'type': 'expense', 'amount': rnd.randint(100, 50000) / 100, 'date': start + timedelta(days=rnd.randint(0, 3650))})
+    await conn.execute(insert(Transaction), rows)
+    await conn.execute(insert(Budget), [{'user_id': u, 'month': date(2024, m, 1), 'category_id': i + 1, 'limit_amount': 500} for i, u in enumerate(users) for m in range(1, 13)])
+    return users[0]
+
+async def _plan(conn, stmt) -> str:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        result = await conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)
+        return '\n'.join(row[-1] for row in result)
+    result = await conn.exec_driver_sql('EXPLAIN ' + sql)
+    plan = '\n'.join(row[0] for row in result)
+    # Cada partição tem a sua cópia do índice, com nome derivado das colunas: volta ao nome do índice da tabela.
+    children = await conn.exec_driver_sql("SELECT c.relname, p.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent WHERE c.relkind = 'i'")
+    for child, parent in children:
+        plan = re.sub(rf'\b{child}\b', parent, plan)
+    return plan
+
+def _uses_index(plan: str, index_name: str, ordered: bool) -> bool:
+    # No SQLite, `SCAN CONSTANT ROW` é o SELECT sem FROM que envolve subconsultas escalares, não uma varredura.
+    if 'Seq Scan' in plan or any(line.strip().startswith('SCAN') and 'CONSTANT ROW' not in line for line in plan.splitlines()):
+        return False
+    # A paginação só é barata se o índice já entrega as linhas na ordem do ORDER BY.
+    if ordered and ('TEMP B-TREE' in plan or re.search(r'\bSort  \(', plan)):
+        return False
+    return index_name in plan
+
+def _hot_queries(user_id: uuid.UUID):
+    repo = TransactionRepository(None)
+    return [
+        ('ix_transactions_user_date_id', True, repo._list_stmt(user_id).limit(101)),
+        ('ix_transactions_user_date_id', True, repo._list_stmt(user_id, after=(date(2020, 1, 1), 10**9)).limit(101)),
+        ('ix_transactions_user_account_date', False, repo._list_stmt(user_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), account_id=1)),
+        ('ix_transactions_user_category_date', False, repo._list_stmt(user_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), category_id=1)),
+        ('ix_transactions_user_updated_at', False, select(*fingerprint_columns(Transaction, Transaction.user_id == user_id))),
+        ('ix_budgets_user_month', False, select(Budget).where(Budget.user_id == user_id, Budget.month == date(2024, 5, 1))),
+    ]
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('url', ENGINE_URLS)
+async def test_hot_queries_use_indexes(url):
+    engine = create_async_engine(url, future=True)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            user_id = await _seed(conn)
+            if conn.dialect.name == 'postgresql':
+                await conn.run_sync(ensure_partitions, date(2015, 1, 1), date(2024, 12, 31), 'year')
+            await conn.exec_driver_sql('ANALYZE')
+            for index_name, ordered, stmt in _hot_queries(user_id):
+                plan = await _plan(conn, stmt)
+                assert _uses_index(plan, index_name, ordered), f'{index_name} não usado:\n{plan}'
+            await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
+
+@pytest.mark.anyio
+@pytest.mark.skipif(not os.getenv('TEST_POSTGRES_URL'), reason='particionamento só existe no Postgres')
+async def test_date_filters_prune_partitions():
+    engine = create_async_engine(os.environ['TEST_POSTGRES_URL'], future=True)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            user_id = await _seed(conn)
+            # As linhas semeadas estão na DEFAULT; criar as partições as move para lá.
+            assert len(await conn.run_sync(ensure_partitions, date(2015, 1, 1), date(2024, 12, 31), 'year')) == 10
+            assert (await conn.exec_driver_sql('SELECT count(*) FROM transactions_default')).scalar() == 0
+            await conn.exec_driver_sql('ANALYZE')
+            repo = TransactionRepository(None)
+            plan = await _plan(conn, repo._list_stmt(user_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)))
+            assert set(re.findall(r'on (transactions_\w+)', plan)) == {'transactions_2024'}, plan
+            # Página seguinte: o cursor limita a data por cima, então só entram os anos até o dele.
+            plan = await _plan(conn, repo._list_stmt(user_id, after=(date(2016, 6, 1), 10**9)).limit(101))
+            assert set(re.findall(r'on (transactions_\w+)', plan)) == {'transactions_2015', 'transactions_2016', 'transactions_default'}, plan
+            await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
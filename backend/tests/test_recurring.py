@@ -0,0 +1,78 @@
+
+import asyncio
+import os
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.account_balance import AccountBalance
+from app.models.budget import Budget  # noqa: F401
+from app.models.category import Category  # noqa: F401
+from app.models.recurring_rule import RecurringRule
+from app.models.transaction import Transaction
+from app.repositories.recurring import RecurringRuleRepository
+from app.services.recurring import RecurringService, add_months
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+
+ENGINE_URLS = ['sqlite+aiosqlite://']
+if os.getenv('TEST_POSTGRES_URL'):
+    ENGINE_URLS.append(os.environ['TEST_POSTGRES_URL'])
+
+def test_add_months_keeps_anchor_day():
+    assert add_months(date(2025, 1, 31), 1, 31) == date(2025, 2, 28)
+    assert add_months(date(2025, 2, 28), 1, 31) == date(2025, 3, 31)
+    assert add_months(date(2024, 2, 29), 12, 29) == date(2025, 2, 28)
+    assert add_months(date(2025, 11, 15), 3, 15) == date(2026, 2, 15)
+
+def _rule(**values):
+    return {'user_id': USER, 'account_id': 1, 'type': 'expense', 'amount': Decimal('10.00'), 'interval': 1, 'start_date': None, 'end_date': None, 'description': None, **values}
+
+async def _run(sessionmaker, today: date, batch_size: int) -> int:
+    inserted = 0
+    while True:
+        async with sessionmaker() as session:
+            rules, count = await RecurringService(RecurringRuleRepository(session)).run_batch(today, batch_size)
+        if not rules:
+            return inserted
+        inserted += count
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('url', ENGINE_URLS)
+async def test_materializes_missed_occurrences_once(url):
+    engine = create_async_engine(url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+            await conn.execute(insert(RecurringRule), [
+                _rule(id=1, pattern='monthly', next_run=date(2025, 1, 31), start_date=date(2025, 1, 31), description='Aluguel'),
+                _rule(id=2, pattern='weekly', interval=2, next_run=date(2025, 3, 3), end_date=date(2025, 4, 1)),
+                _rule(id=3, pattern='daily', next_run=date(2025, 4, 1), type='income'),
+                _rule(id=4, pattern='hourly', next_run=date(2025, 1, 1)),
+                _rule(id=5, pattern='monthly', next_run=date(2025, 1, 1), account_id=None),
+            ])
+        today = date(2025, 4, 5)
+        # Duas réplicas disputando as mesmas regras em lotes pequenos.
+        counts = await asyncio.gather(_run(sessionmaker, today, 2), _run(sessionmaker, today, 2))
+        assert sum(counts) == 3 + 3 + 5
+        assert await _run(sessionmaker, today, 2) == 0
+        async with sessionmaker() as session:
+            dates = (await session.execute(select(Transaction.date).where(Transaction.description == 'Aluguel').order_by(Transaction.date))).scalars().all()
+            next_runs = dict((await session.execute(select(RecurringRule.id, RecurringRule.next_run))).all())
+            balance = (await session.execute(select(func.sum(AccountBalance.net_change)))).scalar_one()
+        assert dates == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)]
+        assert next_runs == {1: date(2025, 4, 30), 2: date(2025, 4, 14), 3: date(2025, 4, 6), 4: date(2025, 1, 1), 5: date(2025, 1, 1)}
+        assert balance == Decimal('-10.00')
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,133 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.deps import get_current_user, get_db
+from app.core import cache
+from app.core.cache import TRANSACTIONS, MemoryBackend, ResponseCache, get_response_cache
+from app.db import session as db_session
+from app.db.session import ReplicaRouter, RoutedSession
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000011')
+
+async def _database(path, name: str):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    async with engine.begin() as conn:
+        await conn.execute(text('CREATE TABLE source (name TEXT)'))
+        await conn.execute(text('INSERT INTO source VALUES (:name)'), {'name': name})
+    return engine
+
+def _router(primary, replicas, pin_seconds: float = 60) -> ReplicaRouter:
+    return ReplicaRouter(async_sessionmaker(bind=primary, expire_on_commit=False, class_=AsyncSession), async_sessionmaker(expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutedSession), replicas, pin_seconds, retry_seconds=60)
+
+@pytest.mark.anyio
+async def test_reads_go_to_replica_until_the_user_writes(tmp_path, monkeypatch):
+    primary = await _database(tmp_path / 'primary.db', 'primary')
+    replica = await _database(tmp_path / 'replica.db', 'replica')
+    monkeypatch.setattr(db_session, 'replicas', _router(primary, [replica], pin_seconds=0.2))
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {'id': app.state.user}
+
+    @app.api_route('/source', methods=['GET', 'POST'])
+    async def source(db: AsyncSession = Depends(get_db)):
+        return await db.scalar(text('SELECT name FROM source'))
+
+    async def request(method: str, user: str) -> str:
+        app.state.user = user
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+            return (await client.request(method, '/source')).json()
+
+    assert await request('GET', 'a') == 'replica'
+    assert await request('POST', 'a') == 'primary'
+    # Read-your-writes: só quem escreveu passa a ler do primário, até a janela expirar.
+    assert await request('GET', 'a') == 'primary'
+    assert await request('GET', 'b') == 'replica'
+    await asyncio.sleep(0.25)
+    assert await request('GET', 'a') == 'replica'
+    assert db_session.replicas.stats()['reads'] == {'replica': 3, 'primary': 0, 'pinned': 1}
+    await primary.dispose()
+    await replica.dispose()
+
+@pytest.mark.anyio
+async def test_failing_replica_is_marked_down_and_reads_move_on(tmp_path, monkeypatch):
+    primary = await _database(tmp_path / 'primary.db', 'primary')
+    replica = await _database(tmp_path / 'replica.db', 'replica')
+    broken = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/missing/replica.db')
+    router = _router(primary, [broken, replica])
+    monkeypatch.setattr(db_session, 'replicas', router)
+    checkouts = []
+    event.listen(replica.sync_engine, 'checkout', lambda *args: checkouts.append(1))
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {'id': 'a'}
+
+    @app.get('/source')
+    async def source(db: AsyncSession = Depends(get_db)):
+        return await db.scalar(text('SELECT name FROM source'))
+
+    async def read() -> str:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+            return (await client.get('/source')).json()
+
+    # Saúde passiva: só a consulta real revela a réplica fora, e essa requisição falha.
+    with pytest.raises(OperationalError):
+        await read()
+    assert [await read() for _ in range(3)] == ['replica'] * 3
+    # Sem conexão de teste: uma leitura, um checkout.
+    assert len(checkouts) == 3
+    assert router.stats() == {'replicas': 2, 'healthy': 1, 'reads': {'replica': 4, 'primary': 0, 'pinned': 0}, 'failures': 1, 'pinned_users': 0}
+    router.mark_down(replica, RuntimeError('lag'))
+    assert await read() == 'primary'
+    await primary.dispose()
+    await replica.dispose()
+    await broken.dispose()
+
+@pytest.mark.anyio
+async def test_sessions_connect_only_when_used():
+    before = db_session.pool_wait.count
+    sessions = db_session.get_session('a')
+    session = await sessions.__anext__()
+    # Uma requisição que não consulta o banco (cache, 304) não pede conexão ao pool.
+    assert not session.in_transaction()
+    await sessions.aclose()
+    assert db_session.pool_wait.count == before
+    sessions = db_session.get_session('a')
+    session = await sessions.__anext__()
+    assert await session.scalar(text('SELECT 1')) == 1
+    await session.scalar(text('SELECT 2'))
+    await sessions.aclose()
+    assert db_session.pool_wait.count == before + 1
+
+@pytest.mark.anyio
+async def test_job_bump_pins_the_user_so_the_cache_never_stores_a_stale_replica_read(tmp_path, monkeypatch):
+    primary = await _database(tmp_path / 'primary.db', 'old')
+    # Réplica atrasada: continua com o valor antigo depois da escrita no primário.
+    replica = await _database(tmp_path / 'replica.db', 'old')
+    monkeypatch.setattr(db_session, 'replicas', _router(primary, [replica]))
+    monkeypatch.setattr(cache, '_response_cache', ResponseCache(MemoryBackend(1 << 20), ttl=300))
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {'id': USER}
+
+    @app.get('/source')
+    async def source(db: AsyncSession = Depends(get_db)):
+        return await get_response_cache().respond(USER, 'transactions', {}, lambda: db.scalar(text('SELECT name FROM source')))
+
+    async def read() -> str:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+            return (await client.get('/source')).json()
+
+    assert await read() == 'old'
+    # Escrita de um job, fora de qualquer requisição: só o bump avisa o roteador.
+    async with primary.begin() as conn:
+        await conn.execute(text("UPDATE source SET name = 'new'"))
+    await get_response_cache().bump_users([USER], TRANSACTIONS)
+    assert await read() == 'new'
+    assert await read() == 'new'
+    assert db_session.replicas.stats()['reads'] == {'replica': 1, 'primary': 0, 'pinned': 1}
+    await primary.dispose()
+    await replica.dispose()
@@ -0,0 +1,59 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.repositories.reports import ReportRepository
+from app.services.reports import ReportService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000003')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000004')
+
+ROWS = [
+    # (usuário, conta, categoria, tipo, valor, data)
+    (USER, 1, 1, 'income', '3000.00', date(2025, 4, 30)),
+    (USER, 1, 2, 'expense', '120.50', date(2025, 4, 30)),
+    (USER, 1, 2, 'expense', '79.50', date(2025, 5, 2)),
+    (USER, 2, None, 'expense', '45.00', date(2025, 5, 2)),
+    (USER, 2, 2, 'expense', '10.00', date(2025, 6, 1)),
+    (OTHER, 3, None, 'expense', '999.00', date(2025, 5, 2)),
+]
+
+@pytest.mark.anyio
+async def test_report_totals_and_filters_on_sqlite():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': owner, 'name': f'Conta {i}', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i, owner in ((1, USER), (2, USER), (3, OTHER))])
+        await conn.execute(insert(Category), [{'id': 1, 'user_id': USER, 'name': 'Salário', 'type': 'income'}, {'id': 2, 'user_id': USER, 'name': 'Mercado', 'type': 'expense'}])
+        await conn.execute(insert(Transaction), [{'user_id': u, 'account_id': a, 'category_id': c, 'type': t, 'amount': Decimal(v), 'date': d} for u, a, c, t, v, d in ROWS])
+    async with AsyncSession(engine) as session:
+        service = ReportService(ReportRepository(session), user_id=USER)
+
+        summary = await service.summary()
+        assert [(r.type, r.total, r.count) for r in summary] == [('expense', Decimal('255.00'), 4), ('income', Decimal('3000.00'), 1)]
+        by_category = await service.by_category()
+        assert [(r.category_id, r.category_name, r.type, r.total, r.count) for r in by_category] == [(1, 'Salário', 'income', Decimal('3000.00'), 1), (2, 'Mercado', 'expense', Decimal('210.00'), 3), (None, None, 'expense', Decimal('45.00'), 1)]
+
+        # A virada do mês (30/04 e 02/05) separa os períodos; o outro usuário nunca entra.
+        by_month = await service.by_month()
+        assert [(r.period, r.type, r.total, r.count) for r in by_month] == [
+            (date(2025, 4, 1), 'expense', Decimal('120.50'), 1),
+            (date(2025, 4, 1), 'income', Decimal('3000.00'), 1),
+            (date(2025, 5, 1), 'expense', Decimal('124.50'), 2),
+            (date(2025, 6, 1), 'expense', Decimal('10.00'), 1),
+        ]
+        by_day = await service.by_day(start_date=date(2025, 5, 1))
+        assert [(r.period, r.type, r.total, r.count) for r in by_day] == [(date(2025, 5, 2), 'expense', Decimal('124.50'), 2), (date(2025, 6, 1), 'expense', Decimal('10.00'), 1)]
+
+        assert [(r.type, r.total) for r in await service.summary(end_date=date(2025, 4, 30))] == [('expense', Decimal('120.50')), ('income', Decimal('3000.00'))]
+        assert [(r.period, r.total) for r in await service.by_month(account_id=2)] == [(date(2025, 5, 1), Decimal('45.00')), (date(2025, 6, 1), Decimal('10.00'))]
+        assert [(r.period, r.total) for r in await service.by_month(category_id=2, start_date=date(2025, 5, 1), end_date=date(2025, 5, 31))] == [(date(2025, 5, 1), Decimal('79.50'))]
+    await engine.dispose()
@@ -0,0 +1,26 @@
+
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.core.responses import ORJSONResponse
+from app.schemas.transaction import TransactionRead
+
+class _DriverUUID(uuid.UUID):
+    """Simula a subclasse de UUID devolvida pelo asyncpg."""
+
+def test_orjson_response_matches_pydantic_json():
+    now = datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    rows = [
+        {'id': 1, 'user_id': _DriverUUID(int=1), 'account_id': 1, 'type': 'expense', 'amount': Decimal('10.10'), 'date': date(2025, 1, 2), 'description': 'Café', 'category_id': None, 'merchant': None, 'created_at': now, 'updated_at': now},
+        {'id': 2, 'user_id': uuid.UUID(int=1), 'account_id': 1, 'type': 'income', 'amount': Decimal('12345678.90'), 'date': date(2024, 12, 31), 'description': None, 'category_id': 3, 'merchant': 'Loja', 'created_at': now.replace(tzinfo=None), 'updated_at': now.replace(tzinfo=None)},
+    ]
+    adapter = TypeAdapter(List[TransactionRead])
+    items = adapter.validate_python(rows)
+    body = ORJSONResponse(items).body
+    assert json.loads(body) == json.loads(adapter.dump_json(items))
+    assert b'"amount":"10.10"' in body and b'"amount":"12345678.90"' in body
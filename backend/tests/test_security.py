@@ -0,0 +1,85 @@
+
+import asyncio
+import json
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.core import security
+
+AUDIENCE = 'authenticated'
+
+def _key(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(private.public_key()))
+    jwk.update(kid=kid, alg='RS256', use='sig')
+    return private, jwk
+
+def _token(private, kid: str) -> str:
+    return jwt.encode({'sub': 'user', 'aud': AUDIENCE, 'exp': int(time.time()) + 60}, private, algorithm='RS256', headers={'kid': kid})
+
+@pytest.fixture()
+def jwks_server():
+    state = {'keys': [], 'calls': 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state['calls'] += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={'keys': state['keys']})
+
+    security._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield state
+    security._http_client = None
+
+@pytest.mark.anyio
+async def test_concurrent_refresh_is_single_flight(jwks_server):
+    private, jwk = _key('k1')
+    jwks_server['keys'] = [jwk]
+    cache = security.JWKSCache('https://example/jwks', ttl=300, max_stale=3600)
+    keys = await asyncio.gather(*(cache.get_signing_key('k1') for _ in range(50)))
+    assert jwks_server['calls'] == 1
+    assert jwt.decode(_token(private, 'k1'), keys[0].key, audience=AUDIENCE, algorithms=['RS256'])['sub'] == 'user'
+
+@pytest.mark.anyio
+async def test_expired_cache_serves_stale_and_refreshes_in_background(jwks_server):
+    _, jwk = _key('k1')
+    jwks_server['keys'] = [jwk]
+    cache = security.JWKSCache('https://example/jwks', ttl=300, max_stale=3600)
+    await cache.get_signing_key('k1')
+    cache.fetched_at -= 301
+    cache.last_attempt -= 301
+    await asyncio.gather(*(cache.get_signing_key('k1') for _ in range(50)))
+    # As requisições foram atendidas com a chave antiga antes do refresh terminar.
+    assert not cache._refresh.done()
+    await cache._refresh
+    assert jwks_server['calls'] == 2
+
+@pytest.mark.anyio
+async def test_unknown_kid_forces_refresh(jwks_server):
+    _, jwk1 = _key('k1')
+    _, jwk2 = _key('k2')
+    jwks_server['keys'] = [jwk1]
+    cache = security.JWKSCache('https://example/jwks', ttl=300, max_stale=3600)
+    await cache.get_signing_key('k1')
+    jwks_server['keys'] = [jwk1, jwk2]
+    assert (await cache.get_signing_key('k2')).key_id == 'k2'
+    assert jwks_server['calls'] == 2
+    with pytest.raises(jwt.InvalidTokenError):
+        await cache.get_signing_key('k3')
+    assert jwks_server['calls'] == 2
+
+def test_token_cache_expires_with_token_and_evicts_lru():
+    cache = security.TokenCache(maxsize=2)
+    now = int(time.time())
+    cache.put('a', {'sub': 'a', 'exp': now + 60})
+    cache.put('b', {'sub': 'b', 'exp': now - 1})
+    assert cache.get('a')['sub'] == 'a'
+    assert cache.get('b') is None
+    cache.put('c', {'sub': 'c', 'exp': now + 60})
+    cache.put('d', {'sub': 'd', 'exp': now + 60})
+    assert cache.get('a') is None
+    assert cache.stats() == {'size': 2, 'hits': 1, 'misses': 2, 'evictions': 1}
@@ -0,0 +1,69 @@
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.tag import TransactionTag
+from app.repositories.accounts import AccountRepository
+from app.repositories.reports import ReportRepository
+from app.repositories.tags import normalize_tags
+from app.repositories.transactions import TransactionRepository
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+OTHER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000002')
+
+def _txn(amount: str, tags=None, account_id: int = 1) -> TransactionCreate:
+    return TransactionCreate(account_id=account_id, type='expense', amount=Decimal(amount), date=date(2025, 5, 1), tags=tags)
+
+def test_normalize_tags():
+    assert normalize_tags([' casa', 'casa ', '', '  ', 'Mercado']) == ['casa', 'Mercado']
+    assert normalize_tags(None) == []
+
+@pytest.mark.anyio
+async def test_tags_are_stored_filtered_and_aggregated():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': 1, 'user_id': USER, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0}, {'id': 2, 'user_id': OTHER, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0}])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        repo = TransactionRepository(session)
+        first = await repo.create(USER, _txn('10.00', ['casa', ' mercado ']))
+        assert first.tags == ['casa', 'mercado']
+        created = await repo.bulk_create(USER, [_txn('5.00', ['casa']), _txn('2.00')])
+        assert [t.tags for t in created] == [['casa'], None]
+        await repo.create(OTHER, _txn('99.00', ['casa'], account_id=2))
+        updated = await repo.update(USER, first.id, TransactionUpdate(**_txn('10.00').model_dump(exclude={'tags'}), tags=['viagem']))
+        assert updated.tags == ['viagem']
+        assert [r['amount'] for r in await repo.list(USER, tag='casa')] == [Decimal('5.00')]
+        assert [r['tags'] for r in await repo.list(USER)] == [None, ['casa'], ['viagem']]
+        totals = await ReportRepository(session).totals_by_tag(USER)
+        assert [(r.tag_name, r.total, r.count) for r in totals] == [('viagem', Decimal('10.00'), 1), ('casa', Decimal('5.00'), 1)]
+    await engine.dispose()
+
+@pytest.mark.anyio
+async def test_deletes_remove_tag_links():
+    # Sem FK de transaction_tags para transactions (particionada no Postgres): quem apaga limpa.
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account), [{'id': i, 'user_id': USER, 'name': 'Conta', 'type': 'checking', 'currency': 'BRL', 'initial_balance': 0} for i in (1, 2)])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        repo = TransactionRepository(session)
+        single = await repo.create(USER, _txn('1.00', ['casa']))
+        batch = await repo.bulk_create(USER, [_txn('2.00', ['casa']), _txn('3.00', ['casa'])])
+        await repo.create(USER, _txn('4.00', ['casa'], account_id=2))
+        links = select(func.count()).select_from(TransactionTag)
+        assert await session.scalar(links) == 4
+        await repo.delete(USER, single.id)
+        await repo.bulk_delete(USER, [t.id for t in batch])
+        assert await session.scalar(links) == 1
+        assert await AccountRepository(session).delete(USER, 2)
+        assert await session.scalar(links) == 0
+    await engine.dispose()
@@ -0,0 +1,50 @@
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.repositories.transactions import TransactionRepository
+from app.services.transactions import TransactionService
+
+USER = uuid.UUID('aaaaaaaa-bbbb-cccc-dddd-000000000001')
+
+ROWS = [
+    ('Mercado Pão de Açúcar', None),
+    ('Supermercado Extra', 'Extra'),
+    ('Compras no mercado', None),
+    ('Uber para o trabalho', 'Uber'),
+    ('Jantar', 'Mercado Livre'),
+    ('Cashback 100%', None),
+]
+
+@pytest.mark.anyio
+async def test_search_ranks_and_paginates_on_sqlite():
+    engine = create_async_engine('sqlite+aiosqlite://')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Account).values(id=1, user_id=USER, name='Conta', type='checking', currency='BRL', initial_balance=0))
+        await conn.execute(insert(Transaction), [{'user_id': USER, 'account_id': 1, 'type': 'expense', 'amount': Decimal('1.00'), 'date': date(2025, 5, i + 1), 'description': d, 'merchant': m} for i, (d, m) in enumerate(ROWS)])
+    async with AsyncSession(engine) as session:
+        service = TransactionService(TransactionRepository(session), user_id=USER)
+        # O termo no começo do texto pesa mais; empates seguem a ordem (date, id) decrescente.
+        expected = ['Mercado Pão de Açúcar', 'Jantar', 'Compras no mercado', 'Supermercado Extra']
+        assert [t.description for t in (await service.list_transactions(q='mercado')).items] == expected
+        assert [t.description for t in (await service.list_transactions(q='  TRABALHO   uber ')).items] == ['Uber para o trabalho']
+        assert [t.description for t in (await service.list_transactions(q='100%')).items] == ['Cashback 100%']
+        seen, cursor = [], None
+        while True:
+            page = await service.list_transactions(q='mercado', limit=1, cursor=cursor)
+            seen += [t.description for t in page.items]
+            if not (cursor := page.next_cursor):
+                break
+        assert seen == expected
+        with pytest.raises(ValueError):
+            await service.list_transactions(q='mercado', cursor=(await service.list_transactions(limit=1)).next_cursor)
+    await engine.dispose()